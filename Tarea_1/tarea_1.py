@@ -1,45 +1,61 @@
 # %% Importamos los módulos a utilizar
 import locale
-import re
-import sys
+import string
 
 import matplotlib.pyplot as plt
 import pandas as pd
 from matplotlib.colors import LinearSegmentedColormap
 from wordcloud import STOPWORDS
 
-from utils.clean_data import clean_text, list_of_tuples, search_punctuation
+from utils.characters import character_counts, frequency_table
+from utils.clean_data import normalize_text
+from utils.compact import (
+    compact_speeches,
+    compact_turns,
+    memory_report,
+    peak_rss,
+    with_metadata,
+)
+from utils.constants import (
+    CANDIDATE_COLORS,
+    EXTRA_STOPWORDS,
+    MENTIONS,
+    PARTIES,
+    POLITICIANS,
+    RC_PARAMS,
+)
+from utils.distinctive import distinctive_terms
+from utils.dtm import DocumentTermMatrix
+from utils.load_data import load_speeches
 from utils.location_analysis import execute as execute_location_analysis
+from utils.mentions import MentionCounter
+from utils.ngrams import ngram_sketches
 from utils.plots import (
     circle_packing_plot,
     directed_graph_plot,
     stacked_bar_plot,
     word_cloud_plot,
 )
+from utils.render import RenderScheduler
+from utils.segmentation import segment_turns
+from utils.speakers import speaker_registry
+from utils.time_buckets import bucket_starts, count_speeches
 
 # %% Letra para que coincida con LaTex
-plt.rcParams.update(
-    {
-        "font.family": "Latin Modern Roman",
-        "mathtext.fontset": "cm",
-        "figure.titlesize": 18,
-        "axes.titlesize": 16,
-        "axes.labelsize": 14,
-        "xtick.labelsize": 12,
-        "ytick.labelsize": 12,
-        "legend.title_fontsize": 16,
-        "legend.fontsize": 14,
-    }
-)
+plt.rcParams.update(RC_PARAMS)
+
+# %% Modo compacto de memoria: metadatos categóricos, texto en Arrow y la tabla de intervenciones
+# sin copiar los datos de cada discurso (se unen por speech_id solo las columnas que se usan)
+COMPACT_MEMORY = False
 
 # %% DataFrame con todos los discursos
-df_speeches = pd.read_csv(
-    filepath_or_buffer=r"data/us_2020_election_speeches.csv", sep=","
-)
+# El CSV se parsea una sola vez y queda en caché (Parquet) hasta que cambie el archivo
+df_speeches = load_speeches(path=r"data/us_2020_election_speeches.csv")
+if COMPACT_MEMORY:
+    df_speeches = compact_speeches(df_speeches)
 
-# Tipos de datos
+# Tipos de datos (la fecha ya viene parseada)
 print(df_speeches.dtypes)
-df_speeches["date"] = pd.to_datetime(df_speeches["date"], format="%b %d, %Y")
 
 # Datos faltantes
 print(df_speeches.isna().sum())
@@ -58,8 +74,10 @@ n_speeches = df_speeches.groupby("speaker").size().sort_values(ascending=False)
 print(df_speeches.speaker.unique())
 
 # %% Gráfico de burbujas con la cantidad de discursos por candidato
-print("Procesando gráfico de burbujas...")
-circle_packing_plot(ds=n_speeches, save_path="img/speaker_analysis.png")
+# Las figuras se encolan y se renderizan todas juntas en paralelo al final del script
+scheduler = RenderScheduler()
+# Una burbuja por orador, sin juntar los de menos discursos en "Otros" (el layout queda en caché)
+scheduler.add(circle_packing_plot, ds=n_speeches, save_path="img/speaker_analysis.png", max_bubbles=None)
 
 # %% Veo que hay discursos donde hay más de un candidato en la columna 'speaker'
 # Como veo que están los nombres separados por ',' quiero ver si es significativa la cantidad de registros
@@ -73,64 +91,49 @@ print(len(df_speeches[df_speeches["speaker"] == "???"]))
 # %% Hay 31 registros en los que no es posible determinar el orador por la columna 'speaker'
 # Voy a generar un DataFrame cuya estructura sea una fila por intervención de cada orador
 # Es decir que un discurso va a tener más de una fila
-df_speeches_2 = df_speeches.copy()
-
-# Elimino lo que está entre [] como [crosstalk...], [inaudible...], etc.
-df_speeches_2["text"] = df_speeches_2["text"].str.replace(r"\[.*?\]", "", regex=True)
-
-# Este comercial en particular me rompe el index 79 donde quiero separar las intervenciones
-df_speeches_2["text"] = df_speeches_2["text"].str.replace("Commercial: (48:14)\r\n", "")
-
-# Elimino el patrón ': (mm:ss)'
-df_speeches_2["text"] = df_speeches_2["text"].str.replace(
-    r": \(\d{2}:\d{2}\)", "", regex=True
-)
-
-# Elimino el patrón ': (hh:mm:ss)'
-df_speeches_2["text"] = df_speeches_2["text"].str.replace(
-    r": \(\d{2}:\d{2}\:\d{2}\)", "", regex=True
-)
-
-# Convierto la columna en una lista donde cada elemento es una intervención de un orador
-# Hay que aplicar un regex si es Mac y otro si es Windows
-if sys.platform == "win32":
-    df_speeches_2["text"] = df_speeches_2["text"].str.split(
-        r"\r\n(?:\xa0\r\n)?", regex=True
+# segment_turns normaliza los finales de línea, elimina lo que está entre [] como [crosstalk...],
+# el comercial que rompía el index 79 y los patrones ': (mm:ss)' y ': (hh:mm:ss)',
+# y devuelve una tabla con una fila por intervención (speech_id, turn_index, speaker, text)
+df_turns = segment_turns(df=df_speeches)
+
+# Le agrego los datos del discurso a cada intervención, manteniendo como index el del discurso
+if COMPACT_MEMORY:
+    # Solo la fecha: el resto de los datos del discurso se consultan en df_speeches por el index
+    df_turns = compact_turns(df_turns)
+    df_speeches_2 = with_metadata(
+        turns=df_turns.drop(columns="turn_index"), speeches=df_speeches, columns=["date"]
     )
+    # El texto completo ya está repartido en las intervenciones
+    df_speeches = df_speeches.drop(columns="text")
 else:
-    df_speeches_2["text"] = df_speeches_2["text"].str.split(
-        r"[(\r\n)\n](?:\xa0[(\r\n)\n])?", regex=True
+    df_speeches_2 = (
+        df_turns.drop(columns="turn_index")
+        .join(df_speeches.drop(columns=["speaker", "text"]), on="speech_id")
+        .set_index("speech_id")
+        .rename_axis(None)
     )
 
-# Convierto la lista en una lista de tuplas donde cada tupla tiene el par orador-discurso
-df_speeches_2["text"] = df_speeches_2["text"].apply(list_of_tuples)
-
-# Con explode hago que cada elemento de la lista (cada tupla) sea una fila
-df_speeches_2 = df_speeches_2.explode("text")
-
-# Sobreescribo los valores de speaker y text con los valores de cada tupla
-df_speeches_2[["speaker", "text"]] = pd.DataFrame(
-    df_speeches_2["text"].tolist(), index=df_speeches_2.index
-)
-
 # Chequeo con los index que la cantidad de discursos sigue siendo la misma
 print(len(df_speeches_2.index.unique()))
 
+# %% Cantidad de oradores distintos en cada discurso
+n_speakers = df_turns.groupby("speech_id")["speaker"].nunique()
+
 # %% Ejemplo 1: Cuántos oradores intervienen en 'Multiple Speakers'
 for i in df_speeches[df_speeches["speaker"] == "Multiple Speakers"].index:
-    print(len(df_speeches_2.loc[i].speaker.unique()))
+    print(n_speakers.get(i, 0))
 
 # %% Ejemplo 2: Cuántos oradores intervienen en 'Democratic Candidates'
 for i in df_speeches[df_speeches["speaker"] == "Democratic Candidates"].index:
-    print(len(df_speeches_2.loc[i].speaker.unique()))
+    print(n_speakers.get(i, 0))
 
 # %% Ejemplo 3: Cuántos oradores intervienen en '???'
 for i in df_speeches[df_speeches["speaker"] == "???"].index:
-    print(len(df_speeches_2.loc[i].speaker.unique()))
+    print(n_speakers.get(i, 0))
 
 # %% Ejemplo 4: Cuántos oradores intervienen en NaN
 for i in df_speeches[df_speeches["speaker"].isna()].index:
-    print(len(df_speeches_2.loc[i].speaker.unique()))
+    print(n_speakers.get(i, 0))
 
 # %% Quiero ver los candidatos que me quedaron
 # df_speeches_2.to_excel(r'data/speeches.xlsx')
@@ -165,34 +168,15 @@ print(
     ].unique()
 )
 
-# Homogeneizar nombres
-names = {
-    "President Trump": "Donald Trump",
-    "President Donald J. Trump": "Donald Trump",
-    "President Donald Trump": "Donald Trump",
-    "Donald J. Trump": "Donald Trump",
-    "Trump": "Donald Trump",
-    "Vice President Joe Biden": "Joe Biden",
-    "VIce President Biden": "Joe Biden",
-    "Joe Biden ": "Joe Biden",
-    "Vice President Mike Pence": "Mike Pence",
-    "Vice President Mike Pence ": "Mike Pence",
-    "Kamala Harris ": "Kamala Harris",
-    "Senator Kamala Harris": "Kamala Harris",
-    "Senator Harris": "Kamala Harris",
-    "Senator Bernie Sanders": "Bernie Sanders",
-    "Sanders": "Bernie Sanders",
-}
-df_speeches_2["speaker"] = (
-    df_speeches_2["speaker"].map(names).fillna(df_speeches_2["speaker"])
-)
+# Homogeneizar nombres: el registro saca títulos y espacios, resuelve los alias de SPEAKER_NAMES
+# y las variantes con errores de tipeo, una sola vez por cada nombre distinto
+speaker_names = speaker_registry()
+df_speeches_2["speaker"] = speaker_names.canonicalize(df_speeches_2["speaker"])
+speaker_names.print_report()
 
 # %% Para chequear escala temporal
 print(df_speeches_2["date"].min())
 print(df_speeches_2["date"].max())
-df_speeches_2["week"] = (
-    df_speeches_2["date"].dt.to_period("W").apply(lambda x: x.start_time)
-)
 
 # %% Me quedo con las intervenciones del top 5
 df_speeches_top_5 = df_speeches_2[df_speeches_2["speaker"].isin(top_5)].copy()
@@ -201,31 +185,21 @@ df_speeches_top_5 = df_speeches_2[df_speeches_2["speaker"].isin(top_5)].copy()
 print(df_speeches_top_5.isna().sum())
 
 # %% Asignar partido politico
-parties = {
-    "Joe Biden": "Partido Demócrata",
-    "Kamala Harris": "Partido Demócrata",
-    "Bernie Sanders": "Partido Demócrata",
-    "Donald Trump": "Partido Republicano",
-    "Mike Pence": "Partido Republicano",
-}
+parties = PARTIES
 df_speeches_top_5["party"] = df_speeches_top_5["speaker"].map(parties)
 
 # %% Establecer a idioma español para que las fechas de las gráficas queden en ese idioma
 locale.setlocale(locale.LC_TIME, locale="es_ES.UTF-8")
 
 # %% Visualización de los discursos de cada candidato a lo largo del tiempo
-df = (
-    df_speeches_top_5.groupby(["week", "speaker"])
-    .apply(lambda x: x.index.nunique(), include_groups=False)
-    .reset_index(name="speeches")
-    .sort_values("week")
-)
-df_pivot = df.pivot(index="week", columns="speaker", values="speeches").fillna(0)
+# count_speeches cuenta los discursos distintos (index) por semana y candidato sin recorrer grupo por grupo
+df_pivot = count_speeches(df=df_speeches_top_5, by="speaker", freq="week")
 df_pivot = df_pivot[
     ["Joe Biden", "Kamala Harris", "Bernie Sanders", "Donald Trump", "Mike Pence"]
 ]
 df_pivot.index = df_pivot.index.strftime("%b %d")
-stacked_bar_plot(
+scheduler.add(
+    stacked_bar_plot,
     df=df_pivot,
     save_path="img/discursos_candidatos_por_semana.png",
     color=["#1f77b4", "#4e9cd5", "#8fbadd", "#d62728", "#e96a6a"],
@@ -236,23 +210,33 @@ stacked_bar_plot(
 )
 
 # %% Busco los signos de puntuación que existen para después agregarlos a la función clean_text
-print(search_punctuation(df=df_speeches_top_5, column_name="text"))
+# Se cuentan los caracteres no alfanuméricos de cada intervención en una sola pasada sobre los bytes del texto
+characters = character_counts(df_speeches_top_5["text"])
+print(set(characters.terms) & set(string.punctuation))
+print(frequency_table(characters.groupby(df_speeches_top_5["speaker"])).iloc[:, :20])
 
 # %% Creamos una nueva columna CleanText a partir de text
-df_speeches_top_5["clean_text"] = clean_text(df=df_speeches_top_5, column_name="text")
-
-# %% Convierte párrafos en listas 'palabra1 palabra2 palabra3' -> ['palabra1', 'palabra2', 'palabra3']
-df_speeches_top_5["word_list"] = df_speeches_top_5["clean_text"].str.split()
+# normalize_text hace lo mismo que clean_text en una sola pasada y además cubre comillas curvas, guiones, etc.
+df_speeches_top_5["clean_text"] = normalize_text(
+    df=df_speeches_top_5, column_name="text", unicode=True
+)
 
-# Veamos la nueva columna creada: notar que a la derecha tenemos una lista: [palabra1, palabra2, palabra3]
-print(df_speeches_top_5[["clean_text", "word_list"]])
+# %% Matriz documento-término: cada intervención se tokeniza una sola vez y el resto de los conteos
+# de palabras (por candidato, semana o partido) salen de sumar filas de la matriz dispersa
+dtm = DocumentTermMatrix.from_texts(df_speeches_top_5["clean_text"])
+print(f"{dtm.shape[0]} intervenciones, {dtm.shape[1]} palabras distintas")
+dtm_speakers = dtm.groupby(df_speeches_top_5["speaker"])
 
-# %% Realice una visualización que permita comparar las palabras más frecuentes de cada uno de los cinco candidatos/as.
-df = (
-    df_speeches_top_5.groupby("speaker")["clean_text"]
-    .apply(lambda x: " ".join(x))
-    .reset_index()
+# %% Memoria de las tablas de discursos e intervenciones (ver COMPACT_MEMORY)
+memory = memory_report(
+    {
+        "df_speeches": df_speeches,
+        "df_speeches_2": df_speeches_2,
+        "df_speeches_top_5": df_speeches_top_5,
+    }
 )
+print(memory.groupby("table")["bytes"].sum() / 2**20)
+print("Pico de RSS (bytes):", peak_rss())
 
 # Crear un colormap personalizado de rojo a azul
 us_cmap = LinearSegmentedColormap.from_list(
@@ -260,103 +244,91 @@ us_cmap = LinearSegmentedColormap.from_list(
 )
 
 # Para eliminar palabras comunes del idioma que no aportan (agrego otras que no trae el módulo worldcloud)
-STOPWORDS.update(
-    [
-        "s",
-        "re",
-        "don",
-        "didn",
-        "know",
-        "will",
-        "going",
-        "need",
-        "t",
-        "people",
-        "think",
-        "want",
-        "well",
-        "let",
-        "said",
-        "thank",
-        "one",
-    ]
+STOPWORDS.update(EXTRA_STOPWORDS)
+
+# %% Realice una visualización que permita comparar las palabras más frecuentes de cada uno de los cinco candidatos/as.
+df = (
+    dtm_speakers.top_terms(k=100, exclude=STOPWORDS)
+    .rename_axis("speaker")
+    .reset_index()
 )
 
 # %% Creo una nube por candidato con las 100 palabras más dichas
-word_cloud_plot(
+scheduler.add(
+    word_cloud_plot,
     df=df,
     save_path="img/wordcloud_por_candidato.png",
     plot_title="",
     colormap=us_cmap,
     stopwords=STOPWORDS,
     max_words=100,
-    text="clean_text",
+    text="frequencies",
     speaker="speaker",
+    random_state=0,
 )
 
 # El problema en los resultados son las palabras comunes
 # Esas palabras quitan el foco de otras palabras que pueden indicar los tópicos que cada candidato considera más relevantes
 
-# %% Busque los candidatos/as con mayor cantidad de palabras.
-df_speeches_top_5["n_words"] = df_speeches_top_5["word_list"].apply(lambda x: len(x))
-print(
-    df_speeches_top_5.groupby("speaker")["n_words"].sum().sort_values(ascending=False)
+# %% Palabras distintivas: en vez de seguir agregando stopwords a mano, cada palabra de cada candidato, partido
+# y semana se compara con el resto de su agrupación (log-odds ponderado con un prior informativo, ver utils.distinctive)
+# Las palabras que todos dicen por igual quedan con un puntaje cercano a 0
+distinctive = distinctive_terms(
+    dtm,
+    groupings={
+        "speaker": df_speeches_top_5["speaker"],
+        "party": df_speeches_top_5["party"],
+        "week": bucket_starts(df_speeches_top_5["date"]),
+    },
 )
+ranked = distinctive.ranked_terms(k=10)
+print(ranked[ranked["grouping"] != "week"].pivot(index="rank", columns="group", values="term").to_string())
+
+# %% Nube por candidato con sus 100 palabras más distintivas, el tamaño es el puntaje
+scheduler.add(
+    word_cloud_plot,
+    df=distinctive.top_terms(k=100).loc["speaker"].rename_axis("speaker").reset_index(),
+    save_path="img/wordcloud_distintivas_por_candidato.png",
+    plot_title="",
+    colormap=us_cmap,
+    stopwords=STOPWORDS,
+    max_words=100,
+    text="frequencies",
+    speaker="speaker",
+    random_state=0,
+)
+
+# %% Frases más dichas por candidato: bigramas y trigramas que no empiezan ni terminan en una stopword
+# Cada candidato guarda un resumen de tamaño fijo (ver NgramSketch), count y upper acotan la frecuencia real
+for n in (2, 3):
+    print(
+        ngram_sketches(df_speeches_top_5, n=n, stopwords=STOPWORDS)
+        .top(10)
+        .to_string(index=False)
+    )
+
+# %% Busque los candidatos/as con mayor cantidad de palabras.
+print(dtm_speakers.n_words().sort_values(ascending=False))
 
 # %% Formas de mencionar a los candidatos
-menciones = {
-    "Joe Biden": [
-        r"\bjoe biden\b",
-        r"\bbiden\b",
-        r"\bvice president biden\b",
-        r"\bvice president joe biden\b",
-    ],
-    "Donald Trump": [
-        r"\bdonald trump\b",
-        r"\btrump\b",
-        r"\bpresident trump\b",
-        r"\bpresident donald\b",
-        r"\bdonald\b",
-    ],
-    "Mike Pence": [r"\bmike pence\b", r"\bpence\b", r"\bvice president pence\b"],
-    "Bernie Sanders": [r"\bbernie sanders\b", r"\bsanders\b"],
-    "Kamala Harris": [
-        r"\bkamala harris\b",
-        r"\bharris\b",
-        r"\bsenator harris\b",
-        r"\bkamala\b",
-    ],
-}
+menciones = MENTIONS
 
 # Construya una matriz de 5x5, donde cada fila y columna corresponden a un candiato/a,
 # y la entrada (i,j) contiene la cantidad de veces que el candiato/a “i” menciona al candiato/a “j”.
-mentions_matrix = pd.DataFrame(data=0, index=top_5, columns=top_5)
-for _, row in df.iterrows():
-    candidato = row["speaker"]
-    discursos = row["clean_text"]
-    for nombre_mencionado, patrones in menciones.items():
-        # Para evitar menciones a sí mismo
-        # if nombre_mencionado == candidato:
-        #     continue
-
-        # Arranco la cuenta de los patrones de texto en los discursos
-        total = 0
-        for patron in patrones:
-            coincidencias = re.findall(patron, discursos)
-            total += len(coincidencias)
-
-        # Lo agrego a la matriz
-        mentions_matrix.loc[candidato, nombre_mencionado] = total
+# Un solo autómata (Aho-Corasick) con todos los patrones recorre cada intervención una vez.
+# Con mode="longest" "joe biden" cuenta como una mención y no también como "biden"
+mention_counter = MentionCounter(aliases=menciones)
+mentions_matrix = mention_counter.matrix(
+    texts=df_speeches_top_5["clean_text"],
+    speakers=df_speeches_top_5["speaker"],
+    index=top_5,
+    mode="longest",
+)[top_5]
 
 # %% Opcional: Genere un grafo dirigido con esa matriz de adyacencia para visualizar las menciones.
-colores_por_candidato = {
-    "Bernie Sanders": "#8fbadd",
-    "Donald Trump": "#d62728",
-    "Joe Biden": "#1f77b4",
-    "Kamala Harris": "#4e9cd5",
-    "Mike Pence": "#e96a6a",
-}
-directed_graph_plot(
+colores_por_candidato = CANDIDATE_COLORS
+scheduler.add(
+    directed_graph_plot,
     df=mentions_matrix,
     save_path="img/graph.png",
     plot_title="Grafo Dirigido de Menciones entre Candidatos",
@@ -379,127 +351,12 @@ grp_otros = [nombre for nombre in grp_otros if "Moderator" not in nombre]
 grp_otros = [nombre for nombre in grp_otros if "Crowd" not in nombre]
 
 # Lista de políticos identificados en el grupo Otros
-politicos = [
-    "Joe Biden",
-    "Kamala Harris",
-    "Bernie Sanders",
-    "Donald Trump",
-    "Mike Pence",
-    "Alex Padilla",
-    "Alexandria Ocasio-Cortez",
-    "Amy Klobuchar",
-    "Andrew Cuomo",
-    "Andrew Yang",
-    "Barack Obama",
-    "Ben Carson",
-    "Beto O’Rourke",
-    "Bill Clinton",
-    "Bob Casey",
-    "Brendan Boyle",
-    "Brenda Lawrence",
-    "Carol Moseley Braun",
-    "Catherine Cortez Masto",
-    "Cedric Richmond",
-    "Chuck Hagel",
-    "Chuck Schumer",
-    "Colin Allred",
-    "Colin Powell",
-    "Conor Lamb",
-    "Cory Booker",
-    "Cory Gardner",
-    "David Perdue",
-    "David Zuckerman",
-    "Debbie Mucarsel-Powell",
-    "Deb Haaland",
-    "Doug Ducey",
-    "Doug Jones",
-    "Donna Brazile",
-    "Donald Trump Jr.",
-    "Elise Stefanik",
-    "Elizabeth Warren",
-    "Eric Garcetti",
-    "Eric Trump",
-    "Filemon Vela",
-    "Gary Peters",
-    "Gavin Newsom",
-    "Gretchen Whitmer",
-    "Gwen Moore",
-    "Hillary Clinton",
-    "Ilhan Omar",
-    "Jamie Harrison",
-    "Joaquin Castro",
-    "Joe Gruters",
-    "John Carney",
-    "John Kerry",
-    "John Lynch",
-    "John McCain",
-    "John Kasich",
-    "Jon Meacham",
-    "Josh Holt",
-    "Karen Pence",
-    "Keisha Lance Bottoms",
-    "Kellyanne Conway",
-    "Kirsten Gillibrand",
-    "Kristi Noem",
-    "Lindsey Graham",
-    "Lisa Blunt Rochester",
-    "Lori Lightfoot",
-    "Madison Cawthorn",
-    "Malcolm Kenyatta",
-    "Mandela Barnes",
-    "Maria Cardona",
-    "Mark Meadows",
-    "Martha McSally",
-    "Matt Gaetz",
-    "Melania Trump",
-    "Melvin Carter",
-    "Michelle Lujan Grisham",
-    "Mike Bloomberg",
-    "Mike Pompeo",
-    "Mitch McConnell",
-    "Muriel Bowser",
-    "Nancy Pelosi",
-    "Ned Lamont",
-    "Nikki Fried",
-    "Nikki Haley",
-    "Pete Buttigieg",
-    "Phil Murphy",
-    "Pramila Jayapal",
-    "Rand Paul",
-    "Raphael Warnock",
-    "Ronna McDaniel",
-    "Ron DeSantis",
-    "Ron Kind",
-    "Ron Klain",
-    "Seth Moulton",
-    "Stacey Abrams",
-    "Steve Sisolak",
-    "Tammy Baldwin",
-    "Tammy Duckworth",
-    "Ted Kaufman",
-    "Ted Lieu",
-    "Thom Tillis",
-    "Tim Ryan",
-    "Tim Scott",
-    "Tom Carper",
-    "Tom Perez",
-    "Tom Steyer",
-    "Tulsi Gabbard",
-    "Val Demings",
-    "Veronica Escobar",
-    "Yvanna Cancela",
-    "Zoe Lofgren",
-]
+politicos = POLITICIANS
 
 # %% Gráfico con la categoría Otros
-df = (
-    df_speeches_2[df_speeches_2["speaker"].isin(politicos)]
-    .groupby(["week", "speaker_2"])
-    .apply(lambda x: x.index.nunique(), include_groups=False)
-    .reset_index(name="speeches")
-    .sort_values("week")
+df_pivot = count_speeches(
+    df=df_speeches_2[df_speeches_2["speaker"].isin(politicos)], by="speaker_2", freq="week"
 )
-df_pivot = df.pivot(index="week", columns="speaker_2", values="speeches").fillna(0)
 df_pivot = df_pivot[
     [
         "Joe Biden",
@@ -511,7 +368,8 @@ df_pivot = df_pivot[
     ]
 ]
 df_pivot.index = df_pivot.index.strftime("%b %d")
-stacked_bar_plot(
+scheduler.add(
+    stacked_bar_plot,
     df=df_pivot,
     save_path="img/discursos_candidatos_por_semana_2.png",
     color=["#1f77b4", "#4e9cd5", "#8fbadd", "#d62728", "#e96a6a", "#949494"],
@@ -522,4 +380,16 @@ stacked_bar_plot(
 )
 
 # %% Ejecuto location_analysis.py
-execute_location_analysis(df=df_speeches)
+# Solo necesita speaker, date y location, así que no se carga la columna text
+execute_location_analysis(
+    df=load_speeches(
+        path=r"data/us_2020_election_speeches.csv",
+        columns=["speaker", "date", "location"],
+    ),
+    scheduler=scheduler,
+)
+
+# %% Renderizo todas las figuras
+print("Procesando gráficos...")
+for job in scheduler.run():
+    print(f"{job['save_path']}: {job['seconds']:.1f} s")
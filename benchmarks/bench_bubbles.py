@@ -0,0 +1,93 @@
+# Gráfico de burbujas: la versión que guardaba la figura una vez por círculo y empaquetaba con circlify
+# en cada corrida, contra la que guarda una sola vez, cachea los layouts y agrupa la cola en "Otros"
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python benchmarks/bench_bubbles.py [--speakers 10 20 1000 5000] [--legacy-max 20]
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from circlify import circlify
+
+from utils.bubbles import pack_circles
+from utils.plots import circle_packing_plot
+
+matplotlib.use("Agg")
+
+
+def legacy_circle_packing_plot(ds: pd.Series, save_path: str, scale: int = 2, threshold: float = 0.15):
+    # Lo que hacía plots.py: tight_layout, savefig y close dentro del loop de los círculos
+    sorted_counts = ds.sort_values(ascending=False)
+    speaker_names = sorted_counts.index.tolist()
+    count_values = sorted_counts.tolist()
+    circles = circlify(count_values)[::-1]
+    fig, ax = plt.subplots(figsize=(10, 10))
+    ax.axis("off")
+    lim = max(max(abs(c.x * scale) + c.r * scale, abs(c.y * scale) + c.r * scale) for c in circles)
+    ax.set_xlim(-lim, lim)
+    ax.set_ylim(-lim, lim)
+    color_palette = sns.color_palette(palette="tab10", n_colors=20)
+    for i, circle in enumerate(circles):
+        x, y, r = circle
+        x, y, r = x * scale, y * scale, r * scale
+        ax.add_patch(plt.Circle(xy=(x, y), radius=r, alpha=0.5, linewidth=2, fill=True, color=color_palette[i % 20]))
+        font_size = max(8, min(20, r * 40))
+        speaker = speaker_names[i].replace(" ", "\n")
+        if len(speaker) > 12 and r < 0.1:
+            speaker = speaker[:12] + "..."
+        ax.text(x=x, y=y, s=speaker, ha="center", va="center", fontsize=font_size)
+        if r > threshold:
+            ax.text(x=x, y=y - font_size / 100, s=f"({count_values[i]})", ha="center", va="center", fontsize=font_size * 0.8, alpha=0.8)
+        fig.tight_layout()
+        fig.savefig(fname=save_path, dpi=300, bbox_inches="tight")
+        plt.close(fig)
+
+
+def speaker_counts(n: int, seed: int = 0) -> pd.Series:
+    # Pocos oradores con muchos discursos y una cola larga con uno o dos
+    counts = np.random.default_rng(seed).zipf(1.6, n)
+    return pd.Series(counts, index=[f"Speaker {i}" for i in range(n)])
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--speakers", type=int, nargs="+", default=[10, 20, 1000, 5000])
+    parser.add_argument("--legacy-max", type=int, default=20, help="La versión anterior solo con hasta estos oradores")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        folder = Path(folder)
+        for n in args.speakers:
+            ds = speaker_counts(n)
+            cache_dir = folder / f"layouts-{n}"
+            print(f"{n} oradores:")
+            if n <= args.legacy_max:
+                legacy = timed(lambda: legacy_circle_packing_plot(ds, save_path=str(folder / "legacy.png")))
+                print(f"  antes:                                 {legacy:8.2f} s")
+            cold = timed(lambda: circle_packing_plot(ds, save_path=str(folder / "new.png"), cache_dir=cache_dir))
+            print(f"  ahora, layout sin caché:               {cold:8.2f} s")
+            pack_circles.cache_clear()
+            disk = timed(lambda: circle_packing_plot(ds, save_path=str(folder / "new.png"), cache_dir=cache_dir))
+            print(f"  ahora, layout del caché en disco:      {disk:8.2f} s")
+            memory = timed(lambda: circle_packing_plot(ds, save_path=str(folder / "new.png"), cache_dir=cache_dir))
+            print(f"  ahora, layout del caché en memoria:    {memory:8.2f} s")
+            if n <= args.legacy_max:
+                same = (folder / "legacy.png").read_bytes() == (folder / "new.png").read_bytes()
+                print(f"  misma imagen: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# Signos de puntuación: la versión de search_punctuation que unía todo el texto en un string y armaba
+# la lista de signos con re.findall, contra el conteo de caracteres por filas sobre los bytes UTF-8 y su
+# versión por chunks del CSV. Cada caso corre en un proceso hijo para medir el pico de memoria que agrega
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python benchmarks/bench_characters.py [--scales 1 10] [--data-dir data/synthetic]
+import argparse
+import re
+import string
+import time
+
+from benchmarks.suite import forked
+from benchmarks.synthetic import SYNTHETIC_DIR, corpus_path
+from utils.characters import character_counts, profile_chunks
+from utils.clean_data import search_punctuation
+from utils.load_data import parse_speeches, read_speeches
+
+
+def legacy_search_punctuation(df, column_name: str) -> set:
+    # Lo que hacía clean_data.py
+    texto = " ".join(df[f"{column_name}"])
+    signos = re.findall(f"[{re.escape(string.punctuation)}]", texto)
+    return set(signos)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10])
+    parser.add_argument("--data-dir", default=SYNTHETIC_DIR)
+    parser.add_argument("--chunksize", type=int, default=1000)
+    args = parser.parse_args()
+
+    for scale in args.scales:
+        path = corpus_path(scale=scale, output=args.data_dir)
+        df = parse_speeches(path)
+        print(f"x{scale:g}: {len(df)} discursos, {df['text'].str.len().sum() / 2**20:.0f} MiB de texto")
+        cases = {
+            "antes (join + re.findall)": lambda: legacy_search_punctuation(df, "text"),
+            "search_punctuation": lambda: search_punctuation(df, "text"),
+            "character_counts por discurso": lambda: character_counts(df["text"]).term_totals().to_dict(),
+            "profile_chunks desde el CSV": lambda: profile_chunks(
+                read_speeches(path, chunksize=args.chunksize, columns=["speaker", "text"])
+            )
+            .term_totals()
+            .to_dict(),
+        }
+        results = {}
+        for name, func in cases.items():
+            (result, seconds), memory = forked(timed, func)
+            results[name] = result
+            print(f"  {name:<32} {seconds:8.2f} s {memory / 2**20 if memory is not None else float('nan'):8.0f} MiB")
+
+        signs = results["antes (join + re.findall)"]
+        assert results["search_punctuation"] == signs
+        assert set(results["character_counts por discurso"]) & set(string.punctuation) == signs
+        assert results["profile_chunks desde el CSV"] == results["character_counts por discurso"]
+        print("  Mismos signos y mismas frecuencias")
+
+
+if __name__ == "__main__":
+    main()
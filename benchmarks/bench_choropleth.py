@@ -0,0 +1,115 @@
+# Mapas coroplético: la versión de states_map_plot que dibujaba la capa dos veces con geopandas (bordes y
+# después los rellenos, filtrando dos veces) y ponía una etiqueta por fila con iterrows y plt.text, contra
+# choropleth_plot (una colección para los polígonos y otra para las etiquetas), sobre la capa de países de
+# Natural Earth y capas sintéticas con miles de polígonos de muchos vértices (como condados)
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python benchmarks/bench_choropleth.py [--regions 3000 4000] [--vertices 200] [--dpi 300]
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import geopandas as gpd
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import shapely
+
+from utils.geometry import load_countries
+from utils.plots import choropleth_plot
+
+COLORS = {"Partido Demócrata": "#1f77b4", "Partido Republicano": "red", "Empate": "gray"}
+
+
+def legacy_plot(layer: gpd.GeoDataFrame, save_path: str, dpi: int):
+    # Lo que hacía states_map_plot
+    fig, ax = plt.subplots(nrows=1, ncols=1, figsize=(20, 10))
+    layer.boundary.plot(ax=ax, color="black", linewidth=0.5)
+    layer.dropna(subset=["winner"]).plot(
+        ax=ax,
+        color=layer.dropna(subset=["winner"])["winner"].map(COLORS),
+        edgecolor="black",
+        linewidth=0.5,
+    )
+    for _, row in layer.dropna(subset=["winner"]).iterrows():
+        plt.text(row["label_x"], row["label_y"], row["label"], ha="center", va="center", fontsize=20, weight="bold")
+    plt.title("Mapa", fontsize=24, fontweight="bold")
+    plt.axis("off")
+    plt.savefig(save_path, dpi=dpi)
+    plt.close(fig)
+
+
+def synthetic_layer(n_regions: int, n_vertices: int, seed: int = 0) -> gpd.GeoDataFrame:
+    # Una grilla de regiones con bordes irregulares de n_vertices vértices cada una, y un agujero cada diez
+    rng = np.random.default_rng(seed)
+    side = int(np.ceil(np.sqrt(n_regions)))
+    centers = np.column_stack(np.divmod(np.arange(n_regions), side)).astype(float)[:, ::-1]
+    angles = np.linspace(0, 2 * np.pi, n_vertices, endpoint=False)
+    radii = 0.45 * (1 + 0.1 * rng.standard_normal((n_regions, n_vertices)))
+    shells = centers[:, None, :] + radii[..., None] * np.stack([np.cos(angles), np.sin(angles)], axis=-1)
+    polygons = shapely.polygons(np.concatenate([shells, shells[:, :1]], axis=1))
+    holes = np.arange(n_regions) % 10 == 0
+    polygons[holes] = shapely.difference(polygons[holes], shapely.buffer(shapely.points(centers[holes]), 0.1))
+    # El caché de capas guarda el punto de la etiqueta, acá es el centro
+    return gpd.GeoDataFrame(
+        {"name": [f"R{i}" for i in range(n_regions)], "label_x": centers[:, 0], "label_y": centers[:, 1]},
+        geometry=polygons,
+    )
+
+
+def with_tallies(layer: gpd.GeoDataFrame, seed: int = 0) -> gpd.GeoDataFrame:
+    rng = np.random.default_rng(seed)
+    layer = layer.copy()
+    dem, rep = rng.integers(0, 20, size=(2, len(layer)))
+    layer["winner"] = pd.Series(np.where(dem > rep, "Partido Demócrata", "Partido Republicano")).where(
+        rng.random(len(layer)) < 0.7
+    ).to_numpy()
+    layer["label"] = [f"{d}/{r}" for d, r in zip(dem, rep)]
+    return layer
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--regions", type=int, nargs="+", default=[3000, 4000])
+    parser.add_argument("--vertices", type=int, default=200)
+    parser.add_argument("--dpi", type=int, default=300)
+    args = parser.parse_args()
+
+    countries = load_countries(columns=["NAME", "label_x", "label_y"]).rename(columns={"NAME": "name"})
+    layers = {"países (ne_110m_admin_0_countries)": countries}
+    for n_regions in args.regions:
+        layers[f"sintética: {n_regions} regiones x {args.vertices} vértices"] = synthetic_layer(n_regions, args.vertices)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, layer in layers.items():
+            layer = with_tallies(layer)
+            n_vertices = len(shapely.get_coordinates(layer.geometry.values))
+            print(f"{name}: {len(layer)} filas, {n_vertices} vértices")
+            legacy = timed(lambda: legacy_plot(layer, str(Path(directory) / "antes.png"), dpi=args.dpi))
+            new = timed(
+                lambda: choropleth_plot(
+                    layer=layer,
+                    save_path=str(Path(directory) / "despues.png"),
+                    colors=layer["winner"].map(COLORS),
+                    labels=layer["label"].where(layer["winner"].notna()),
+                    plot_title="Mapa",
+                    dpi=args.dpi,
+                )
+            )
+            print(f"  antes (geopandas x2 + iterrows/plt.text) {legacy:8.2f} s")
+            print(f"  choropleth_plot                          {new:8.2f} s   ({legacy / new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# Compara clean_text (un str.replace por signo) contra normalize_text (una sola pasada)
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python benchmarks/bench_clean_text.py [--path data/us_2020_election_speeches.csv] [--repeat 3]
+import argparse
+import time
+
+import pandas as pd
+
+from utils.clean_data import clean_text, normalize_text
+
+
+def best_of(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default="data/us_2020_election_speeches.csv")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.path, usecols=["text"])
+    size_mb = df["text"].str.len().sum() / 1e6
+    print(f"{len(df)} discursos, {size_mb:.1f} M caracteres")
+
+    # La salida tiene que ser idéntica a la de clean_text
+    expected = clean_text(df=df, column_name="text")
+    result = normalize_text(df=df, column_name="text")
+    pd.testing.assert_series_equal(expected, result)
+
+    t_old = best_of(lambda: clean_text(df=df, column_name="text"), args.repeat)
+    t_new = best_of(lambda: normalize_text(df=df, column_name="text"), args.repeat)
+    t_uni = best_of(lambda: normalize_text(df=df, column_name="text", unicode=True), args.repeat)
+    print(f"clean_text:                   {t_old:.3f} s")
+    print(f"normalize_text:               {t_new:.3f} s ({t_old / t_new:.1f}x)")
+    print(f"normalize_text(unicode=True): {t_uni:.3f} s ({t_old / t_uni:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# Palabras distintivas (utils.distinctive): distinctive_terms puntúa de una vez todos los candidatos, partidos
+# y semanas con operaciones sobre los conteos distintos de cero, contra calcular el log-odds ponderado y el
+# TF-IDF grupo por grupo con vectores densos. Los conteos por candidato y semana se arman leyendo el corpus
+# por partes, así el corpus de 100x no tiene que entrar en memoria
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python benchmarks/bench_distinctive.py [--scales 1 10 100] [--chunksize 1000]
+import argparse
+import time
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import SYNTHETIC_DIR, corpus_path
+from utils.clean_data import normalize_text
+from utils.constants import CANDIDATE_ORDER, PARTIES
+from utils.distinctive import distinctive_terms, stack_groupings
+from utils.dtm import DocumentTermMatrix
+from utils.load_data import read_speeches
+from utils.speakers import speaker_registry
+from utils.streaming import normalize_chunks, segment_chunks
+from utils.time_buckets import bucket_starts
+
+
+def speaker_week_counts(path: str, chunksize: int) -> DocumentTermMatrix:
+    # Palabras de cada candidato por semana, sumando las de cada parte del corpus
+    chunks = normalize_chunks(segment_chunks(read_speeches(path, chunksize=chunksize)), registry=speaker_registry())
+    matrices = []
+    for _, turns in chunks:
+        top = turns[turns["speaker"].isin(CANDIDATE_ORDER)]
+        dtm = DocumentTermMatrix.from_texts(normalize_text(df=top, column_name="text", unicode=True))
+        matrices.append(dtm.groupby([top["speaker"].astype(str).to_numpy(), bucket_starts(top["date"]).to_numpy()]))
+    return reduce(DocumentTermMatrix.merge, matrices)
+
+
+def legacy_scores(dtm: DocumentTermMatrix, groupings: dict, method: str, alpha0: float = 500) -> dict:
+    # Un grupo a la vez, con vectores densos del tamaño del vocabulario
+    grouped, segments = stack_groupings(dtm, groupings)
+    prior = np.asarray(grouped.counts.sum(axis=0), dtype=np.float64)
+    alpha = alpha0 * prior / prior.sum()
+    scores = {}
+    for segment in np.unique(segments):
+        rows = np.flatnonzero(segments == segment)
+        block = grouped.counts[rows]
+        totals = np.asarray(block.sum(axis=0), dtype=np.float64)
+        documents = np.asarray((block > 0).sum(axis=0))
+        for row in rows:
+            y = grouped.counts[[row]].toarray()[0].astype(np.float64)
+            if method == "tf_idf":
+                score = y / y.sum() * np.log(len(rows) / np.maximum(documents, 1))
+            else:
+                rest = totals - y
+                delta = np.log((y + alpha) / (y.sum() + alpha0 - y - alpha)) - np.log(
+                    (rest + alpha) / (rest.sum() + alpha0 - rest - alpha)
+                )
+                score = delta / np.sqrt(1 / (y + alpha) + 1 / (rest + alpha))
+            score = pd.Series(np.where(y > 0, score, 0), index=grouped.terms)
+            # A igual puntaje, el término que apareció primero (como top_terms)
+            scores[grouped.labels[row]] = score[score > 0].sort_values(ascending=False, kind="stable")
+    return scores
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--data-dir", default=SYNTHETIC_DIR)
+    parser.add_argument("--chunksize", type=int, default=1000)
+    parser.add_argument("--top", type=int, default=100)
+    args = parser.parse_args()
+
+    for scale in args.scales:
+        dtm, seconds = timed(speaker_week_counts, corpus_path(scale=scale, output=args.data_dir), args.chunksize)
+        # merge deja las etiquetas como tuplas (candidato, semana)
+        labels = pd.MultiIndex.from_tuples(dtm.labels)
+        speaker, week = labels.get_level_values(0), labels.get_level_values(1)
+        groupings = {"speaker": speaker, "party": speaker.map(PARTIES), "week": week}
+        print(
+            f"x{scale:g}: {dtm.counts.sum()} palabras, {dtm.shape[1]} distintas, "
+            f"{dtm.shape[0]} candidato-semana (conteos en {seconds:.1f} s)"
+        )
+        for method in ("log_odds", "tf_idf"):
+            scores, new = timed(distinctive_terms, dtm, groupings, method=method)
+            top, top_seconds = timed(scores.top_terms, k=args.top, include_numbers=True)
+            legacy, old = timed(legacy_scores, dtm, groupings, method)
+            same = all(
+                list(top[label]) == list(legacy[label].index[: args.top])
+                and np.allclose(list(top[label].values()), legacy[label].to_numpy()[: args.top])
+                for label in top.index
+            )
+            print(
+                f"  {method:<9} grupo por grupo {old:7.2f} s   distinctive_terms {new:6.2f} s"
+                f" + top_terms {top_seconds:5.2f} s   mismo ranking: {same}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# Conteos de palabras: listas por intervención + apply(len) + " ".join por candidato contra
+# la matriz documento-término dispersa, y verifica que den los mismos conteos
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python benchmarks/bench_dtm.py [--path data/us_2020_election_speeches.csv] [--repeat 3]
+import argparse
+import time
+from collections import Counter
+
+import pandas as pd
+
+from utils.clean_data import normalize_text
+from utils.dtm import DocumentTermMatrix
+from utils.segmentation import segment_turns
+
+
+def legacy_counts(df: pd.DataFrame) -> tuple:
+    # Lo que hacía tarea_1.py: una lista de palabras por intervención y otra tokenización por candidato
+    df = df.copy()
+    df["word_list"] = df["clean_text"].str.split()
+    df["n_words"] = df["word_list"].apply(lambda x: len(x))
+    n_words = df.groupby("speaker")["n_words"].sum()
+    text = df.groupby("speaker")["clean_text"].apply(lambda x: " ".join(x))
+    top_terms = text.map(lambda x: dict(Counter(x.split()).most_common(100)))
+    return n_words, top_terms
+
+
+def dtm_counts(df: pd.DataFrame) -> tuple:
+    dtm_speakers = DocumentTermMatrix.from_texts(df["clean_text"]).groupby(df["speaker"])
+    return dtm_speakers.n_words(), dtm_speakers.top_terms(k=100, include_numbers=True)
+
+
+def best_of(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default="data/us_2020_election_speeches.csv")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = segment_turns(pd.read_csv(args.path))
+    df["clean_text"] = normalize_text(df=df, column_name="text", unicode=True)
+    dtm = DocumentTermMatrix.from_texts(df["clean_text"])
+    print(f"{dtm.shape[0]} intervenciones, {dtm.shape[1]} palabras distintas, {dtm.counts.nnz} celdas no nulas")
+
+    old_words, old_top = legacy_counts(df)
+    new_words, new_top = dtm_counts(df)
+    assert old_words.sort_index().tolist() == new_words.sort_index().tolist()
+    # Los empates pueden quedar en distinto orden, comparo las frecuencias
+    assert all(sorted(old_top[s].values()) == sorted(new_top[s].values()) for s in old_top.index)
+
+    t_old = best_of(lambda: legacy_counts(df), args.repeat)
+    t_new = best_of(lambda: dtm_counts(df), args.repeat)
+    t_build = best_of(lambda: DocumentTermMatrix.from_texts(df["clean_text"]), args.repeat)
+    print(f"listas + join + Counter: {t_old:.3f} s")
+    print(f"matriz dispersa:         {t_new:.3f} s (construcción {t_build:.3f} s) {t_old / t_new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
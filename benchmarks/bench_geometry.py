@@ -0,0 +1,55 @@
+# Tiempos de carga de las capas de Natural Earth: read_file + filtro + centroides contra el caché en Parquet
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python benchmarks/bench_geometry.py
+import tempfile
+import time
+
+from geopandas import read_file
+
+from utils.geometry import COUNTRIES_PATH, STATES_PATH, US_STATES_QUERY, load_layer
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def legacy_states():
+    # Lo que hacía location_analysis en cada ejecución
+    all_states = read_file(STATES_PATH)
+    all_states = all_states[all_states["iso_a2"] == "US"][~all_states["name"].isin(["Alaska", "Hawaii"])]
+    return [(row["geometry"].centroid.x, row["geometry"].centroid.y) for _, row in all_states.iterrows()]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        times = {
+            "estados: read_file + filtro + iterrows": timed(legacy_states),
+            "estados: caché frío": timed(
+                lambda: load_layer(path=STATES_PATH, query=US_STATES_QUERY, cache_dir=cache_dir)
+            ),
+            "estados: caché caliente": timed(
+                lambda: load_layer(path=STATES_PATH, query=US_STATES_QUERY, cache_dir=cache_dir)
+            ),
+            "estados: caché caliente (name, label_x, label_y)": timed(
+                lambda: load_layer(
+                    path=STATES_PATH,
+                    query=US_STATES_QUERY,
+                    columns=["name", "label_x", "label_y"],
+                    cache_dir=cache_dir,
+                )
+            ),
+            "países: read_file": timed(lambda: read_file(COUNTRIES_PATH)),
+            "países: caché frío": timed(lambda: load_layer(path=COUNTRIES_PATH, cache_dir=cache_dir)),
+            "países: caché caliente": timed(lambda: load_layer(path=COUNTRIES_PATH, cache_dir=cache_dir)),
+        }
+
+    for name, seconds in times.items():
+        print(f"{name:<48} {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
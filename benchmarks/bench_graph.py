@@ -0,0 +1,118 @@
+# Grafo de menciones: la versión que llamaba a networkx una vez por arista (y dibujaba todas las
+# aristas en cada llamada a draw_networkx_edge_labels) contra la que dibuja todo en una LineCollection,
+# con la matriz densa, con la matriz sparse y podando las aristas de poco peso
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python benchmarks/bench_graph.py [--nodes 10 100 500] [--degree 8] [--legacy-max 100]
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import matplotlib
+import matplotlib.pyplot as plt
+import networkx as nx
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from utils.plots import directed_graph_plot
+
+matplotlib.use("Agg")
+
+
+def legacy_directed_graph_plot(df: pd.DataFrame, save_path: str, plot_title: str, colors: dict):
+    # Lo que hacía plots.py: dos llamadas a networkx por arista
+    graph = nx.from_pandas_adjacency(df=df, create_using=nx.DiGraph)
+    edge_weights = nx.get_edge_attributes(G=graph, name="weight")
+    fig, ax = plt.subplots(figsize=(8, 6))
+    ax.set_xlim(left=-1.1, right=1.2)
+    pos = nx.circular_layout(G=graph)
+    nx.draw_networkx_nodes(G=graph, pos=pos, node_size=2000, node_color=[colors[node] for node in graph.nodes()])
+    nx.draw_networkx_labels(G=graph, pos=pos, font_size=12, font_weight="bold")
+    for source, target in graph.edges():
+        rad = 0.2
+        nx.draw_networkx_edges(
+            G=graph,
+            pos=pos,
+            arrows=True,
+            edgelist=[(source, target)],
+            arrowstyle="->",
+            connectionstyle=f"arc3,rad={rad}",
+            arrowsize=20,
+            node_size=2000 if source != target else 2000 * 0.3,
+            edge_color=colors[source],
+        )
+        nx.draw_networkx_edge_labels(
+            G=graph,
+            pos=pos,
+            edge_labels={(source, target): edge_weights[(source, target)]},
+            connectionstyle=f"arc3,rad={rad}",
+            font_size=12,
+            font_color=colors[source],
+            font_weight="bold",
+            bbox=dict(facecolor="white", alpha=0.7, edgecolor="none", pad=0.3),
+            rotate=False,
+            node_size=2000 if source != target else 2000 * 0.3,
+        )
+    fig.suptitle(t=plot_title, fontweight="bold")
+    fig.tight_layout()
+    fig.savefig(fname=save_path, dpi=300)
+    plt.close(fig)
+
+
+def random_adjacency(n: int, degree: int, seed: int = 0) -> sparse.csr_array:
+    # Cada nodo menciona a unos pocos otros, con pesos de cola larga
+    rng = np.random.default_rng(seed)
+    edges = n * min(degree, n)
+    rows = rng.integers(0, n, edges)
+    cols = rng.integers(0, n, edges)
+    weights = rng.zipf(1.8, edges)
+    return sparse.csr_array((weights, (rows, cols)), shape=(n, n))
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--degree", type=int, default=8, help="Aristas por nodo, en promedio")
+    parser.add_argument("--min-weight", type=int, default=5)
+    parser.add_argument("--legacy-max", type=int, default=100, help="La versión anterior solo con hasta estos nodos")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        save_path = str(Path(folder) / "graph.png")
+        for n in args.nodes:
+            adjacency = random_adjacency(n, args.degree)
+            nodes = [f"Speaker {i}" for i in range(n)]
+            colors = dict(zip(nodes, plt.get_cmap("tab10")(np.arange(n) % 10)))
+            dense = pd.DataFrame(adjacency.toarray(), index=nodes, columns=nodes)
+            kept = int((adjacency.data >= args.min_weight).sum())
+            print(f"{n} nodos, {adjacency.nnz} aristas ({kept} con peso >= {args.min_weight}):")
+            if n <= args.legacy_max:
+                legacy = timed(lambda: legacy_directed_graph_plot(dense, save_path, "Grafo", colors))
+                print(f"  antes:                        {legacy:8.2f} s")
+            batched = timed(lambda: directed_graph_plot(dense, save_path, "Grafo", colors))
+            print(f"  ahora, matriz densa:          {batched:8.2f} s")
+            sparse_time = timed(lambda: directed_graph_plot(adjacency, save_path, "Grafo", colors, nodes=nodes))
+            print(f"  ahora, matriz sparse:         {sparse_time:8.2f} s")
+            pruned = timed(
+                lambda: directed_graph_plot(
+                    adjacency, save_path, "Grafo", colors, nodes=nodes, min_weight=args.min_weight
+                )
+            )
+            print(f"  ahora, podando:               {pruned:8.2f} s")
+            unlabeled = timed(
+                lambda: directed_graph_plot(adjacency, save_path, "Grafo", colors, nodes=nodes, edge_labels=False)
+            )
+            print(f"  ahora, sin etiquetas:         {unlabeled:8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
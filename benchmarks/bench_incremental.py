@@ -0,0 +1,53 @@
+# Ingesta incremental: cuánto tarda IncrementalAggregates.update al agregar al final del CSV 1, 10 o 100
+# discursos, contra recalcular todos los agregados desde cero, y si el estado sigue coincidiendo con el
+# recálculo completo (check)
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python benchmarks/bench_incremental.py [--scales 1 10] [--deltas 1 10 100]
+import argparse
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.synthetic import SYNTHETIC_DIR, corpus_path
+from utils.incremental import IncrementalAggregates
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10])
+    parser.add_argument("--data-dir", default=SYNTHETIC_DIR)
+    parser.add_argument("--deltas", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--chunksize", type=int, default=1000)
+    args = parser.parse_args()
+
+    for scale in args.scales:
+        # Las filas sin parsear, para escribirlas de nuevo tal cual
+        raw = pd.read_csv(corpus_path(scale=scale, output=args.data_dir))
+        base = len(raw) - sum(args.deltas)
+        print(f"x{scale:g}: {base} discursos iniciales")
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "speeches.csv"
+            raw.iloc[:base].to_csv(path, index=False)
+            state = IncrementalAggregates(path=path, chunksize=args.chunksize)
+            print(f"  carga inicial           {state.update()['seconds']:8.2f} s")
+
+            start = base
+            for delta in args.deltas:
+                with open(path, "a") as f:
+                    raw.iloc[start : start + delta].to_csv(f, index=False, header=False)
+                start += delta
+                report = state.update()
+                action = "recálculo" if report["rebuilt"] else "update"
+                print(f"  +{delta:<5} discursos ({action}) {report['seconds']:8.2f} s")
+
+            full = IncrementalAggregates(path=path, chunksize=args.chunksize).rebuild()
+            print(f"  recálculo completo      {full['seconds']:8.2f} s")
+            check = state.check()
+            print(f"  coincide con el recálculo: {all(check.values())} {'' if all(check.values()) else check}")
+
+
+if __name__ == "__main__":
+    main()
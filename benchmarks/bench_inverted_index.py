@@ -0,0 +1,86 @@
+# Búsquedas en el texto: un regex sobre clean_text por consulta contra el índice invertido posicional,
+# verificando que ambos encuentren las mismas ocurrencias
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python benchmarks/bench_inverted_index.py [--path data/us_2020_election_speeches.csv] [--repeat 5]
+import argparse
+import re
+import tempfile
+import time
+
+import numpy as np
+
+from utils.clean_data import normalize_text
+from utils.inverted_index import InvertedIndex, corpus_turns, query_tokens
+from utils.load_data import DATA_PATH
+
+QUERIES = ["biden", "joe biden", "president trump", "the american people", "health care"]
+
+
+def best_of(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def phrase_pattern(query: str) -> str:
+    # Las palabras de la frase, seguidas y separadas por espacios, como las tokeniza el índice
+    return r"(?<!\S)" + r"\s+".join(map(re.escape, query_tokens(query))) + r"(?!\S)"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default=DATA_PATH)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    turns = corpus_turns(args.path)
+    clean = normalize_text(df=turns, column_name="text", unicode=True)
+    print(f"{len(turns)} intervenciones")
+
+    start = time.perf_counter()
+    index = InvertedIndex.from_turns(turns)
+    print(f"Construcción del índice: {time.perf_counter() - start:8.3f} s")
+    with tempfile.TemporaryDirectory() as folder:
+        index.save(folder)
+        print(f"Carga desde disco:       {best_of(lambda: InvertedIndex.load(folder), args.repeat) * 1000:8.1f} ms")
+        index = InvertedIndex.load(folder)
+
+        print(f"\n{'consulta':<22} {'ocurrencias':>11} {'regex':>10} {'índice':>10} {'+ filtros':>10} {'+ kwic':>10}")
+        for query in QUERIES:
+            pattern = phrase_pattern(query)
+            expected = int(clean.str.count(pattern).fillna(0).sum())
+            found = len(index.search(query))
+            assert found == expected, (query, found, expected)
+
+            regex = best_of(lambda: clean.str.count(pattern), args.repeat)
+            indexed = best_of(lambda: index.search(query), args.repeat)
+            filtered = best_of(
+                lambda: index.search(query, party="Partido Republicano", since="2020-09-01", until="2020-10-31"),
+                args.repeat,
+            )
+            kwic = best_of(lambda: index.kwic(index.search(query).head(20)), args.repeat)
+            print(
+                f"{query:<22} {found:>11} {regex * 1000:>8.1f}ms {indexed * 1000:>8.2f}ms "
+                f"{filtered * 1000:>8.2f}ms {kwic * 1000:>8.2f}ms"
+            )
+
+        # Cercanía: "biden" con "china" a 10 palabras o menos, contra recorrer las ventanas de cada ocurrencia
+        near = index.search("biden", near="china", window=10)
+        docs, starts, _ = index.phrase("biden")
+        brute = 0
+        for doc, position in zip(docs, starts):
+            words = index.terms[index.tokens[index.doc_offsets[doc] : index.doc_offsets[doc + 1]]]
+            window = np.r_[max(position - 10, 0) : position, position + 1 : min(position + 11, len(words))]
+            brute += bool((words[window] == "china").any())
+        assert len(near) == brute, (len(near), brute)
+        seconds = best_of(lambda: index.search("biden", near="china", window=10), args.repeat)
+        print(f"\n'biden' cerca de 'china': {len(near)} ocurrencias en {seconds * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# Tiempos de carga del CSV: parseo directo contra el caché en Parquet (frío, caliente y proyectado)
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python benchmarks/bench_load_data.py [--path data/us_2020_election_speeches.csv]
+import argparse
+import tempfile
+import time
+
+from utils.load_data import load_speeches, parse_speeches
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default="data/us_2020_election_speeches.csv")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        times = {
+            "read_csv + to_datetime": timed(lambda: parse_speeches(args.path)),
+            "caché frío": timed(lambda: load_speeches(path=args.path, cache_dir=cache_dir)),
+            "caché caliente": timed(lambda: load_speeches(path=args.path, cache_dir=cache_dir)),
+            "caché caliente (speaker, date, location)": timed(
+                lambda: load_speeches(
+                    path=args.path,
+                    columns=["speaker", "date", "location"],
+                    cache_dir=cache_dir,
+                )
+            ),
+        }
+
+    for name, seconds in times.items():
+        print(f"{name:<42} {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# Throughput de la clasificación de lugares: get_state + news_channels fila por fila contra
+# resolve_locations, sobre una columna sintética de lugares
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python benchmarks/bench_locations.py [--rows 1000000] [--repeat 3]
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.locations import NEWS_CHANNELS, location_index, resolve_locations
+
+US_STATES = [
+    "alabama", "alaska", "arizona", "arkansas", "california", "colorado", "connecticut", "delaware",
+    "florida", "georgia", "hawaii", "idaho", "illinois", "indiana", "iowa", "kansas", "kentucky",
+    "louisiana", "maine", "maryland", "massachusetts", "michigan", "minnesota", "mississippi",
+    "missouri", "montana", "nebraska", "nevada", "new hampshire", "new jersey", "new mexico",
+    "new york", "north carolina", "north dakota", "ohio", "oklahoma", "oregon", "pennsylvania",
+    "rhode island", "south carolina", "south dakota", "tennessee", "texas", "utah", "vermont",
+    "virginia", "washington", "west virginia", "wisconsin", "wyoming",
+]  # fmt: skip
+
+
+def legacy_get_state(location):
+    # La versión original de location_analysis
+    if not isinstance(location, str):
+        return None
+    location = location.split(",")
+    if len(location) == 2:
+        return location[1].strip()
+    if location[0].lower() in US_STATES:
+        return location[0]
+    else:
+        return None
+
+
+def legacy_resolve(locations: pd.Series):
+    return (
+        locations.apply(legacy_get_state),
+        locations.apply(lambda x: x if x in NEWS_CHANNELS else None),
+    )
+
+
+def synthetic_locations(rows: int, seed: int = 0) -> pd.Series:
+    # Mezcla de "Ciudad, Estado", "Ciudad, XX", estados solos, canales, ciudades sin estado y faltantes
+    rng = np.random.default_rng(seed)
+    states = [s.title() for s in US_STATES]
+    postals = ["AL", "AK", "AZ", "PA", "MI", "WI", "FL", "NC", "OH", "TX", "GA", "MN"]
+    cities = [f"City {i}" for i in range(2000)]
+    pool = (
+        [f"{c}, {s}" for c, s in zip(cities, rng.choice(states, len(cities)))]
+        + [f"{c}, {p}" for c, p in zip(cities[:500], rng.choice(postals, 500))]
+        + states
+        + NEWS_CHANNELS
+        + cities[:200]
+    )
+    values = np.array(pool, dtype=object)[rng.integers(0, len(pool), rows)]
+    values[rng.random(rows) < 0.02] = None
+    return pd.Series(values, dtype=object)
+
+
+def best_of(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    locations = synthetic_locations(args.rows)
+    categorical = locations.astype("category")
+    index = location_index()
+    print(f"{args.rows} lugares, {locations.nunique()} distintos, {len(index)} claves en el índice")
+    print(resolve_locations(locations, index)["kind"].value_counts().to_string())
+
+    times = {
+        "apply fila por fila": best_of(lambda: legacy_resolve(locations), args.repeat),
+        "resolve_locations": best_of(lambda: resolve_locations(locations, index), args.repeat),
+        "resolve_locations (categórica)": best_of(lambda: resolve_locations(categorical, index), args.repeat),
+    }
+    for name, seconds in times.items():
+        print(f"{name:<32} {seconds:8.3f} s {args.rows / seconds / 1e6:8.2f} M filas/s")
+    print(f"{'location_index':<32} {best_of(location_index, args.repeat):8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
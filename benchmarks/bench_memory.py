@@ -0,0 +1,83 @@
+# Memoria de la tabla de intervenciones: la disposición de tarea_1.py (datos del discurso copiados en cada
+# intervención + copia del top 5) contra el modo compacto (categóricas, texto en Arrow, join por speech_id).
+# Cada disposición corre en su propio proceso para que el pico de RSS no se mezcle
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python benchmarks/bench_memory.py [--path data/us_2020_election_speeches.csv]
+import argparse
+import json
+import subprocess
+import sys
+
+import pandas as pd
+
+from utils.clean_data import normalize_text
+from utils.compact import compact_speeches, compact_turns, memory_report, peak_rss, with_metadata
+from utils.constants import PARTIES
+from utils.load_data import parse_speeches
+from utils.segmentation import segment_turns
+
+
+def build(path: str, layout: str) -> dict:
+    df_speeches = parse_speeches(path)
+    df_turns = segment_turns(df=df_speeches)
+    if layout == "compacta":
+        # El texto completo ya está repartido en las intervenciones
+        df_speeches = compact_speeches(df_speeches.drop(columns="text"))
+        df_speeches_2 = with_metadata(
+            turns=compact_turns(df_turns).drop(columns="turn_index"), speeches=df_speeches, columns=["date"]
+        )
+    else:
+        df_speeches_2 = (
+            df_turns.drop(columns="turn_index")
+            .join(df_speeches.drop(columns=["speaker", "text"]), on="speech_id")
+            .set_index("speech_id")
+            .rename_axis(None)
+        )
+    top_5 = list(df_speeches.groupby("speaker").size().sort_values(ascending=False).head(5).index)
+    df_speeches_top_5 = df_speeches_2[df_speeches_2["speaker"].isin(top_5)].copy()
+    df_speeches_top_5["party"] = df_speeches_top_5["speaker"].map(PARTIES)
+    df_speeches_top_5["clean_text"] = normalize_text(df=df_speeches_top_5, column_name="text", unicode=True)
+    return {"df_speeches": df_speeches, "df_speeches_2": df_speeches_2, "df_speeches_top_5": df_speeches_top_5}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default="data/us_2020_election_speeches.csv")
+    parser.add_argument("--layout", choices=["actual", "compacta"])
+    args = parser.parse_args()
+
+    if args.layout is not None:
+        # Proceso hijo: arma las tablas y devuelve el reporte en JSON
+        report = memory_report(build(args.path, args.layout))
+        print(json.dumps({"columns": report.to_dict(orient="records"), "peak_rss": peak_rss()}))
+        return
+
+    results = {}
+    for layout in ["actual", "compacta"]:
+        out = subprocess.run(
+            [sys.executable, __file__, "--path", args.path, "--layout", layout],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        results[layout] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    columns = pd.concat(
+        {layout: pd.DataFrame(r["columns"]).set_index(["table", "column"]) for layout, r in results.items()},
+        axis=1,
+    )
+    columns.columns = [f"{field} ({layout})" for layout, field in columns.columns]
+    mib = [c for c in columns.columns if c.startswith("bytes")]
+    columns[mib] = columns[mib] / 2**20
+    pd.set_option("display.width", 200)
+    print(columns.rename(columns=lambda c: c.replace("bytes", "MiB")).round(2).to_string())
+    print(columns[mib].groupby(level="table").sum().rename(columns=lambda c: c.replace("bytes", "MiB")).round(2).to_string())
+    for layout, r in results.items():
+        peak = r["peak_rss"]
+        print(f"pico de RSS ({layout}): " + (f"{peak / 2**20:.0f} MiB" if peak is not None else "no disponible"))
+
+
+if __name__ == "__main__":
+    main()
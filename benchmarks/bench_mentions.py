@@ -0,0 +1,74 @@
+# Compara el conteo de menciones original (un re.findall por patrón y candidato) contra MentionCounter,
+# y mide cómo escala con la cantidad de alias
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python benchmarks/bench_mentions.py [--path data/us_2020_election_speeches.csv]
+import argparse
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.clean_data import normalize_text
+from utils.mentions import MentionCounter, aliases_from_names
+from utils.segmentation import segment_turns
+
+MENCIONES = {
+    "Joe Biden": [r"\bjoe biden\b", r"\bbiden\b", r"\bvice president biden\b", r"\bvice president joe biden\b"],
+    "Donald Trump": [r"\bdonald trump\b", r"\btrump\b", r"\bpresident trump\b", r"\bpresident donald\b", r"\bdonald\b"],
+    "Mike Pence": [r"\bmike pence\b", r"\bpence\b", r"\bvice president pence\b"],
+    "Bernie Sanders": [r"\bbernie sanders\b", r"\bsanders\b"],
+    "Kamala Harris": [r"\bkamala harris\b", r"\bharris\b", r"\bsenator harris\b", r"\bkamala\b"],
+}
+
+
+def legacy_matrix(texts: pd.Series, aliases: dict) -> pd.DataFrame:
+    # Mismo loop que tarea_1.py: un texto por orador y un re.findall por patrón
+    matrix = pd.DataFrame(data=0, index=texts.index, columns=list(aliases))
+    for speaker, text in texts.items():
+        for name, patterns in aliases.items():
+            matrix.loc[speaker, name] = sum(len(re.findall(pattern, text)) for pattern in patterns)
+    return matrix
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default="data/us_2020_election_speeches.csv")
+    args = parser.parse_args()
+
+    turns = segment_turns(pd.read_csv(args.path))
+    turns["clean_text"] = normalize_text(df=turns, column_name="text")
+    texts = turns.groupby("speaker")["clean_text"].apply(" ".join)
+    print(f"{len(texts)} oradores, {texts.str.len().sum() / 1e6:.1f} M caracteres")
+
+    # El modo overlapping da la misma matriz que el loop original
+    counter = MentionCounter(aliases=MENCIONES)
+    legacy = legacy_matrix(texts, MENCIONES)
+    result = counter.matrix(texts=texts, speakers=pd.Series(texts.index), mode="overlapping")
+    pd.testing.assert_frame_equal(legacy, result.reindex(legacy.index), check_dtype=False)
+
+    print(f"re.findall por patrón:   {timed(lambda: legacy_matrix(texts, MENCIONES)):.3f} s")
+    for mode in ["overlapping", "longest"]:
+        t = timed(lambda: counter.matrix(texts=texts, speakers=pd.Series(texts.index), mode=mode))
+        print(f"MentionCounter {mode:<12} {t:.3f} s")
+
+    # Escalado con la cantidad de alias: el autómata recorre el texto una sola vez
+    rng = np.random.default_rng(0)
+    for n_names in [5, 50, 110, 500]:
+        names = [f"name{i} surname{rng.integers(1_000_000)}" for i in range(n_names)]
+        aliases = aliases_from_names(names) | MENCIONES
+        counter = MentionCounter(aliases=aliases)
+        t_new = timed(lambda: counter.matrix(texts=texts, speakers=pd.Series(texts.index)))
+        print(f"{len(aliases):>4} nombres: MentionCounter {t_new:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
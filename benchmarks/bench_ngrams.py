@@ -0,0 +1,88 @@
+# Bigramas y trigramas por orador: conteo exacto de todos los n-gramas de una vez contra NgramSketch
+# (HeavyHitters + CountMinSketch por orador, por lotes), con el pico de memoria de cada uno, la fracción
+# del top exacto que encuentra el sketch y el error de sus cuentas contra las cotas que declara
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python benchmarks/bench_ngrams.py [--scales 1 10] [--capacity 1000] [--top 20]
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from wordcloud import STOPWORDS
+
+from benchmarks.suite import forked
+from benchmarks.synthetic import SYNTHETIC_DIR, corpus_path
+from utils.clean_data import normalize_text
+from utils.constants import EXTRA_STOPWORDS
+from utils.dtm import tokenize
+from utils.load_data import parse_speeches
+from utils.ngrams import ngram_keys, ngram_sketches
+from utils.segmentation import segment_turns
+
+
+def exact_top(turns: pd.DataFrame, n: int, k: int, stopwords: set) -> pd.DataFrame:
+    # Todos los n-gramas del corpus en memoria, contados ordenando por (orador, n-grama)
+    keys, rows, _ = ngram_keys(tokenize(turns["clean_text"]), n=n, stopwords=stopwords)
+    codes, speakers = pd.factorize(turns["speaker"].to_numpy()[rows])
+    order = np.lexsort((keys, codes))
+    codes, keys = codes[order], keys[order]
+    first = np.flatnonzero(np.r_[True, (codes[1:] != codes[:-1]) | (keys[1:] != keys[:-1])])
+    table = pd.DataFrame(
+        {"group": speakers[codes[first]], "key": keys[first], "exact": np.diff(np.r_[first, len(keys)])}
+    )
+    table["total"] = table.groupby("group")["exact"].transform("sum")
+    return table.sort_values(["group", "exact", "key"], ascending=[True, False, True]).groupby("group").head(k)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10])
+    parser.add_argument("--data-dir", default=SYNTHETIC_DIR)
+    parser.add_argument("--capacity", type=int, default=1000)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+    stopwords = STOPWORDS | set(EXTRA_STOPWORDS)
+
+    for scale in args.scales:
+        df = parse_speeches(corpus_path(scale=scale, output=args.data_dir))
+        turns = segment_turns(df)
+        turns["clean_text"] = normalize_text(df=turns, column_name="text", unicode=True)
+        print(f"x{scale:g}: {len(turns)} intervenciones")
+        for n in (2, 3):
+            (exact, exact_seconds), exact_memory = forked(timed, lambda: exact_top(turns, n, args.top, stopwords))
+            (top, sketch_seconds), sketch_memory = forked(
+                timed,
+                lambda: ngram_sketches(turns, n=n, capacity=args.capacity, stopwords=stopwords).top(args.top),
+            )
+
+            # El texto de cada n-grama del sketch se vuelve a llevar a su clave para cruzarlo con el exacto
+            keys, _, _ = ngram_keys(tokenize(top["ngram"]), n=n)
+            top["key"] = keys
+            both = exact.merge(top, on=["group", "key"], how="left")
+            recall = both["count"].notna().mean()
+            # Los que el resumen garantiza: más frecuentes que total / (capacity + 1) en su orador
+            guaranteed = both[both["exact"] > both["total_x"] / (args.capacity + 1)]
+            found = both.dropna(subset=["count"])
+            within = ((found["count"] <= found["exact"]) & (found["exact"] <= found["upper"])).mean()
+            print(
+                f"  {n}-gramas  exacto: {exact_seconds:6.2f} s {exact_memory / 2**20:6.0f} MiB   "
+                f"sketch: {sketch_seconds:6.2f} s {sketch_memory / 2**20:6.0f} MiB"
+            )
+            print(
+                f"    top {args.top} encontrado: {recall:.0%} "
+                f"({guaranteed['count'].notna().mean() if len(guaranteed) else float('nan'):.0%} de los "
+                f"{len(guaranteed)} garantizados)   dentro de las cotas: {within:.0%}   "
+                f"error máximo: {(found['exact'] - found['count']).max():.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
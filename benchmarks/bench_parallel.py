@@ -0,0 +1,94 @@
+# Etapas de texto en un solo proceso contra el ShardedExecutor con 1, 2, 4... workers, y verifica
+# que el resultado sea el mismo para cualquier cantidad de workers y de shards
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python benchmarks/bench_parallel.py [--path data/us_2020_election_speeches.csv] [--workers 1 2 4 8] [--repeat 3]
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from utils.clean_data import clean_text, normalize_text, search_punctuation
+from utils.dtm import DocumentTermMatrix
+from utils.load_data import parse_speeches
+from utils.parallel import (
+    ShardedExecutor,
+    sharded_clean_text,
+    sharded_document_term_matrix,
+    sharded_normalize_text,
+    sharded_search_punctuation,
+    sharded_segment_turns,
+)
+from utils.segmentation import segment_turns
+
+
+def best_of(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def same_matrix(a: DocumentTermMatrix, b: DocumentTermMatrix) -> bool:
+    return (a.terms == b.terms).all() and (a.counts != b.counts).nnz == 0 and a.labels.equals(b.labels)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default="data/us_2020_election_speeches.csv")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = parse_speeches(args.path)
+    turns = segment_turns(df)
+    turns["clean_text"] = normalize_text(df=turns, column_name="text", unicode=True)
+    print(f"{len(df)} discursos, {len(turns)} intervenciones, {os.cpu_count()} CPUs")
+
+    serial = {
+        "segment_turns": lambda: segment_turns(df),
+        "normalize_text": lambda: normalize_text(df=turns, column_name="text", unicode=True),
+        "clean_text": lambda: clean_text(df=turns, column_name="text"),
+        "search_punctuation": lambda: search_punctuation(df=turns, column_name="text"),
+        "from_texts": lambda: DocumentTermMatrix.from_texts(turns["clean_text"]),
+    }
+
+    def sharded(executor: ShardedExecutor) -> dict:
+        return {
+            "segment_turns": lambda: sharded_segment_turns(df=df, executor=executor),
+            "normalize_text": lambda: sharded_normalize_text(df=turns, column_name="text", executor=executor, unicode=True),
+            "clean_text": lambda: sharded_clean_text(df=turns, column_name="text", executor=executor),
+            "search_punctuation": lambda: sharded_search_punctuation(df=turns, column_name="text", executor=executor),
+            "from_texts": lambda: sharded_document_term_matrix(texts=turns["clean_text"], executor=executor),
+        }
+
+    # El resultado no depende de cuántos workers ni shards haya
+    expected = {name: func() for name, func in serial.items()}
+    for workers, shards in [(1, 7), (2, 3), (3, 16)]:
+        results = {name: func() for name, func in sharded(ShardedExecutor(workers=workers, shards=shards)).items()}
+        pd.testing.assert_frame_equal(results["segment_turns"], expected["segment_turns"])
+        pd.testing.assert_series_equal(results["normalize_text"], expected["normalize_text"])
+        pd.testing.assert_series_equal(results["clean_text"], expected["clean_text"])
+        assert results["search_punctuation"] == expected["search_punctuation"]
+        assert same_matrix(results["from_texts"], expected["from_texts"])
+    print("Mismo resultado con cualquier cantidad de workers y shards\n")
+
+    times = {"1 proceso": {name: best_of(func, args.repeat) for name, func in serial.items()}}
+    for workers in sorted(set(args.workers)):
+        cases = sharded(ShardedExecutor(workers=workers))
+        times[f"{workers} workers"] = {name: best_of(func, args.repeat) for name, func in cases.items()}
+
+    table = pd.DataFrame(times)
+    table.loc["total"] = table.sum()
+    print("Segundos:")
+    print(table.round(3).to_string())
+    print("\nSpeedup contra un proceso:")
+    print(table.rdiv(table["1 proceso"], axis=0).round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
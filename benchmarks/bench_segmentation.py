@@ -0,0 +1,65 @@
+# Compara la separación de intervenciones original (cuatro str.replace + split + tuplas + explode)
+# contra segment_turns, y verifica que ambas den las mismas intervenciones
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python benchmarks/bench_segmentation.py [--path data/us_2020_election_speeches.csv] [--repeat 3]
+import argparse
+import time
+
+import pandas as pd
+
+from utils.clean_data import list_of_tuples
+from utils.segmentation import segment_turns
+
+
+def legacy_segmentation(df: pd.DataFrame) -> pd.DataFrame:
+    # Misma cadena que tarea_1.py (rama win32, la que separa bien con finales de línea \r\n)
+    df = df.copy()
+    df["text"] = df["text"].str.replace(r"\[.*?\]", "", regex=True)
+    df["text"] = df["text"].str.replace("Commercial: (48:14)\r\n", "")
+    df["text"] = df["text"].str.replace(r": \(\d{2}:\d{2}\)", "", regex=True)
+    df["text"] = df["text"].str.replace(r": \(\d{2}:\d{2}\:\d{2}\)", "", regex=True)
+    df["text"] = df["text"].str.split(r"\r\n(?:\xa0\r\n)?", regex=True)
+    df["text"] = df["text"].apply(list_of_tuples)
+    df = df.explode("text")
+    df[["speaker", "text"]] = pd.DataFrame(df["text"].tolist(), index=df.index)
+    return df
+
+
+def best_of(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default="data/us_2020_election_speeches.csv")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.path)
+    df = df[df["text"].notna()]
+
+    legacy = legacy_segmentation(df)
+    # Los discursos sin ningún par orador/intervención quedan como una fila vacía en la versión original
+    legacy = legacy[legacy["speaker"].notna()]
+    turns = segment_turns(df)
+    print(f"{len(df)} discursos, {len(turns)} intervenciones")
+
+    assert legacy.index.tolist() == turns["speech_id"].tolist()
+    assert legacy["speaker"].tolist() == turns["speaker"].tolist()
+    assert legacy["text"].tolist() == turns["text"].tolist()
+
+    t_old = best_of(lambda: legacy_segmentation(df), args.repeat)
+    t_new = best_of(lambda: segment_turns(df), args.repeat)
+    print(f"cadena original: {t_old:.3f} s")
+    print(f"segment_turns:   {t_new:.3f} s ({t_old / t_new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
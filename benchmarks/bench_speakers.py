@@ -0,0 +1,48 @@
+# Canonicalización de oradores sobre la tabla de intervenciones: map(SPEAKER_NAMES).fillna fila por fila
+# contra SpeakerRegistry, que resuelve cada nombre distinto una vez sobre los códigos categóricos
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python benchmarks/bench_speakers.py [--path data/us_2020_election_speeches.csv] [--scale 100]
+import argparse
+import time
+
+import pandas as pd
+
+from utils.constants import POLITICIANS, SPEAKER_NAMES
+from utils.segmentation import segment_turns
+from utils.speakers import SpeakerRegistry
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default="data/us_2020_election_speeches.csv")
+    parser.add_argument("--scale", type=int, default=100)
+    args = parser.parse_args()
+
+    speakers = segment_turns(pd.read_csv(args.path))["speaker"]
+    for name, column in {
+        "intervenciones": speakers,
+        f"intervenciones x{args.scale}": pd.concat([speakers] * args.scale, ignore_index=True),
+    }.items():
+        registry = SpeakerRegistry(canonical=POLITICIANS, aliases=SPEAKER_NAMES)
+        legacy = column.map(SPEAKER_NAMES).fillna(column)
+        t_old = timed(lambda: column.map(SPEAKER_NAMES).fillna(column))
+        canonical = registry.canonicalize(column)
+        # Segunda pasada con los nombres ya resueltos en el registro
+        t_warm = timed(lambda: registry.canonicalize(column))
+        print(f"{name} ({len(column)} filas)")
+        print(f"  map + fillna:         {t_old * 1000:8.1f} ms, {legacy.nunique()} nombres")
+        print(f"  registro (frío):      {registry.report['seconds'] * 1000:8.1f} ms", end="")
+        print(f"  -> {canonical.nunique()} nombres de {column.nunique()} distintos")
+        print(f"  registro (caliente):  {t_warm * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
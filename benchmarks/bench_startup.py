@@ -0,0 +1,52 @@
+# Arranque de la línea de comandos: cuánto tarda cada subcomando de python -m utils (con las etapas ya en
+# caché) y qué librerías pesadas importa, contra importar lo que importa Tarea_1/tarea_1.py antes de empezar
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python benchmarks/bench_startup.py [--commands speakers words mentions] [--repeat 3]
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+HEAVY = ["matplotlib", "seaborn", "wordcloud", "networkx", "geopandas", "circlify"]
+
+# Los imports de la primera celda de tarea_1.py
+TAREA_1 = Path(__file__).resolve().parents[1] / "Tarea_1" / "tarea_1.py"
+
+
+def legacy_command() -> list:
+    imports = TAREA_1.read_text().split("# %% Letra")[0]
+    return [sys.executable, "-X", "importtime", "-c", imports]
+
+
+def timed(command: list) -> tuple:
+    # El tiempo total del proceso y los paquetes pesados que aparecen en el reporte de -X importtime
+    start = time.perf_counter()
+    child = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    seconds = time.perf_counter() - start
+    modules = {line.split("|")[-1].strip().split(".")[0] for line in child.stderr.splitlines() if "|" in line}
+    return seconds, [name for name in HEAVY if name in modules]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--commands", nargs="+", default=["speakers", "weekly", "words", "mentions", "locations"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    commands = {"tarea_1.py (solo los imports)": legacy_command()}
+    for name in args.commands:
+        commands[f"python -m utils {name}"] = [sys.executable, "-X", "importtime", "-m", "utils", name]
+
+    for name, command in commands.items():
+        # La primera corrida llena el caché de etapas
+        timed(command)
+        runs = [timed(command) for _ in range(args.repeat)]
+        seconds = min(seconds for seconds, _ in runs)
+        print(f"{name:<34} {seconds:6.2f} s   {', '.join(runs[0][1]) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# Estadísticas aproximadas por streaming (utils.stream_stats) contra las exactas sobre el corpus entero:
+# vocabulario distinto por orador, por semana y por orador y semana (HyperLogLog), y los oradores y
+# lugares más frecuentes (HeavyHitters). Reporta el error de cada una, el tiempo y el pico de memoria
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python benchmarks/bench_stream_stats.py [--path data/us_2020_election_speeches.csv]
+#   python benchmarks/bench_stream_stats.py --scales 1 10 [--precision 12] [--capacity 100]
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.suite import forked
+from benchmarks.synthetic import SYNTHETIC_DIR, corpus_path
+from utils.clean_data import normalize_text
+from utils.dtm import DocumentTermMatrix
+from utils.load_data import parse_speeches
+from utils.locations import resolve_locations
+from utils.segmentation import segment_turns
+from utils.speakers import speaker_registry
+from utils.stream_stats import stream_statistics
+from utils.time_buckets import bucket_starts
+
+
+def exact_statistics(path: str) -> dict:
+    # Lo mismo con todo el corpus en memoria: la matriz documento-término de todas las intervenciones
+    speeches = parse_speeches(path)
+    registry = speaker_registry()
+    turns = segment_turns(df=speeches).join(speeches[["date"]], on="speech_id")
+    turns["speaker"] = registry.canonicalize(turns["speaker"]).astype(object)
+    turns = turns[turns["speaker"].notna()]
+    dtm = DocumentTermMatrix.from_texts(normalize_text(df=turns, column_name="text", unicode=True))
+    week = bucket_starts(turns["date"])
+
+    def distinct(keys) -> pd.Series:
+        grouped = dtm.groupby(keys)
+        return pd.Series(np.diff(grouped.counts.indptr), index=grouped.labels)
+
+    resolved = resolve_locations(speeches["location"])
+    locations = resolved["state"].astype(object).fillna(resolved["news_channel"].astype(object))
+    return {
+        "speaker": distinct(turns["speaker"]),
+        "week": distinct(week),
+        "both": distinct(pd.MultiIndex.from_arrays([turns["speaker"], week])),
+        "speakers": turns.drop_duplicates(["speech_id", "speaker"])["speaker"].value_counts(),
+        "locations": locations.value_counts(),
+    }
+
+
+def approximate_statistics(path: str, precision: int, capacity: int, chunksize: int) -> dict:
+    statistics = stream_statistics(path, chunksize=chunksize, precision=precision, capacity=capacity)
+    return {
+        "speaker": statistics.distinct_words("speaker"),
+        "week": statistics.distinct_words("week"),
+        "both": statistics.distinct_words("both"),
+        "speakers": statistics.top_speakers(k=None),
+        "locations": statistics.top_locations(k=None),
+        "keys": len(statistics.vocabulary),
+    }
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def report(exact: dict, approximate: dict, k: int):
+    for by in ("speaker", "week", "both"):
+        errors = (approximate[by].reindex(exact[by].index) / exact[by] - 1).abs()
+        print(
+            f"    vocabulario por {by:<8} {len(errors):6} claves   error relativo mediano {errors.median():6.2%}"
+            f"   p95 {errors.quantile(0.95):6.2%}   máximo {errors.max():6.2%}"
+        )
+    for name, column in (("speakers", "speaker"), ("locations", "location")):
+        top = approximate[name].set_index(column)
+        exact_top = exact[name].sort_index().sort_values(ascending=False, kind="stable").head(k)
+        found = top.reindex(exact_top.index)
+        within = ((found["count"] <= exact_top) & (exact_top <= found["upper"])).mean()
+        print(
+            f"    top {k} {name:<10} encontrado: {found['count'].notna().mean():.0%}   mismo orden: "
+            f"{list(top.index[:k]) == list(exact_top.index)}   dentro de las cotas: {within:.0%}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default=None, help="Un CSV de discursos (si no, los corpus sintéticos de --scales)")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10])
+    parser.add_argument("--data-dir", default=SYNTHETIC_DIR)
+    parser.add_argument("--precision", type=int, default=12)
+    parser.add_argument("--capacity", type=int, default=100)
+    parser.add_argument("--chunksize", type=int, default=1000)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    paths = [args.path] if args.path else [corpus_path(scale=scale, output=args.data_dir) for scale in args.scales]
+    for path in paths:
+        print(path)
+        (exact, exact_seconds), exact_memory = forked(timed, exact_statistics, path)
+        (approximate, approximate_seconds), approximate_memory = forked(
+            timed, approximate_statistics, path, args.precision, args.capacity, args.chunksize
+        )
+        print(
+            f"  exacto: {exact_seconds:6.2f} s {exact_memory / 2**20:6.0f} MiB   "
+            f"streaming: {approximate_seconds:6.2f} s {approximate_memory / 2**20:6.0f} MiB   "
+            f"({approximate['keys']} HyperLogLog de {2**args.precision / 1024:g} KiB)"
+        )
+        report(exact, approximate, args.top)
+
+
+if __name__ == "__main__":
+    main()
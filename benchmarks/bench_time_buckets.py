@@ -0,0 +1,70 @@
+# Discursos por semana y candidato: to_period + apply(start_time) + groupby.apply(nunique) + pivot
+# contra count_speeches, y verifica que den la misma tabla
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python benchmarks/bench_time_buckets.py [--path data/us_2020_election_speeches.csv] [--scale 50]
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.load_data import parse_speeches
+from utils.segmentation import segment_turns
+from utils.time_buckets import count_speeches
+
+
+def legacy_weekly(df: pd.DataFrame) -> pd.DataFrame:
+    # Lo que hacía tarea_1.py
+    df = df.copy()
+    df["week"] = df["date"].dt.to_period("W").apply(lambda x: x.start_time)
+    df = (
+        df.groupby(["week", "speaker"])
+        .apply(lambda x: x.index.nunique(), include_groups=False)
+        .reset_index(name="speeches")
+        .sort_values("week")
+    )
+    return df.pivot(index="week", columns="speaker", values="speeches").fillna(0)
+
+
+def best_of(func, repeat: int = 3) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default="data/us_2020_election_speeches.csv")
+    parser.add_argument("--scale", type=int, default=50)
+    args = parser.parse_args()
+
+    speeches = parse_speeches(args.path)
+    turns = (
+        segment_turns(speeches)[["speech_id", "speaker"]]
+        .join(speeches["date"], on="speech_id")
+        .set_index("speech_id")
+    )
+    # Réplica con ids de discurso nuevos, para tener más filas y más grupos
+    n_ids = turns.index.max() + 1
+    scaled = pd.concat([turns.set_axis(turns.index + i * n_ids) for i in range(args.scale)])
+
+    for name, df in {"intervenciones": turns, f"intervenciones x{args.scale}": scaled}.items():
+        legacy, new = legacy_weekly(df), count_speeches(df=df, by="speaker", freq="week")
+        assert legacy.index.equals(new.index) and list(legacy.columns) == list(new.columns)
+        assert np.array_equal(legacy.to_numpy(), new.to_numpy())
+        t_old, t_new = best_of(lambda: legacy_weekly(df)), best_of(lambda: count_speeches(df, by="speaker"))
+        print(f"{name} ({len(df)} filas, {legacy.size} celdas)")
+        print(f"  groupby.apply + pivot: {t_old * 1000:8.1f} ms")
+        print(f"  count_speeches:        {t_new * 1000:8.1f} ms ({t_old / t_new:.0f}x)")
+    for freq in ["day", "month", "14D"]:
+        t = best_of(lambda: count_speeches(scaled, by="speaker", freq=freq))
+        print(f"  count_speeches {freq:<6} {t * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
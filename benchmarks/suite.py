@@ -0,0 +1,313 @@
+# Suite de benchmarks: mide tiempo y memoria de las funciones de utils y de las etapas del pipeline
+# sobre corpus sintéticos de distintas escalas, y guarda los resultados en JSON para comparar commits
+#
+# Cada caso corre en un proceso hijo (fork) con los datos de entrada ya preparados, así el pico de RSS
+# que se reporta es el que agrega el caso y no se mezcla con los anteriores.
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python benchmarks/suite.py [--scales 1 10 100 1000] [--cases normalize segment] [--render]
+#   python benchmarks/suite.py --compare benchmarks/results/<antes>.json benchmarks/results/<después>.json
+import argparse
+import contextlib
+import copy
+import io
+import json
+import multiprocessing
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from queue import Empty
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.synthetic import SYNTHETIC_DIR, corpus_path
+from utils.bubbles import circle_layout, fold_tail
+from utils.characters import character_counts
+from utils.clean_data import clean_text, normalize_text, search_punctuation
+from utils.compact import compact_turns, peak_rss
+from utils.constants import MENTIONS, POLITICIANS, SPEAKER_NAMES
+from utils.distinctive import distinctive_terms
+from utils.dtm import DocumentTermMatrix
+from utils.geometry import load_us_states
+from utils.incremental import IncrementalAggregates
+from utils.inverted_index import InvertedIndex
+from utils.load_data import load_speeches, parse_speeches
+from utils.location_analysis import aggregate as location_aggregate
+from utils.locations import location_index, resolve_locations
+from utils.mentions import MentionCounter
+from utils.ngrams import ngram_sketches
+from utils.segmentation import segment_turns
+from utils.speakers import SpeakerRegistry
+from utils.stages import build_pipeline
+from utils.stream_stats import statistics_from_chunk
+from utils.time_buckets import bucket_starts, count_speeches
+
+RESULTS_DIR = "benchmarks/results"
+STREAM_CHUNKSIZE = 1000
+# La parte del CSV que ya se ingirió antes de medir incremental.IncrementalAggregates.update
+INCREMENTAL_INGESTED = 0.9
+
+
+def cold_load(path: Path):
+    # Un caché vacío en cada corrida, que se borra al terminar
+    with tempfile.TemporaryDirectory() as cache_dir:
+        return load_speeches(path, cache_dir=cache_dir)
+
+
+# Casos: nombre -> función que recibe los datos preparados para la escala
+CASES = {
+    "load_data.parse_speeches": lambda d: parse_speeches(d["path"]),
+    "load_data.load_speeches (caché frío)": lambda d: cold_load(d["path"]),
+    "load_data.load_speeches (caché caliente)": lambda d: load_speeches(d["path"], cache_dir=d["cache_dir"]),
+    "segmentation.segment_turns": lambda d: segment_turns(d["speeches"]),
+    "clean_data.clean_text": lambda d: clean_text(d["turns"], "text"),
+    "clean_data.normalize_text": lambda d: normalize_text(d["turns"], "text", unicode=True),
+    "clean_data.search_punctuation": lambda d: search_punctuation(d["turns"], "text"),
+    "characters.character_counts": lambda d: character_counts(d["turns"]["text"]).groupby(d["turns"]["speaker"]),
+    "speakers.SpeakerRegistry.canonicalize": lambda d: SpeakerRegistry(POLITICIANS, SPEAKER_NAMES).canonicalize(
+        d["turns"]["speaker"]
+    ),
+    "speakers.SpeakerRegistry.explode": lambda d: SpeakerRegistry(POLITICIANS, SPEAKER_NAMES).explode(
+        d["speeches"]["speaker"]
+    ),
+    "compact.compact_turns": lambda d: compact_turns(d["turns"]),
+    "time_buckets.count_speeches": lambda d: count_speeches(d["top_turns"], by="speaker", freq="week"),
+    "dtm.DocumentTermMatrix.from_texts": lambda d: DocumentTermMatrix.from_texts(d["top_turns"]["clean_text"]),
+    "dtm.DocumentTermMatrix.top_terms": lambda d: d["dtm"].groupby(d["top_turns"]["speaker"]).top_terms(k=100),
+    "mentions.MentionCounter.matrix": lambda d: MentionCounter(MENTIONS).matrix(
+        d["top_turns"]["clean_text"], d["top_turns"]["speaker"]
+    ),
+    "locations.location_index": lambda d: location_index(),
+    "locations.resolve_locations": lambda d: resolve_locations(d["speeches"]["location"]),
+    "geometry.load_us_states": lambda d: load_us_states(),
+    "location_analysis.aggregate": lambda d: location_aggregate(d["speeches"][["speaker", "date", "location"]].copy()),
+    "ngrams.ngram_sketches": lambda d: ngram_sketches(d["top_turns"], n=2),
+    "distinctive.distinctive_terms": lambda d: distinctive_terms(
+        d["dtm"], {"speaker": d["top_turns"]["speaker"], "week": bucket_starts(d["top_turns"]["date"])}
+    ),
+    "inverted_index.InvertedIndex.from_turns": lambda d: InvertedIndex.from_turns(d["speech_turns"]),
+    "inverted_index.InvertedIndex.search": lambda d: d["index"].search("the american people", near="china"),
+    "stream_stats.statistics_from_chunk": lambda d: statistics_from_chunk(d["speeches"], d["speech_turns"]),
+    "incremental.IncrementalAggregates.update": lambda d: copy.deepcopy(d["incremental"]).update(),
+    "bubbles.circle_layout": lambda d: circle_layout(fold_tail(d["speeches"]["speaker"].value_counts()).to_numpy()),
+}
+
+
+def prepare(path: Path, cache_dir: str, cases: list) -> dict:
+    """
+    Prepare the inputs of the cases once per corpus, outside of the measurements.
+
+    The inputs that only one case uses (the inverted index and the ingested part
+    of the CSV) are prepared only if that case runs.
+
+    Args:
+        path: The CSV of the corpus.
+        cache_dir: A folder for the Parquet cache of the warm load.
+        cases: The names of the cases that will run.
+
+    Returns:
+        The inputs, by name.
+    """
+    speeches = parse_speeches(path)
+    turns = segment_turns(speeches).join(speeches["date"], on="speech_id").set_index("speech_id")
+    turns["speaker"] = SpeakerRegistry(POLITICIANS, SPEAKER_NAMES).canonicalize(turns["speaker"])
+    top_5 = list(speeches.groupby("speaker").size().sort_values(ascending=False).head(5).index)
+    top_turns = turns[turns["speaker"].isin(top_5)].copy()
+    top_turns["clean_text"] = normalize_text(top_turns, "text", unicode=True)
+    load_speeches(path, cache_dir=cache_dir)
+    data = {
+        "path": path,
+        "cache_dir": cache_dir,
+        "speeches": speeches,
+        "turns": turns.reset_index(),
+        "speech_turns": turns,
+        "top_turns": top_turns,
+        "dtm": DocumentTermMatrix.from_texts(top_turns["clean_text"]),
+    }
+    if "inverted_index.InvertedIndex.search" in cases:
+        data["index"] = InvertedIndex.from_turns(turns)
+    if "incremental.IncrementalAggregates.update" in cases:
+        # El estado con las primeras filas del CSV, así update lee solo las últimas
+        state = IncrementalAggregates(path=str(path), chunksize=STREAM_CHUNKSIZE)
+        state.update(csv_end=int(Path(path).stat().st_size * INCREMENTAL_INGESTED))
+        data["incremental"] = state
+    return data
+
+
+def forked(func, *args):
+    """
+    Run a function in a forked process and measure the memory it adds.
+
+    The child starts with the peak RSS of the parent, so the growth of its own
+    peak is what the function allocated. Where fork is not available (Windows)
+    the function runs in this process and the memory is not measured.
+
+    Raises:
+        RuntimeError: If the function raised, or the child died without a
+            result (like when it is killed for running out of memory).
+
+    Args:
+        func: The function to run, its result must be picklable.
+        *args: The arguments of the function.
+
+    Returns:
+        The result of the function and the growth of the peak RSS in bytes (or None).
+    """
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return func(*args), None
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(queue, func, args))
+    process.start()
+    # Si el hijo muere (por ejemplo sin memoria en las escalas grandes) no va a llegar nada por la cola
+    while True:
+        try:
+            result, peak_rss_delta, error = queue.get(timeout=1)
+            break
+        except Empty:
+            if process.is_alive():
+                continue
+            process.join()
+            try:
+                # Pudo haber terminado justo después de mandar el resultado
+                result, peak_rss_delta, error = queue.get(timeout=1)
+                break
+            except Empty:
+                raise RuntimeError(f"El proceso terminó sin resultado (exitcode {process.exitcode})") from None
+    process.join()
+    if error is not None:
+        raise RuntimeError(error)
+    if process.exitcode != 0:
+        raise RuntimeError(f"El proceso terminó con exitcode {process.exitcode}")
+    return result, peak_rss_delta
+
+
+def _child(queue, func, args):
+    start_rss = peak_rss()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func(*args)
+    except Exception as error:
+        queue.put((None, None, f"{type(error).__name__}: {error}"))
+        return
+    end_rss = peak_rss()
+    queue.put((result, None if start_rss is None else end_rss - start_rss, None))
+
+
+def best_time(func, data: dict, repeat: int) -> float:
+    # El mejor de repeat corridas, con los datos ya preparados
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run_stages(path: Path, render: bool, chunksize: int | None = None) -> list:
+    # Un caché vacío para que corran todas las etapas
+    with tempfile.TemporaryDirectory() as cache_dir:
+        pipeline = build_pipeline(path=str(path), workers=1, chunksize=chunksize)
+        pipeline.cache_dir = Path(cache_dir)
+        pipeline.run(targets=None if render else ["aggregate", "mentions", "location"])
+    return pipeline.log
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True)
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit.stdout.strip() + ("-dirty" if dirty.stdout.strip() else "")
+
+
+def run(scales: list, cases: list, repeat: int, render: bool, data_dir: str) -> dict:
+    results = []
+    for scale in scales:
+        path = corpus_path(scale=scale, output=data_dir)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            data = prepare(path, cache_dir, cases)
+            print(f"x{scale:g}: {path} ({len(data['speeches'])} discursos, {len(data['turns'])} intervenciones)")
+            for name in cases:
+                seconds, peak_rss_delta = forked(best_time, CASES[name], data, repeat)
+                results.append({"scale": scale, "case": name, "seconds": seconds, "peak_rss_delta": peak_rss_delta})
+                print_result(results[-1])
+
+        # El pipeline en memoria y en modo streaming (ver utils.streaming)
+        for prefix, chunksize in {"stages": None, "streaming": STREAM_CHUNKSIZE}.items():
+            log, peak_rss_delta = forked(run_stages, path, render, chunksize)
+            for entry in log:
+                results.append({"scale": scale, "case": f"{prefix}.{entry['stage']}", "seconds": entry["seconds"], "peak_rss_delta": None})
+                print_result(results[-1])
+            total = sum(entry["seconds"] for entry in log)
+            results.append({"scale": scale, "case": f"{prefix} (total)", "seconds": total, "peak_rss_delta": peak_rss_delta})
+            print_result(results[-1])
+
+    return {
+        "commit": git_commit(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def print_result(result: dict):
+    memory = "" if result["peak_rss_delta"] is None else f"{result['peak_rss_delta'] / 2**20:9.1f} MiB"
+    print(f"  {result['case']:<44} {result['seconds']:9.4f} s {memory}")
+
+
+def compare(before: str, after: str):
+    """
+    Print the ratio of the times of two result files, case by case.
+
+    Args:
+        before: The JSON of the reference commit.
+        after: The JSON of the new commit.
+    """
+    runs = {}
+    for label, path in {"antes": before, "después": after}.items():
+        with open(path) as f:
+            run = json.load(f)
+        runs[label] = pd.DataFrame(run["results"]).set_index(["scale", "case"])["seconds"]
+        print(f"{label}: {run['commit']} ({run['date']})")
+    table = pd.DataFrame(runs)
+    table["ratio"] = table["después"] / table["antes"]
+    pd.set_option("display.width", 200)
+    print(table.round(4).to_string())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10])
+    parser.add_argument("--cases", nargs="+", default=None, help="Solo los casos que contengan alguno de estos textos")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--render", action="store_true", help="Incluir la etapa de gráficos del pipeline")
+    parser.add_argument("--data-dir", default=SYNTHETIC_DIR)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--compare", nargs=2, metavar=("ANTES", "DESPUÉS"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    cases = [name for name in CASES if args.cases is None or any(c in name for c in args.cases)]
+    report = run(scales=args.scales, cases=cases, repeat=args.repeat, render=args.render, data_dir=args.data_dir)
+    output = Path(args.output or Path(RESULTS_DIR) / f"{report['commit']}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Resultados en {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# Generador de corpus sintéticos con el mismo esquema y marcado que us_2020_election_speeches.csv:
+# oradores con títulos y variantes, marcas de tiempo (mm:ss) y (hh:mm:ss), [crosstalk ...], \r\n entre
+# intervenciones y el separador \xa0 que aparece en algunos discursos
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python benchmarks/synthetic.py --scale 10 [--seed 0] [--output data/synthetic]
+import argparse
+import csv
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Cantidad de discursos del CSV original, la escala 1x
+BASE_SPEECHES = 270
+SYNTHETIC_DIR = "data/synthetic"
+COLUMNS = ["speaker", "title", "text", "date", "location", "type"]
+
+CANDIDATES = ["Donald Trump", "Joe Biden", "Mike Pence", "Kamala Harris", "Bernie Sanders"]
+# Cómo aparecen los candidatos en las intervenciones, con títulos, espacios de más e iniciales
+TURN_VARIANTS = {
+    "Donald Trump": ["Donald Trump", "President Trump", "President Donald J. Trump", "Donald J. Trump"],
+    "Joe Biden": ["Joe Biden", "Vice President Joe Biden", "Joe Biden ", "VIce President Biden"],
+    "Mike Pence": ["Mike Pence", "Vice President Mike Pence", "Vice President Mike Pence "],
+    "Kamala Harris": ["Kamala Harris", "Senator Kamala Harris", "Kamala Harris ", "Senator Harris"],
+    "Bernie Sanders": ["Bernie Sanders", "Senator Bernie Sanders", "Sanders"],
+}
+OTHER_SPEAKERS = [
+    "Speaker 1", "Speaker 2", "Crowd", "Audience", "Moderator", "Chris Wallace", "Kristen Welker",
+    "Barack Obama", "Jill Biden", "Melania Trump", "Elizabeth Warren", "Pete Buttigieg", "Amy Klobuchar",
+]  # fmt: skip
+SPEECH_SPEAKERS = CANDIDATES + ["Joe Biden, Kamala Harris", "Multiple Speakers", "Democratic Candidates", "???"]
+SPEECH_WEIGHTS = [30, 28, 12, 10, 8, 3, 4, 2, 1]
+TYPES = ["Campaign Speech", "Rally", "Debate", "Interview", "Town Hall", "Press Conference"]
+STATES = {
+    "Pennsylvania": "PA", "Michigan": "MI", "Wisconsin": "WI", "Florida": "FL", "Arizona": "AZ",
+    "North Carolina": "NC", "Ohio": "OH", "Georgia": "GA", "Minnesota": "MN", "Iowa": "IA",
+    "Nevada": "NV", "Texas": "TX", "New Hampshire": "NH", "Delaware": "DE", "Alaska": "AK",
+}  # fmt: skip
+NEWS_CHANNELS = ["ABC", "NBC", "Fox News", "Virtual", "CNN"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov"]
+
+# Palabras reales (menciones, stopwords, temas) y un vocabulario sintético con frecuencias de Zipf
+COMMON_WORDS = (
+    "the and to of a we i in that you is it they for this our be have are not people going what he "
+    "biden trump joe donald president kamala harris pence sanders bernie obama america american "
+    "jobs economy china health care law order vote covid virus police tax taxes fracking don't it's "
+    "we're they're that's great country tremendous folks"
+).split()
+PUNCTUATION = [",", ".", "?", "!", ":", ";", "...", " -", "—", "”", "’s"]
+
+
+def vocabulary(size: int = 20000, seed: int = 0) -> tuple:
+    """
+    Build the vocabulary of the corpus and its word probabilities.
+
+    Args:
+        size: The number of synthetic words, besides the common ones.
+        seed: The seed of the random generator.
+
+    Returns:
+        The words and their Zipf probabilities.
+    """
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    lengths = rng.integers(3, 11, size)
+    words = ["".join(rng.choice(letters, n)) for n in lengths]
+    words = np.array(COMMON_WORDS + words, dtype=object)
+    weights = 1 / np.arange(1, len(words) + 1) ** 1.07
+    return words, weights / weights.sum()
+
+
+def timestamp(seconds: int) -> str:
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"({minutes:02d}:{seconds:02d})"
+    hours, minutes = divmod(minutes, 60)
+    return f"({hours:02d}:{minutes:02d}:{seconds:02d})"
+
+
+def transcript(rng: np.random.Generator, words: np.ndarray, probabilities: np.ndarray, main: str) -> str:
+    """
+    Write the transcript of one speech, with the markup of the original CSV.
+
+    Args:
+        rng: The random generator.
+        words: The vocabulary.
+        probabilities: The probability of each word.
+        main: The speaker of the speech.
+
+    Returns:
+        The text of the speech: "Speaker: (mm:ss)" lines followed by what was said.
+    """
+    n_turns = int(rng.geometric(1 / 40))
+    turn_words = np.maximum(rng.lognormal(mean=4.5, sigma=1.0, size=n_turns).astype(int), 1)
+    tokens = rng.choice(words, size=turn_words.sum(), p=probabilities)
+    # Algunos tokens llevan un signo de puntuación pegado
+    punctuated = np.flatnonzero(rng.random(len(tokens)) < 0.08)
+    tokens[punctuated] = tokens[punctuated] + rng.choice(PUNCTUATION, len(punctuated))
+
+    # Los discursos de varios oradores o sin orador identificado mezclan a los candidatos
+    names = [name.strip() for name in main.split(",")] if main else []
+    main_variants = [v for name in names for v in TURN_VARIANTS.get(name, [])]
+    main_variants = main_variants or [variants[0] for variants in TURN_VARIANTS.values()]
+    separator = "\r\n\xa0\r\n" if rng.random() < 0.1 else "\r\n"
+    lines, seconds, start = [], 0, 0
+    for n in turn_words:
+        speaker = rng.choice(main_variants) if rng.random() < 0.7 else rng.choice(OTHER_SPEAKERS)
+        text = " ".join(tokens[start : start + n])
+        start += n
+        if rng.random() < 0.05:
+            text += f" [crosstalk {timestamp(seconds)[1:-1]}]"
+        lines.append(f"{speaker}: {timestamp(seconds)}{separator}{text}")
+        seconds += int(n * 0.4) + int(rng.integers(1, 20))
+    return separator.join(lines)
+
+
+def generate_speeches(n: int, seed: int = 0, start_id: int = 0) -> pd.DataFrame:
+    """
+    Generate speeches with the columns of us_2020_election_speeches.csv.
+
+    Args:
+        n: The number of speeches.
+        seed: The seed of the random generator.
+        start_id: The number of the first speech, used in the titles.
+
+    Returns:
+        A DataFrame with the speaker, title, text, date, location and type columns.
+    """
+    rng = np.random.default_rng([seed, start_id])
+    words, probabilities = vocabulary(seed=seed)
+    speakers = rng.choice(np.array(SPEECH_SPEAKERS + [None], dtype=object), n, p=np.array(SPEECH_WEIGHTS + [1]) / 99)
+
+    states = list(STATES)
+    cities = [f"City {i}" for i in range(300)]
+    locations = np.array(
+        [f"{c}, {rng.choice(states)}" for c in cities]
+        + [f"{c}, {STATES[rng.choice(states)]}" for c in cities[:100]]
+        + states
+        + NEWS_CHANNELS * 20
+        + [None] * 10,
+        dtype=object,
+    )
+    return pd.DataFrame(
+        {
+            "speaker": speakers,
+            "title": [f"{s or 'Speech'} Transcript {start_id + i}" for i, s in enumerate(speakers)],
+            "text": [transcript(rng, words, probabilities, s) for s in speakers],
+            "date": [f"{rng.choice(MONTHS)} {rng.integers(1, 29)}, 2020" for _ in range(n)],
+            "location": rng.choice(locations, n),
+            "type": rng.choice(TYPES, n),
+        },
+        columns=COLUMNS,
+    )
+
+
+def write_corpus(path: str | Path, scale: float = 1, seed: int = 0, chunk_size: int = 1000) -> Path:
+    """
+    Write a synthetic corpus to a CSV in chunks, so large scales do not have to fit in memory.
+
+    Args:
+        path: The CSV to write.
+        scale: The size relative to the original corpus (BASE_SPEECHES speeches).
+        seed: The seed of the random generator.
+        chunk_size: The number of speeches generated at a time.
+
+    Returns:
+        The path of the CSV.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    total = int(BASE_SPEECHES * scale)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        for start in range(0, total, chunk_size):
+            chunk = generate_speeches(min(chunk_size, total - start), seed=seed, start_id=start)
+            chunk.to_csv(f, index=False, header=start == 0, quoting=csv.QUOTE_MINIMAL)
+    return path
+
+
+def corpus_path(scale: float, seed: int = 0, output: str | Path = SYNTHETIC_DIR) -> Path:
+    """
+    Get the CSV of a synthetic corpus, generating it the first time.
+
+    Args:
+        scale: The size relative to the original corpus.
+        seed: The seed of the random generator.
+        output: The folder where the corpora are stored.
+
+    Returns:
+        The path of the CSV.
+    """
+    path = Path(output) / f"speeches-x{scale:g}-seed{seed}.csv"
+    if not path.exists():
+        write_corpus(path.with_suffix(".tmp"), scale=scale, seed=seed).rename(path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=float, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=SYNTHETIC_DIR)
+    args = parser.parse_args()
+
+    path = corpus_path(scale=args.scale, seed=args.seed, output=args.output)
+    print(f"{path} ({path.stat().st_size / 2**20:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+# Línea de comandos con un subcomando por análisis: cada uno corre solo las etapas de utils.stages que
+# necesita (con su caché) e importa las librerías de gráficos y mapas solo si las usa
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python -m utils speakers [--top 10]
+#   python -m utils words [--top 20] [--chunksize 1000]
+#   python -m utils figures [--text-workers 4] [--workers 4]
+#   python -m utils search "joe biden" --near china
+#   python -m utils --profile-imports mentions
+import argparse
+import runpy
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+# Subcomandos que son la línea de comandos de otro módulo, reciben el resto de los argumentos tal cual
+DELEGATED = {
+    "search": ("utils.inverted_index", "Buscar palabras y frases en las intervenciones"),
+    "stats": ("utils.stream_stats", "Estadísticas aproximadas leyendo el CSV por partes"),
+    "update": ("utils.incremental", "Actualizar los agregados con los discursos nuevos"),
+}
+
+
+def _pipeline(args):
+    from utils.load_data import DATA_PATH
+    from utils.stages import build_pipeline
+
+    return build_pipeline(
+        path=args.path or DATA_PATH,
+        workers=getattr(args, "workers", None),
+        chunksize=args.chunksize,
+        text_workers=args.text_workers,
+    )
+
+
+def _run(args, targets: list) -> dict:
+    pipeline = _pipeline(args)
+    results = pipeline.run(targets)
+    if args.log:
+        pipeline.print_log()
+    return results
+
+
+def speakers(args):
+    if args.chunksize is None:
+        counts = _run(args, ["load"])["load"].groupby("speaker").size().sort_values(ascending=False)
+    else:
+        counts = _run(args, ["n_speeches"])["n_speeches"]
+    print(counts.head(args.top).to_string())
+
+
+def weekly(args):
+    from utils.constants import CANDIDATE_ORDER
+
+    aggregate = _run(args, ["aggregate"])["aggregate"]
+    if args.others:
+        df = aggregate["weekly_others"][CANDIDATE_ORDER + ["Otros"]]
+    else:
+        df = aggregate["weekly"][CANDIDATE_ORDER]
+    # Sin nombres de meses, así no hace falta el locale en español
+    df.index = df.index.strftime("%Y-%m-%d")
+    print(df.to_string())
+
+
+def words(args):
+    aggregate = _run(args, ["aggregate"])["aggregate"]
+    for row in aggregate["word_frequencies"].itertuples():
+        top = list(row.frequencies.items())[: args.top]
+        print(f"{row.speaker}: " + ", ".join(f"{word} ({count})" for word, count in top))
+    print(aggregate["n_words"].to_string())
+
+
+def ngrams(args):
+    if args.chunksize is not None:
+        sys.exit("ngrams necesita la tabla de intervenciones, no se puede usar con --chunksize")
+    from utils.clean_data import wordcloud_stopwords
+    from utils.constants import EXTRA_STOPWORDS
+    from utils.ngrams import ngram_sketches
+
+    turns = _run(args, ["clean_text"])["clean_text"]
+    sketch = ngram_sketches(turns, n=args.n, stopwords=wordcloud_stopwords() | set(EXTRA_STOPWORDS))
+    print(sketch.top(args.top).to_string(index=False))
+
+
+def distinctive(args):
+    if args.chunksize is not None:
+        sys.exit("distinctive necesita la tabla de intervenciones, no se puede usar con --chunksize")
+    from utils.distinctive import distinctive_terms
+    from utils.time_buckets import bucket_starts
+
+    results = _run(args, ["clean_text", "dtm"])
+    turns = results["clean_text"]
+    keys = {"speaker": turns["speaker"], "party": turns["party"], "week": bucket_starts(turns["date"])}
+    scores = distinctive_terms(results["dtm"], {name: keys[name] for name in args.by}, method=args.method)
+    ranked = scores.ranked_terms(k=args.top)
+    for (grouping, group), terms in ranked.groupby(["grouping", "group"], sort=False)["term"]:
+        print(f"{grouping} {group}: {', '.join(terms)}")
+
+
+def mentions(args):
+    print(_run(args, ["mentions"])["mentions"].to_string())
+
+
+def locations(args):
+    location = _run(args, ["location"])["location"]
+    states = location["all_states"].dropna(subset=["winner"]).sort_values("name")
+    print(states[["name", "winner", "dem_count", "rep_count"]].to_string(index=False))
+    print(location["news_channel"].to_string())
+
+
+def figures(args):
+    # Recién acá se importan matplotlib, seaborn, wordcloud, networkx y geopandas (ver stages.render)
+    pipeline = _pipeline(args)
+    pipeline.run()
+    pipeline.print_log()
+
+
+def profile_imports(argv: list) -> int:
+    """
+    Run a subcommand in a new interpreter and report how long its imports took, per package.
+
+    Args:
+        argv: The arguments of python -m utils, without --profile-imports.
+
+    Returns:
+        The exit code of the subcommand.
+    """
+    # -X importtime escribe en stderr el tiempo propio y acumulado de cada módulo importado
+    start = time.perf_counter()
+    child = subprocess.run([sys.executable, "-X", "importtime", "-m", "utils", *argv], stderr=subprocess.PIPE, text=True)
+    seconds = time.perf_counter() - start
+
+    own, modules = defaultdict(int), defaultdict(int)
+    for line in child.stderr.splitlines():
+        if not line.startswith("import time:"):
+            print(line, file=sys.stderr)
+            continue
+        self_us, _, name = line.removeprefix("import time:").split("|")
+        # La primera línea es el encabezado
+        if self_us.strip().isdigit():
+            package = name.strip().split(".")[0]
+            own[package] += int(self_us)
+            modules[package] += 1
+
+    print(f"\nImports: {sum(own.values()) / 1e6:.2f} s de {seconds:.2f} s en total, {sum(modules.values())} módulos")
+    for package, us in sorted(own.items(), key=lambda item: item[1], reverse=True)[:15]:
+        print(f"  {package:<24} {us / 1000:8.1f} ms {modules[package]:6} módulos")
+    return child.returncode
+
+
+def main(argv: list | None = None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(prog="python -m utils", description="Análisis de los discursos de 2020")
+    parser.add_argument(
+        "--profile-imports", action="store_true", help="Reportar cuánto tardan los imports del subcomando"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--path", default=None, help="El CSV de discursos (data/us_2020_election_speeches.csv)")
+    common.add_argument("--chunksize", type=int, default=None, help="Leer el corpus por partes de este tamaño")
+    common.add_argument("--text-workers", type=int, default=1, help="Procesos para segmentar, limpiar y tokenizar")
+    common.add_argument("--log", action="store_true", help="Mostrar qué etapas salieron del caché")
+
+    command = subparsers.add_parser("speakers", parents=[common], help="Discursos por orador")
+    command.add_argument("--top", type=int, default=None)
+    command.set_defaults(func=speakers)
+
+    command = subparsers.add_parser("weekly", parents=[common], help="Discursos por semana de cada candidato")
+    command.add_argument("--others", action="store_true", help="Con el resto de los políticos como Otros")
+    command.set_defaults(func=weekly)
+
+    command = subparsers.add_parser("words", parents=[common], help="Palabras más dichas por cada candidato")
+    command.add_argument("--top", type=int, default=20)
+    command.set_defaults(func=words)
+
+    command = subparsers.add_parser("ngrams", parents=[common], help="Frases más dichas por cada candidato")
+    command.add_argument("--n", type=int, default=2, help="Cantidad de palabras de cada frase")
+    command.add_argument("--top", type=int, default=10)
+    command.set_defaults(func=ngrams)
+
+    command = subparsers.add_parser("distinctive", parents=[common], help="Palabras distintivas de cada grupo")
+    command.add_argument("--by", nargs="+", choices=["speaker", "party", "week"], default=["speaker", "party"])
+    command.add_argument("--method", choices=["log_odds", "tf_idf"], default="log_odds")
+    command.add_argument("--top", type=int, default=10)
+    command.set_defaults(func=distinctive)
+
+    command = subparsers.add_parser("mentions", parents=[common], help="Matriz de menciones entre candidatos")
+    command.set_defaults(func=mentions)
+
+    command = subparsers.add_parser("locations", parents=[common], help="Discursos por estado y por canal")
+    command.set_defaults(func=locations)
+
+    command = subparsers.add_parser("figures", parents=[common], help="Todas las figuras de la tarea en img/")
+    command.add_argument("--workers", type=int, default=None, help="Procesos para renderizar")
+    command.set_defaults(func=figures)
+
+    for name, (module, description) in DELEGATED.items():
+        subparsers.add_parser(name, add_help=False, help=f"{description} (python -m utils {name} --help)")
+
+    args, extra = parser.parse_known_args(argv)
+    if args.profile_imports:
+        sys.exit(profile_imports([arg for arg in argv if arg != "--profile-imports"]))
+    if args.command in DELEGATED:
+        module = DELEGATED[args.command][0]
+        sys.argv = [module, *extra]
+        runpy.run_module(module, run_name="__main__", alter_sys=True)
+        return
+    if extra:
+        parser.error(f"argumentos desconocidos: {' '.join(extra)}")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
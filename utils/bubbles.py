@@ -0,0 +1,106 @@
+import hashlib
+import json
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from circlify import circlify
+
+CACHE_DIR = "data/cache/layouts"
+
+# circlify crece mucho más que lineal con la cantidad de círculos (50 tardan casi un segundo)
+MAX_BUBBLES = 30
+OTHERS_LABEL = "Otros"
+
+
+def fold_tail(counts: pd.Series, max_bubbles: int | None = MAX_BUBBLES, label: str = OTHERS_LABEL) -> pd.Series:
+    """
+    Sort the counts and fold the smallest ones into a single bubble.
+
+    Args:
+        counts: The count of each item, like the speeches of each speaker.
+        max_bubbles: The maximum number of bubbles, the folded one included. No limit if None.
+        label: The label of the folded bubble.
+
+    Returns:
+        The counts from largest to smallest, with at most max_bubbles items.
+    """
+    counts = counts.sort_values(ascending=False)
+    if max_bubbles is None or len(counts) <= max_bubbles:
+        return counts
+    head, tail = counts.iloc[: max_bubbles - 1], counts.iloc[max_bubbles - 1 :]
+    folded = pd.concat([head, pd.Series([tail.sum()], index=[label])])
+    return folded.sort_values(ascending=False, kind="stable")
+
+
+def layout_path(counts: tuple, cache_dir: str | Path = CACHE_DIR) -> Path:
+    """
+    Get the file where the layout of a count vector is stored.
+
+    Args:
+        counts: The counts, in the order they are packed.
+        cache_dir: The folder where the layouts are stored.
+
+    Returns:
+        The path of the layout, named after the hash of the counts.
+    """
+    digest = hashlib.sha256(json.dumps(list(counts)).encode()).hexdigest()
+    return Path(cache_dir) / f"{digest[:16]}.npy"
+
+
+def circle_layout(counts) -> np.ndarray:
+    """
+    Pack one circle per count, with areas proportional to the counts, without any cache.
+
+    Args:
+        counts: The counts, from largest to smallest.
+
+    Returns:
+        An array with the x, y and radius of the circle of each count, in the
+        unit circle and in the order of counts.
+    """
+    # circlify devuelve los círculos de menor a mayor
+    circles = circlify(list(counts))[::-1]
+    return np.array([[circle.x, circle.y, circle.r] for circle in circles]).reshape(-1, 3)
+
+
+@lru_cache(maxsize=128)
+def pack_circles(counts: tuple, cache_dir: str | Path | None = CACHE_DIR) -> np.ndarray:
+    """
+    Pack one circle per count, with areas proportional to the counts.
+
+    The layouts of circle_layout are remembered in this process and, if
+    cache_dir is given, saved on disk keyed by the count vector, so the same
+    chart is only packed once.
+
+    Args:
+        counts: The counts, from largest to smallest.
+        cache_dir: The folder where the layouts are stored. None to keep them only in memory.
+
+    Returns:
+        A read-only array with the x, y and radius of the circle of each count,
+        in the unit circle and in the order of counts.
+    """
+    path = None if cache_dir is None else layout_path(counts, cache_dir=cache_dir)
+    layout = None
+    if path is not None and path.exists():
+        try:
+            layout = np.load(path)
+        except (OSError, ValueError):
+            layout = None
+        # Un archivo que no es el layout de estos conteos se vuelve a calcular
+        if layout is not None and layout.shape != (len(counts), 3):
+            layout = None
+    if layout is None:
+        layout = circle_layout(counts)
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Se escribe en un temporal y se renombra, así una escritura cortada no deja un layout truncado
+            partial = path.with_name(f"{path.name}.tmp")
+            with open(partial, "wb") as f:
+                np.save(f, layout)
+            partial.replace(path)
+    # El mismo array se devuelve en cada llamada, que nadie lo modifique
+    layout.setflags(write=False)
+    return layout
@@ -0,0 +1,146 @@
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from scipy import sparse
+
+from utils.dtm import DocumentTermMatrix
+
+# Bytes que pueden empezar un carácter no alfanumérico: ASCII que no es letra ni dígito,
+# y los primeros bytes de los caracteres de 2, 3 o 4 bytes (se clasifican después de decodificarlos)
+_CANDIDATE_BYTES = np.array([b >= 0xC0 or (b < 0x80 and not chr(b).isalnum()) for b in range(256)])
+
+_MAX_CODE_POINT = 0x110000
+
+# Los bytes se procesan en ventanas de filas enteras de hasta este tamaño, así la memoria no crece con el texto
+WINDOW_BYTES = 1 << 22
+
+# Grupo de los textos sin orador (o sin el valor por el que se agrupa)
+MISSING_LABEL = "Sin dato"
+
+
+def _count_window(values: np.ndarray, offsets: np.ndarray) -> sparse.csr_array:
+    # Cuenta los caracteres candidatos de las filas de una ventana; offsets empieza en 0
+    n_rows = len(offsets) - 1
+    starts = np.flatnonzero(_CANDIDATE_BYTES[values])
+    rows = np.searchsorted(offsets, starts, side="right") - 1
+    leads = values[starts]
+    ascii_ = leads < 0x80
+
+    # ASCII: el byte es el código, un solo bincount por (fila, byte)
+    ascii_counts = sparse.csr_array(
+        np.bincount(rows[ascii_] * 128 + leads[ascii_], minlength=n_rows * 128).reshape(n_rows, 128)
+    )
+    ascii_counts = sparse.csr_array(
+        (ascii_counts.data, ascii_counts.indices, ascii_counts.indptr), shape=(n_rows, _MAX_CODE_POINT)
+    )
+
+    # El resto se decodifica a partir de los bytes de continuación (el UTF-8 de Arrow siempre es válido)
+    starts, rows, code_points = starts[~ascii_], rows[~ascii_], leads[~ascii_].astype(np.int64)
+    following = {k: values[np.minimum(starts + k, len(values) - 1)].astype(np.int64) & 0x3F for k in (1, 2, 3)}
+    code_points = np.select(
+        [code_points >= 0xF0, code_points >= 0xE0],
+        [
+            (code_points & 0x07) << 18 | following[1] << 12 | following[2] << 6 | following[3],
+            (code_points & 0x0F) << 12 | following[1] << 6 | following[2],
+        ],
+        (code_points & 0x1F) << 6 | following[1],
+    )
+    # Los caracteres que no son ASCII se clasifican una vez por código distinto
+    wide = np.unique(code_points)
+    keep = ~np.isin(code_points, wide[[chr(code_point).isalnum() for code_point in wide]])
+    wide_counts = sparse.coo_array(
+        (np.ones(keep.sum(), dtype=np.int64), (rows[keep], code_points[keep])), shape=(n_rows, _MAX_CODE_POINT)
+    ).tocsr()
+    return ascii_counts + wide_counts
+
+
+def _count_batch(arr: pa.LargeStringArray) -> sparse.csr_array:
+    _, offsets, data = arr.buffers()
+    offsets = np.frombuffer(offsets, dtype=np.int64)[arr.offset : arr.offset + len(arr) + 1]
+    if data is None:
+        return sparse.csr_array((len(arr), _MAX_CODE_POINT), dtype=np.int64)
+    values = np.frombuffer(data, dtype=np.uint8)
+    # Cortes en límites de filas, cada WINDOW_BYTES bytes (una fila más larga queda sola en su ventana)
+    cuts = np.searchsorted(offsets, np.arange(offsets[0], offsets[-1], WINDOW_BYTES)[1:], side="right") - 1
+    bounds = np.unique(np.concatenate([[0], cuts, [len(arr)]]))
+    windows = [
+        _count_window(values[offsets[start] : offsets[stop]], offsets[start : stop + 1] - offsets[start])
+        for start, stop in zip(bounds[:-1], bounds[1:])
+    ]
+    return sparse.vstack(windows, format="csr") if windows else sparse.csr_array((0, _MAX_CODE_POINT), dtype=np.int64)
+
+
+def character_counts(texts: pd.Series, batch_size: int = 1000) -> DocumentTermMatrix:
+    """
+    Count every character that is not a letter or a digit in each text, in one pass.
+
+    The texts are read in batches of rows as Arrow strings and the characters
+    are counted from the UTF-8 bytes with numpy, in windows of WINDOW_BYTES,
+    so besides the counts only one batch is in memory at a time and no Python
+    string is built.
+
+    Args:
+        texts: The texts, missing values count as empty texts.
+        batch_size: The number of texts per batch.
+
+    Returns:
+        The counts as a matrix with one row per text and one column per character
+        (whitespace included), sorted by code point, with the index of texts as
+        labels. Group it to count per speaker (see DocumentTermMatrix.groupby)
+        and use term_totals for the whole column.
+    """
+    batches = []
+    for start in range(0, len(texts), batch_size):
+        arr = pa.array(texts.iloc[start : start + batch_size], type=pa.large_string(), from_pandas=True)
+        if isinstance(arr, pa.ChunkedArray):
+            arr = arr.combine_chunks()
+        batches.append(_count_batch(arr))
+    counts = sparse.vstack(batches, format="csr") if batches else sparse.csr_array((0, _MAX_CODE_POINT), dtype=np.int64)
+    # Solo quedan las columnas de los caracteres que aparecen
+    used = np.unique(counts.indices)
+    terms = np.array([chr(code_point) for code_point in used], dtype=object)
+    return DocumentTermMatrix(counts=counts[:, used], terms=terms, labels=texts.index)
+
+
+def profile_chunks(
+    chunks, column_name: str = "text", by: str = "speaker", missing_label: str = MISSING_LABEL
+) -> DocumentTermMatrix:
+    """
+    Count the characters of a corpus read in chunks, keeping only the counts per group.
+
+    Args:
+        chunks: The DataFrames of the corpus, like read_speeches.
+        column_name: The column with the texts.
+        by: The column to group by, like the speaker.
+        missing_label: The group of the rows without a value in by.
+
+    Returns:
+        The counts with one row per group, see character_counts. Use
+        term_totals for the whole corpus.
+    """
+    partials = (
+        character_counts(chunk[column_name]).groupby(chunk[by].astype(object).fillna(missing_label))
+        for chunk in chunks
+    )
+    return reduce(DocumentTermMatrix.merge, partials)
+
+
+def frequency_table(counts: DocumentTermMatrix) -> pd.DataFrame:
+    """
+    Turn character counts into a table, with the most frequent characters first.
+
+    Args:
+        counts: The counts, see character_counts and profile_chunks.
+
+    Returns:
+        One row per label and one column per character. The columns are the
+        repr of each character, so whitespace and invisible characters can be read.
+    """
+    order = np.argsort(-np.asarray(counts.counts.sum(axis=0)), kind="stable")
+    return pd.DataFrame(
+        counts.counts[:, order].toarray(),
+        index=counts.labels,
+        columns=[repr(term) for term in counts.terms[order]],
+    )
@@ -0,0 +1,105 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Texto guardado en Arrow (un buffer contiguo) con NaN como faltante, igual que el str de pandas 3
+TEXT_DTYPE = pd.StringDtype(storage="pyarrow", na_value=np.nan)
+
+# Columnas del discurso de baja cardinalidad y columnas de texto libre
+SPEECH_CATEGORICAL_COLUMNS = ["speaker", "type", "location"]
+SPEECH_TEXT_COLUMNS = ["title", "text"]
+
+
+def compact_speeches(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Store the speech-level table with categorical metadata and Arrow-backed text.
+
+    Args:
+        df: The speeches, as returned by load_speeches.
+
+    Returns:
+        The same table with compact dtypes, one row per speech.
+    """
+    df = df.copy()
+    for column in SPEECH_CATEGORICAL_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    for column in SPEECH_TEXT_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype(TEXT_DTYPE)
+    return df
+
+
+def compact_turns(turns: pd.DataFrame) -> pd.DataFrame:
+    """
+    Store the turn table without speech metadata: it is joined by speech_id when needed.
+
+    Args:
+        turns: The turns, as returned by segment_turns.
+
+    Returns:
+        The turns with downcast ids, a categorical speaker and Arrow-backed text.
+    """
+    return pd.DataFrame(
+        {
+            "speech_id": pd.to_numeric(turns["speech_id"], downcast="unsigned"),
+            "turn_index": pd.to_numeric(turns["turn_index"], downcast="unsigned"),
+            "speaker": turns["speaker"].astype("category"),
+            "text": turns["text"].astype(TEXT_DTYPE),
+        },
+        index=turns.index,
+    )
+
+
+def with_metadata(turns: pd.DataFrame, speeches: pd.DataFrame, columns: list) -> pd.DataFrame:
+    """
+    Join only the speech columns an analysis needs to the turns.
+
+    Args:
+        turns: The compact turn table.
+        speeches: The speech-level table, indexed by speech_id.
+        columns: The speech columns to add.
+
+    Returns:
+        The turns indexed by speech_id, with the requested speech columns.
+    """
+    return turns.join(speeches[columns], on="speech_id").set_index("speech_id").rename_axis(None)
+
+
+def memory_report(frames: dict) -> pd.DataFrame:
+    """
+    Measure the footprint of each column of a set of tables, including the string buffers.
+
+    Args:
+        frames: The tables to measure, by name.
+
+    Returns:
+        A DataFrame with the table, column, dtype and bytes of each column (the index included).
+    """
+    rows = []
+    for name, df in frames.items():
+        usage = df.memory_usage(index=True, deep=True)
+        for column, size in usage.items():
+            dtype = df.index.dtype if column == "Index" else df[column].dtype
+            rows.append({"table": name, "column": column, "dtype": str(dtype), "bytes": int(size)})
+    return pd.DataFrame(rows)
+
+
+def peak_rss() -> int | None:
+    """
+    Get the peak resident set size of the current process.
+
+    Returns:
+        The peak RSS in bytes, or None where the resource module is not available.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo da en KiB y macOS en bytes
+    return peak if sys.platform == "darwin" else peak * 1024
@@ -0,0 +1,215 @@
+# Constantes compartidas por tarea_1.py y las etapas del pipeline
+
+# Letra para que coincida con LaTex
+RC_PARAMS = {
+    "font.family": "Latin Modern Roman",
+    "mathtext.fontset": "cm",
+    "figure.titlesize": 18,
+    "axes.titlesize": 16,
+    "axes.labelsize": 14,
+    "xtick.labelsize": 12,
+    "ytick.labelsize": 12,
+    "legend.title_fontsize": 16,
+    "legend.fontsize": 14,
+}
+
+# Orden de los candidatos en los gráficos de barras y sus colores
+CANDIDATE_ORDER = ["Joe Biden", "Kamala Harris", "Bernie Sanders", "Donald Trump", "Mike Pence"]
+CANDIDATE_ORDER_COLORS = ["#1f77b4", "#4e9cd5", "#8fbadd", "#d62728", "#e96a6a"]
+OTHERS_COLOR = "#949494"
+
+# Homogeneizar nombres
+SPEAKER_NAMES = {
+    "President Trump": "Donald Trump",
+    "President Donald J. Trump": "Donald Trump",
+    "President Donald Trump": "Donald Trump",
+    "Donald J. Trump": "Donald Trump",
+    "Trump": "Donald Trump",
+    "Vice President Joe Biden": "Joe Biden",
+    "VIce President Biden": "Joe Biden",
+    "Joe Biden ": "Joe Biden",
+    "Vice President Mike Pence": "Mike Pence",
+    "Vice President Mike Pence ": "Mike Pence",
+    "Kamala Harris ": "Kamala Harris",
+    "Senator Kamala Harris": "Kamala Harris",
+    "Senator Harris": "Kamala Harris",
+    "Senator Bernie Sanders": "Bernie Sanders",
+    "Sanders": "Bernie Sanders",
+}
+
+# Partido político de cada candidato
+PARTIES = {
+    "Joe Biden": "Partido Demócrata",
+    "Kamala Harris": "Partido Demócrata",
+    "Bernie Sanders": "Partido Demócrata",
+    "Donald Trump": "Partido Republicano",
+    "Mike Pence": "Partido Republicano",
+}
+
+# Formas de mencionar a los candidatos
+MENTIONS = {
+    "Joe Biden": [
+        r"\bjoe biden\b",
+        r"\bbiden\b",
+        r"\bvice president biden\b",
+        r"\bvice president joe biden\b",
+    ],
+    "Donald Trump": [
+        r"\bdonald trump\b",
+        r"\btrump\b",
+        r"\bpresident trump\b",
+        r"\bpresident donald\b",
+        r"\bdonald\b",
+    ],
+    "Mike Pence": [r"\bmike pence\b", r"\bpence\b", r"\bvice president pence\b"],
+    "Bernie Sanders": [r"\bbernie sanders\b", r"\bsanders\b"],
+    "Kamala Harris": [
+        r"\bkamala harris\b",
+        r"\bharris\b",
+        r"\bsenator harris\b",
+        r"\bkamala\b",
+    ],
+}
+
+# Color de cada candidato en los gráficos
+CANDIDATE_COLORS = {
+    "Bernie Sanders": "#8fbadd",
+    "Donald Trump": "#d62728",
+    "Joe Biden": "#1f77b4",
+    "Kamala Harris": "#4e9cd5",
+    "Mike Pence": "#e96a6a",
+}
+
+# Lista de políticos identificados en el grupo Otros
+POLITICIANS = [
+    "Joe Biden",
+    "Kamala Harris",
+    "Bernie Sanders",
+    "Donald Trump",
+    "Mike Pence",
+    "Alex Padilla",
+    "Alexandria Ocasio-Cortez",
+    "Amy Klobuchar",
+    "Andrew Cuomo",
+    "Andrew Yang",
+    "Barack Obama",
+    "Ben Carson",
+    "Beto O’Rourke",
+    "Bill Clinton",
+    "Bob Casey",
+    "Brendan Boyle",
+    "Brenda Lawrence",
+    "Carol Moseley Braun",
+    "Catherine Cortez Masto",
+    "Cedric Richmond",
+    "Chuck Hagel",
+    "Chuck Schumer",
+    "Colin Allred",
+    "Colin Powell",
+    "Conor Lamb",
+    "Cory Booker",
+    "Cory Gardner",
+    "David Perdue",
+    "David Zuckerman",
+    "Debbie Mucarsel-Powell",
+    "Deb Haaland",
+    "Doug Ducey",
+    "Doug Jones",
+    "Donna Brazile",
+    "Donald Trump Jr.",
+    "Elise Stefanik",
+    "Elizabeth Warren",
+    "Eric Garcetti",
+    "Eric Trump",
+    "Filemon Vela",
+    "Gary Peters",
+    "Gavin Newsom",
+    "Gretchen Whitmer",
+    "Gwen Moore",
+    "Hillary Clinton",
+    "Ilhan Omar",
+    "Jamie Harrison",
+    "Joaquin Castro",
+    "Joe Gruters",
+    "John Carney",
+    "John Kerry",
+    "John Lynch",
+    "John McCain",
+    "John Kasich",
+    "Jon Meacham",
+    "Josh Holt",
+    "Karen Pence",
+    "Keisha Lance Bottoms",
+    "Kellyanne Conway",
+    "Kirsten Gillibrand",
+    "Kristi Noem",
+    "Lindsey Graham",
+    "Lisa Blunt Rochester",
+    "Lori Lightfoot",
+    "Madison Cawthorn",
+    "Malcolm Kenyatta",
+    "Mandela Barnes",
+    "Maria Cardona",
+    "Mark Meadows",
+    "Martha McSally",
+    "Matt Gaetz",
+    "Melania Trump",
+    "Melvin Carter",
+    "Michelle Lujan Grisham",
+    "Mike Bloomberg",
+    "Mike Pompeo",
+    "Mitch McConnell",
+    "Muriel Bowser",
+    "Nancy Pelosi",
+    "Ned Lamont",
+    "Nikki Fried",
+    "Nikki Haley",
+    "Pete Buttigieg",
+    "Phil Murphy",
+    "Pramila Jayapal",
+    "Rand Paul",
+    "Raphael Warnock",
+    "Ronna McDaniel",
+    "Ron DeSantis",
+    "Ron Kind",
+    "Ron Klain",
+    "Seth Moulton",
+    "Stacey Abrams",
+    "Steve Sisolak",
+    "Tammy Baldwin",
+    "Tammy Duckworth",
+    "Ted Kaufman",
+    "Ted Lieu",
+    "Thom Tillis",
+    "Tim Ryan",
+    "Tim Scott",
+    "Tom Carper",
+    "Tom Perez",
+    "Tom Steyer",
+    "Tulsi Gabbard",
+    "Val Demings",
+    "Veronica Escobar",
+    "Yvanna Cancela",
+    "Zoe Lofgren",
+]
+
+# Palabras comunes que no trae el módulo wordcloud
+EXTRA_STOPWORDS = [
+    "s",
+    "re",
+    "don",
+    "didn",
+    "know",
+    "will",
+    "going",
+    "need",
+    "t",
+    "people",
+    "think",
+    "want",
+    "well",
+    "let",
+    "said",
+    "thank",
+    "one",
+]
@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from utils.dtm import DocumentTermMatrix
+
+
+def _segments(counts: sparse.csr_array, segments: np.ndarray | None) -> tuple:
+    # Cada fila se compara solo con las de su segmento: la indicadora (segmento x fila) suma los conteos de
+    # cada segmento, y de cada conteo distinto de cero se guarda su fila, su segmento y su columna
+    n_rows = counts.shape[0]
+    segments = np.zeros(n_rows, dtype=np.int64) if segments is None else np.asarray(segments)
+    indicator = sparse.csr_array(
+        (np.ones(n_rows, dtype=np.int64), (segments, np.arange(n_rows))),
+        shape=(int(segments.max(initial=-1)) + 1, n_rows),
+    )
+    rows = np.repeat(np.arange(n_rows), np.diff(counts.indptr))
+    return indicator, rows, segments[rows], counts.indices
+
+
+def stack_groupings(dtm: DocumentTermMatrix, groupings: dict) -> tuple:
+    """
+    Add up the counts of the documents by several keys, one block of rows per grouping.
+
+    Args:
+        dtm: The word counts of the documents.
+        groupings: The keys of each grouping by name, like {"speaker": ..., "party": ...},
+            each one aligned with the rows of dtm (see DocumentTermMatrix.groupby).
+
+    Returns:
+        The counts of every group, labeled by grouping and group, and the
+        position of the grouping of each row, to pass as segments.
+    """
+    blocks = [dtm.groupby(keys) for keys in groupings.values()]
+    sizes = [block.shape[0] for block in blocks]
+    labels = pd.MultiIndex.from_arrays(
+        [
+            np.repeat(list(groupings), sizes),
+            np.concatenate([block.labels.to_numpy(dtype=object) for block in blocks] or [[]]),
+        ],
+        names=["grouping", "group"],
+    )
+    counts = sparse.vstack([block.counts for block in blocks], format="csr") if blocks else dtm.counts[:0]
+    return DocumentTermMatrix(counts=counts, terms=dtm.terms, labels=labels), np.repeat(np.arange(len(blocks)), sizes)
+
+
+def tf_idf(dtm: DocumentTermMatrix, segments: np.ndarray | None = None) -> DocumentTermMatrix:
+    """
+    Weight the counts of each row by TF-IDF, taking every row as a document.
+
+    The term frequency is relative to the words of the row and the inverse
+    document frequency is log(rows / rows with the term), so the terms used in
+    every row of the segment get 0 and are left out.
+
+    Args:
+        dtm: The word counts, like the counts per speaker.
+        segments: The segment of each row, the rows are only compared within
+            their segment (see stack_groupings). All the rows together if None.
+
+    Returns:
+        A matrix with the same rows and terms and the TF-IDF weights as values.
+    """
+    counts = dtm.counts.tocsr()
+    indicator, rows, segment, columns = _segments(counts, segments)
+
+    documents = np.asarray(indicator.sum(axis=1))
+    frequency = (indicator @ (counts > 0).astype(np.int64)).toarray()
+    tf = counts.data / np.asarray(counts.sum(axis=1))[rows]
+    idf = np.log(documents[segment] / frequency[segment, columns])
+    weights = sparse.csr_array((tf * idf, counts.indices, counts.indptr), shape=counts.shape)
+    weights.eliminate_zeros()
+    return DocumentTermMatrix(counts=weights, terms=dtm.terms, labels=dtm.labels)
+
+
+def log_odds(
+    dtm: DocumentTermMatrix,
+    segments: np.ndarray | None = None,
+    prior: np.ndarray | None = None,
+    alpha0: float = 500,
+) -> DocumentTermMatrix:
+    """
+    Score the terms of each row by the weighted log-odds ratio against the rest of the rows.
+
+    The log-odds of a term in the row and in the other rows of its segment are
+    smoothed with an informative Dirichlet prior that follows the background
+    frequency of each term, and their difference is divided by its standard
+    deviation (Monroe, Colaresi and Quinn, 2008). Frequent words that every row
+    uses about as much get scores close to 0, rare words need evidence.
+
+    Args:
+        dtm: The word counts, like the counts per speaker.
+        segments: The segment of each row, the rows are only compared within
+            their segment (see stack_groupings). All the rows together if None.
+        prior: The background counts of each term, aligned with the terms (like
+            the counts of a larger corpus). The counts of dtm if None.
+        alpha0: The total pseudo-counts of the prior, how many words it is worth.
+
+    Returns:
+        A matrix with the same rows and terms and the z-scores of the terms the
+        row uses more than the rest as values. Only positive scores are kept.
+    """
+    counts = dtm.counts.tocsr()
+    indicator, rows, segment, columns = _segments(counts, segments)
+    if prior is None:
+        prior = np.asarray(counts.sum(axis=0))
+    alpha = alpha0 * prior / prior.sum()
+
+    # Conteos del término en la fila (y) y en el resto del segmento, y las palabras de cada uno
+    totals = (indicator @ counts).toarray()
+    words = np.asarray(counts.sum(axis=1))
+    y, a = counts.data.astype(np.float64), alpha[columns]
+    y_rest = totals[segment, columns] - y
+    n, n_rest = words[rows], totals.sum(axis=1)[segment] - words[rows]
+
+    delta = np.log((y + a) / (n + alpha0 - y - a)) - np.log((y_rest + a) / (n_rest + alpha0 - y_rest - a))
+    z = delta / np.sqrt(1 / (y + a) + 1 / (y_rest + a))
+    scores = sparse.csr_array((np.maximum(z, 0), counts.indices, counts.indptr), shape=counts.shape)
+    scores.eliminate_zeros()
+    return DocumentTermMatrix(counts=scores, terms=dtm.terms, labels=dtm.labels)
+
+
+SCORES = {"tf_idf": tf_idf, "log_odds": log_odds}
+
+
+def distinctive_terms(dtm: DocumentTermMatrix, groupings: dict, method: str = "log_odds", **kwargs) -> DocumentTermMatrix:
+    """
+    Score the terms of every group of several groupings at once, each group against the rest of its grouping.
+
+    The groups of every grouping are stacked into one matrix (see
+    stack_groupings) and scored with a handful of vectorized operations over
+    its nonzero counts. top_terms gives the frequency dicts of word_cloud_plot
+    and ranked_terms a long table.
+
+    Args:
+        dtm: The word counts of the documents, like the turns or the counts per
+            speaker and week.
+        groupings: The keys of each grouping by name, aligned with the rows of
+            dtm, like {"speaker": ..., "party": ..., "week": ...}.
+        method: "log_odds" (see log_odds) or "tf_idf" (see tf_idf).
+        **kwargs: The rest of the arguments of the score, like alpha0.
+
+    Returns:
+        The scores, labeled by grouping and group.
+    """
+    grouped, segments = stack_groupings(dtm, groupings)
+    return SCORES[method](grouped, segments=segments, **kwargs)
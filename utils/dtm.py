@@ -0,0 +1,249 @@
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# scipy.sparse se importa en los métodos que arman matrices, así tokenize (que usan ngrams, el índice
+# invertido y las estadísticas en streaming) no lo carga
+
+
+def tokenize(texts: pd.Series) -> pa.LargeListArray:
+    """
+    Split the texts on whitespace into dictionary-encoded tokens.
+
+    Args:
+        texts: The documents, missing values count as empty documents.
+
+    Returns:
+        The tokens of each document, with the words interned in a dictionary
+        in order of first appearance.
+    """
+    tokens = pc.utf8_split_whitespace(pa.array(texts, type=pa.large_string(), from_pandas=True))
+    rows = pc.list_parent_indices(tokens)
+    words = pc.list_flatten(tokens)
+    # utf8_split_whitespace deja un token vacío si el texto empieza o termina con espacios
+    keep = pc.not_equal(words, "")
+    rows, words = rows.filter(keep).to_numpy(), words.filter(keep)
+    offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(tokens)), out=offsets[1:])
+    return pa.LargeListArray.from_arrays(offsets, pc.dictionary_encode(words))
+
+
+class DocumentTermMatrix:
+    """
+    Sparse word counts of a set of documents (rows) over an interned vocabulary (columns).
+
+    The texts are tokenized once, on whitespace, so the documents should already
+    be normalized (see normalize_text). Grouping documents (per speaker, week,
+    party...) is a product with a sparse indicator matrix, and word totals and
+    top terms are reductions of the counts, so the texts are never scanned again.
+
+    Args:
+        counts: The sparse matrix of counts, one row per document.
+        terms: The term of each column.
+        labels: The label of each row.
+    """
+
+    def __init__(self, counts: "sparse.csr_array", terms: np.ndarray, labels: pd.Index):
+        self.counts = counts
+        self.terms = terms
+        self.labels = labels
+
+    @classmethod
+    def from_texts(cls, texts: pd.Series) -> "DocumentTermMatrix":
+        """
+        Tokenize the texts on whitespace and count the words of each one.
+
+        Args:
+            texts: The documents, missing values count as empty documents.
+
+        Returns:
+            The matrix, with the index of texts as labels.
+        """
+        return cls.from_tokens(tokenize(texts), labels=texts.index)
+
+    @classmethod
+    def from_tokens(cls, tokens: pa.Array | pa.ChunkedArray, labels: pd.Index) -> "DocumentTermMatrix":
+        """
+        Count the words of already tokenized documents, like the shards tokenized in parallel.
+
+        The vocabularies of the chunks are combined in order, so the columns are
+        in order of first appearance however the documents were chunked.
+
+        Args:
+            tokens: The tokens of each document, see tokenize. A chunked array is
+                read chunk by chunk, in order.
+            labels: The label of each document.
+
+        Returns:
+            The matrix, with one row per document.
+        """
+        from scipy import sparse
+
+        chunks = tokens.chunks if isinstance(tokens, pa.ChunkedArray) else [tokens]
+        terms = pd.Index([], dtype=object)
+        rows, columns, start = [], [], 0
+        for chunk in chunks:
+            words = pc.list_flatten(chunk)
+            # El diccionario de cada chunk se traduce al vocabulario combinado, agregando las palabras nuevas al final
+            dictionary = pd.Index(words.dictionary.to_numpy(zero_copy_only=False), dtype=object)
+            terms = terms.append(dictionary[~dictionary.isin(terms)])
+            columns.append(terms.get_indexer(dictionary)[words.indices.to_numpy()])
+            rows.append(pc.list_parent_indices(chunk).to_numpy() + start)
+            start += len(chunk)
+
+        rows, columns = np.concatenate(rows or [[]]).astype(np.int64), np.concatenate(columns or [[]]).astype(np.int64)
+        counts = sparse.coo_array(
+            (np.ones(len(columns), dtype=np.int64), (rows, columns)),
+            shape=(start, len(terms)),
+        ).tocsr()
+        return cls(counts=counts, terms=terms.to_numpy(), labels=labels)
+
+    @property
+    def shape(self) -> tuple:
+        return self.counts.shape
+
+    @cached_property
+    def vocabulary(self) -> dict:
+        """The column of each term."""
+        return {term: i for i, term in enumerate(self.terms)}
+
+    def groupby(self, keys) -> "DocumentTermMatrix":
+        """
+        Add up the counts of the documents that share a key.
+
+        Args:
+            keys: One value per document, aligned by position (like the speaker of
+                each turn), or a list of such arrays to group by several keys
+                (speaker and week). Documents with a missing key are left out.
+
+        Returns:
+            A matrix with one row per group, labeled and sorted by key.
+        """
+        from scipy import sparse
+
+        if isinstance(keys, list):
+            keys = pd.MultiIndex.from_arrays(keys)
+        codes, uniques = pd.factorize(keys, sort=True)
+        has_key = codes >= 0
+        indicator = sparse.csr_array(
+            (np.ones(has_key.sum(), dtype=np.int64), (codes[has_key], np.flatnonzero(has_key))),
+            shape=(len(uniques), self.shape[0]),
+        )
+        return DocumentTermMatrix(counts=indicator @ self.counts, terms=self.terms, labels=pd.Index(uniques))
+
+    def merge(self, other: "DocumentTermMatrix") -> "DocumentTermMatrix":
+        """
+        Add up the counts of two matrices, like the word counts of two chunks of a corpus.
+
+        The terms of other that are new are appended after the terms of this
+        matrix, so merging chunks in order keeps the order of first appearance.
+
+        Args:
+            other: The matrix to add.
+
+        Returns:
+            A matrix over the union of the terms, with one row per label (sorted),
+            where rows with the same label are added up.
+        """
+        from scipy import sparse
+
+        # Columna de cada término de other en el vocabulario combinado, los nuevos van al final
+        columns = pd.Index(self.terms).get_indexer(other.terms)
+        new = columns < 0
+        columns[new] = len(self.terms) + np.arange(new.sum())
+        terms = np.concatenate([self.terms, other.terms[new]])
+        codes, labels = pd.factorize(self.labels.append(other.labels), sort=True)
+
+        left, right = self.counts.tocoo(), other.counts.tocoo()
+        rows = np.concatenate([codes[: self.shape[0]][left.row], codes[self.shape[0] :][right.row]])
+        counts = sparse.coo_array(
+            (np.concatenate([left.data, right.data]), (rows, np.concatenate([left.col, columns[right.col]]))),
+            shape=(len(labels), len(terms)),
+        ).tocsr()
+        return DocumentTermMatrix(counts=counts, terms=terms, labels=pd.Index(labels))
+
+    def n_words(self) -> pd.Series:
+        """
+        Count the words of each row.
+
+        Returns:
+            The number of words, indexed by label.
+        """
+        return pd.Series(self.counts.sum(axis=1), index=self.labels, name="n_words")
+
+    def term_totals(self) -> pd.Series:
+        """
+        Count each term over all the rows.
+
+        Returns:
+            The number of occurrences, indexed by term and sorted from most to least frequent.
+        """
+        return pd.Series(self.counts.sum(axis=0), index=self.terms, name="count").sort_values(ascending=False)
+
+    def _keep_terms(self, exclude: set | None, include_numbers: bool) -> np.ndarray:
+        keep = np.ones(len(self.terms), dtype=bool)
+        if exclude:
+            keep &= ~np.isin(self.terms, list(exclude))
+        if not include_numbers:
+            keep &= ~np.char.isdigit(self.terms.astype(str))
+        return keep
+
+    def top_terms(self, k: int | None = None, exclude: set | None = None, include_numbers: bool = False) -> pd.Series:
+        """
+        Get the most frequent terms of each row, as frequency dicts for word_cloud_plot.
+
+        Args:
+            k: The number of terms per row. All of them if None.
+            exclude: The terms to leave out, like stopwords.
+            include_numbers: Whether to keep the terms made only of digits.
+
+        Returns:
+            A dict {term: count} per row, from most to least frequent, indexed by label.
+        """
+        keep = self._keep_terms(exclude=exclude, include_numbers=include_numbers)
+        counts, terms = self.counts[:, np.flatnonzero(keep)], self.terms[keep]
+        counts.eliminate_zeros()
+        frequencies = []
+        for i in range(counts.shape[0]):
+            start, end = counts.indptr[i], counts.indptr[i + 1]
+            data, columns = counts.data[start:end], counts.indices[start:end]
+            # Orden estable: a igual frecuencia queda el término que apareció primero
+            order = np.lexsort((columns, -data))[:k]
+            frequencies.append(dict(zip(terms[columns[order]], data[order].tolist())))
+        return pd.Series(frequencies, index=self.labels, name="frequencies")
+
+    def ranked_terms(self, k: int | None = None, exclude: set | None = None, include_numbers: bool = False) -> pd.DataFrame:
+        """
+        Get the top terms of every row as one long table, like the scores of utils.distinctive.
+
+        Same order as top_terms, but all the rows are ranked at once.
+
+        Args:
+            k: The number of terms per row. All of them if None.
+            exclude: The terms to leave out, like stopwords.
+            include_numbers: Whether to keep the terms made only of digits.
+
+        Returns:
+            One row per label and term with the label (one column per level), the
+            rank (from 1), the term and its value, in the order of the rows and by rank.
+        """
+        keep = np.flatnonzero(self._keep_terms(exclude=exclude, include_numbers=include_numbers))
+        counts = self.counts[:, keep]
+        counts.eliminate_zeros()
+        rows = np.repeat(np.arange(counts.shape[0]), np.diff(counts.indptr))
+        # Por fila, de mayor a menor, y a igual valor el término que apareció primero
+        order = np.lexsort((counts.indices, -counts.data, rows))
+        rank = np.arange(len(order)) - counts.indptr[rows[order]]
+        if k is not None:
+            order, rank = order[rank < k], rank[rank < k]
+        # Las etiquetas sin nombre (como el index de los textos) quedan en la columna label
+        labels = self.labels[rows[order]].to_frame(index=False).rename(columns={0: "label"})
+        return labels.assign(
+            rank=rank + 1,
+            term=self.terms[keep[counts.indices[order]]],
+            value=counts.data[order],
+        )
+
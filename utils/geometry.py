@@ -0,0 +1,180 @@
+import hashlib
+import re
+from pathlib import Path
+
+import pyarrow as pa
+
+from utils.load_data import file_hash
+
+STATES_PATH = "maps/states"
+COUNTRIES_PATH = "maps/ne_110m_admin_0_countries.shp"
+CACHE_DIR = "data/cache/maps"
+
+# Estados contiguos de EE.UU., los que se dibujan en el mapa
+US_STATES_QUERY = 'iso_a2 == "US" and name not in ["Alaska", "Hawaii"]'
+
+
+def layer_files(path: str | Path) -> list:
+    """
+    List the files that make up a vector layer.
+
+    Args:
+        path: A folder with the layer (like maps/states) or one of its files
+            (like maps/ne_110m_admin_0_countries.shp).
+
+    Returns:
+        The sorted paths of the layer files.
+    """
+    path = Path(path)
+    if path.is_dir():
+        return sorted(p for p in path.iterdir() if p.is_file())
+    # Los shapefiles son varios archivos con el mismo nombre y distinta extensión
+    return sorted(path.parent.glob(f"{path.stem}.*"))
+
+
+def layer_key(path: str | Path, query: str | None = None) -> str:
+    """
+    Compute the cache key of a layer, from the contents of its files and the filter.
+
+    Args:
+        path: The layer folder or file.
+        query: The pandas query used to filter the layer.
+
+    Returns:
+        The hex digest identifying this version of the filtered layer.
+    """
+    digest = hashlib.sha256(repr(query).encode())
+    for file in layer_files(path):
+        digest.update(file.name.encode())
+        digest.update(file_hash(file).encode())
+    return digest.hexdigest()
+
+
+def parse_layer(path: str | Path, query: str | None = None) -> "gpd.GeoDataFrame":
+    """
+    Read a layer with geopandas and add the label points and bounding boxes.
+
+    Args:
+        path: The layer folder or file.
+        query: The pandas query used to filter the layer. All rows if None.
+
+    Returns:
+        The filtered layer with the label_x, label_y, minx, miny, maxx and maxy columns.
+    """
+    import geopandas as gpd
+    import shapely
+
+    gdf = gpd.read_file(path)
+    if query is not None:
+        gdf = gdf.query(query)
+    # Centroides vectorizados con shapely, los mismos que se calculaban fila por fila
+    centroids = shapely.centroid(gdf.geometry.values)
+    gdf["label_x"] = shapely.get_x(centroids)
+    gdf["label_y"] = shapely.get_y(centroids)
+    return gdf.join(gdf.bounds)
+
+
+def write_layer(gdf: "gpd.GeoDataFrame", path: str | Path):
+    """
+    Write a layer to Parquet, with the geometries as WKB and the CRS as a short string.
+
+    Args:
+        gdf: The layer to write.
+        path: The Parquet file.
+    """
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(gdf.to_wkb())
+    # Guardo el CRS como "EPSG:4326": reconstruirlo desde el PROJJSON de GeoParquet lleva decenas de ms
+    metadata = {**table.schema.metadata, b"crs": gdf.crs.to_string().encode()}
+    pq.write_table(table.replace_schema_metadata(metadata), path)
+
+
+def read_layer(path: str | Path, columns: list | None = None) -> "gpd.GeoDataFrame":
+    """
+    Read a layer written by write_layer.
+
+    Args:
+        path: The Parquet file.
+        columns: The columns to read, the geometry is always included. All of them if None.
+
+    Returns:
+        The layer with the requested columns.
+    """
+    # geopandas y shapely se importan recién al leer una capa, importar el módulo no los carga
+    import geopandas as gpd
+    import pyarrow.parquet as pq
+    import shapely
+
+    if columns is not None and "geometry" not in columns:
+        columns = [*columns, "geometry"]
+    table = pq.read_table(path, columns=columns, use_pandas_metadata=True)
+    df = table.to_pandas()
+    geometry = shapely.from_wkb(df.pop("geometry").to_numpy())
+    return gpd.GeoDataFrame(df, geometry=geometry, crs=table.schema.metadata[b"crs"].decode())
+
+
+def load_layer(
+    path: str | Path,
+    query: str | None = None,
+    columns: list | None = None,
+    cache_dir: str | Path = CACHE_DIR,
+) -> "gpd.GeoDataFrame":
+    """
+    Load a filtered layer from a Parquet cache, parsing the shapefile only once.
+
+    The cache is keyed by the hash of the layer files and the query, so changing
+    anything under maps/ rebuilds it on the next load. Only the requested columns
+    are read from the cache.
+
+    Args:
+        path: The layer folder or file.
+        query: The pandas query used to filter the layer. All rows if None.
+        columns: The columns to load, the geometry is always included. All of them if None.
+        cache_dir: The folder where the caches are stored.
+
+    Returns:
+        The filtered layer with precomputed label points and bounding boxes.
+    """
+    # Cada filtro tiene su propio caché, así cargar otra vista de la capa no borra las demás
+    name = f"{Path(path).stem}-{hashlib.sha256(repr(query).encode()).hexdigest()[:8]}"
+    cache = Path(cache_dir) / f"{name}-{layer_key(path=path, query=query)[:16]}.parquet"
+    if not cache.exists():
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        # Se escribe en un temporal y se renombra, así una escritura cortada no deja un caché truncado
+        partial = cache.with_name(f"{cache.name}.tmp")
+        write_layer(gdf=parse_layer(path=path, query=query), path=partial)
+        partial.replace(cache)
+        stale_pattern = re.compile(rf"{re.escape(name)}-[0-9a-f]{{16}}\.parquet")
+        for stale in cache.parent.glob(f"{name}-*.parquet"):
+            if stale != cache and stale_pattern.fullmatch(stale.name):
+                stale.unlink()
+    return read_layer(path=cache, columns=columns)
+
+
+def load_us_states(columns: list | None = None, cache_dir: str | Path = CACHE_DIR) -> "gpd.GeoDataFrame":
+    """
+    Load the contiguous US states from the Natural Earth states layer.
+
+    Args:
+        columns: The columns to load, the geometry is always included. All of them if None.
+        cache_dir: The folder where the caches are stored.
+
+    Returns:
+        The states layer without Alaska and Hawaii.
+    """
+    return load_layer(path=STATES_PATH, query=US_STATES_QUERY, columns=columns, cache_dir=cache_dir)
+
+
+def load_countries(columns: list | None = None, cache_dir: str | Path = CACHE_DIR) -> "gpd.GeoDataFrame":
+    """
+    Load the Natural Earth countries layer.
+
+    Args:
+        columns: The columns to load, the geometry is always included. All of them if None.
+        cache_dir: The folder where the caches are stored.
+
+    Returns:
+        The countries layer.
+    """
+    return load_layer(path=COUNTRIES_PATH, columns=columns, cache_dir=cache_dir)
@@ -0,0 +1,478 @@
+# Ingesta incremental: los agregados de tarea_1.py se guardan en disco y se actualizan solo con los
+# discursos nuevos (filas agregadas al final del CSV o archivos nuevos en una carpeta)
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python utils/incremental.py [--drop-dir data/nuevos] [--watch 10] [--check] [--render]
+import argparse
+import csv
+import hashlib
+import io
+import json
+import pickle
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from utils.constants import MENTIONS, POLITICIANS, SPEAKER_NAMES
+from utils.dtm import DocumentTermMatrix
+from utils.load_data import DATA_PATH, file_hash, read_speeches
+from utils.mentions import MentionCounter
+from utils.speakers import SpeakerRegistry
+from utils.streaming import SpeechAggregates, _add_counts, clean_chunks, normalize_chunks, segment_chunks
+
+INCREMENTAL_DIR = "data/cache/incremental"
+STATE_VERSION = "2"
+
+# Bytes del principio y del final de la parte ya leída del CSV que se guardan hasheados para detectar si se editó
+EDGE_BYTES = 1 << 16
+
+# Los discursos de cada archivo de la carpeta tienen su propio rango de index (el del CSV empieza en 0)
+FILE_ID_SHIFT = 40
+
+
+def _edge_hashes(path: str, end: int) -> tuple:
+    # Los hashes del principio y del final de los primeros end bytes del archivo
+    with open(path, "rb") as f:
+        head = f.read(min(end, EDGE_BYTES))
+        f.seek(max(0, end - EDGE_BYTES))
+        tail = f.read(end - max(0, end - EDGE_BYTES))
+    return hashlib.sha256(head).hexdigest(), hashlib.sha256(tail).hexdigest()
+
+
+def _complete_records(data: bytes, n_fields: int | None = None) -> int:
+    """
+    Find where the last complete record of a piece of CSV ends.
+
+    The text of a speech can have line breaks inside its quoted field, so a line
+    break only ends a record when the quotes before it are balanced (an escaped
+    quote "" counts twice and does not change that). The bytes after the last
+    line break are a complete record too if they are the end of the file, their
+    quotes are balanced and they parse as one row with all the fields.
+
+    Args:
+        data: The bytes of the CSV, starting at the beginning of a record.
+        n_fields: The number of columns, if data reaches the end of the file.
+            None to only count records that end in a line break.
+
+    Returns:
+        The number of bytes up to the end of the last complete record, 0 if there is none.
+    """
+    # Se recorre desde el final contando las comillas que quedan después de cada salto de línea
+    quotes = data.count(b'"')
+    end = len(data)
+    complete = 0
+    while (newline := data.rfind(b"\n", 0, end)) >= 0:
+        quotes -= data.count(b'"', newline, end)
+        if quotes % 2 == 0:
+            complete = newline + 1
+            break
+        end = newline
+
+    # Una última fila sin salto de línea (la escribió una herramienta que no lo agrega al final)
+    tail = data[complete:]
+    if n_fields is not None and tail.strip() and tail.count(b'"') % 2 == 0:
+        rows = list(csv.reader(io.StringIO(tail.decode("utf-8", errors="replace"), newline="")))
+        if len(rows) == 1 and len(rows[0]) == n_fields:
+            return len(data)
+    return complete
+
+
+def _top_speakers(n_speeches: pd.Series, n: int) -> list:
+    # A igual cantidad de discursos, orden alfabético, así no depende del orden en que llegaron
+    return list(n_speeches.sort_index().sort_values(ascending=False, kind="stable").head(n).index)
+
+
+def _equal(left, right) -> bool:
+    # Igualdad de los conteos sin importar el orden de filas y columnas ni los nombres de los ejes
+    if isinstance(left, DocumentTermMatrix):
+        left, right = (
+            pd.DataFrame(dtm.counts.toarray(), index=dtm.labels, columns=dtm.terms) for dtm in (left, right)
+        )
+    if isinstance(left, dict):
+        return left.keys() == right.keys() and all(_equal(left[key], right[key]) for key in left)
+    try:
+        if isinstance(left, pd.DataFrame):
+            pd.testing.assert_frame_equal(
+                left,
+                right,
+                check_like=True,
+                check_names=False,
+                check_dtype=False,
+                check_index_type=False,
+                check_column_type=False,
+                check_categorical=False,
+            )
+        else:
+            pd.testing.assert_series_equal(
+                left.sort_index(), right.sort_index(), check_names=False, check_dtype=False, check_index_type=False
+            )
+    except AssertionError:
+        return False
+    return True
+
+
+class IncrementalAggregates:
+    """
+    The aggregates of tarea_1.py kept on disk and updated with only the new speeches.
+
+    The speeches come from a CSV that only grows at the end and, optionally,
+    from the CSV files dropped in a folder. The state remembers how many bytes
+    and rows of the CSV and which files (with their hashes) were ingested, so
+    update reads, segments, cleans and counts only the new speeches and merges
+    their SpeechAggregates (speeches per week, words and mentions of the top
+    speakers, speeches per state and news channel) into the stored ones: the
+    cost is proportional to the new speeches. When something already ingested
+    changes (the CSV was edited instead of appended, or a dropped file was
+    replaced) or the new speeches change the top speakers, whose words and
+    mentions are the ones counted, everything is recomputed instead.
+
+    An edit of the CSV is detected by its size and by hashing the first and the
+    last 64 KiB already read, not the whole file, so that each update does not
+    read it all again: an edit in the middle that keeps the size is not
+    noticed. After editing old speeches in place, use rebuild (--rebuild), and
+    check (--check) to compare with a full recompute.
+
+    Args:
+        path: The CSV with the speeches.
+        drop_dir: A folder with more CSV files of speeches, with the same columns.
+            None to use only path.
+        n: The number of top speakers.
+        chunksize: The number of speeches processed at a time.
+        mode: The counting mode of the mentions.
+        unicode: Passed to normalize_text.
+    """
+
+    def __init__(
+        self,
+        path: str = DATA_PATH,
+        drop_dir: str | None = None,
+        n: int = 5,
+        chunksize: int = 1000,
+        mode: str = "longest",
+        unicode: bool = True,
+    ):
+        self.path = str(path)
+        self.drop_dir = None if drop_dir is None else str(drop_dir)
+        self.n = n
+        self.chunksize = chunksize
+        self.mode = mode
+        self.unicode = unicode
+        self.reset()
+
+    def reset(self):
+        """
+        Forget everything that was ingested.
+        """
+        self.header = None
+        self.csv_bytes = 0
+        self.csv_rows = 0
+        self.csv_edges = None
+        self.files = {}
+        self.n_speeches = pd.Series(dtype="int64")
+        self.top_speakers = []
+        self.aggregates = None
+
+    @property
+    def ingested(self) -> int:
+        return self.csv_rows + sum(entry["rows"] for entry in self.files.values())
+
+    @property
+    def params(self) -> dict:
+        return {"path": self.path, "drop_dir": self.drop_dir, "n": self.n, "mode": self.mode, "unicode": self.unicode}
+
+    def _changed(self) -> bool:
+        # Si cambió algo que ya se leyó no alcanza con sumar lo nuevo
+        if self.header is not None and (
+            Path(self.path).stat().st_size < self.csv_bytes or _edge_hashes(self.path, self.csv_bytes) != self.csv_edges
+        ):
+            return True
+        return any(not Path(name).exists() or file_hash(name) != entry["hash"] for name, entry in self.files.items())
+
+    def _pending(self, csv_end: int | None = None, files: list | None = None, record_end: bool = True) -> list:
+        # Las partes sin leer: los bytes nuevos del CSV hasta el final de la última fila completa (una fila a
+        # medio escribir queda para la próxima) y los archivos nuevos de la carpeta
+        sources = []
+        with open(self.path, "rb") as f:
+            header = self.header if self.header is not None else f.readline()
+            start = max(self.csv_bytes, len(header))
+            f.seek(start)
+            data = f.read() if csv_end is None else f.read(max(0, csv_end - start))
+            at_end = not f.read(1)
+        # Si csv_end (o el final del archivo) es donde termina una fila, la última cuenta aunque no tenga salto
+        # de línea; si no (record_end=False), csv_end puede cortar una fila y solo cuentan las terminadas
+        n_fields = len(next(csv.reader([header.decode("utf-8", errors="replace")]))) if record_end or at_end else None
+        data = data[: _complete_records(data, n_fields=n_fields)]
+        if data:
+            sources.append({"name": self.path, "header": header, "data": data, "first_id": self.csv_rows})
+        if files is None:
+            drop = [] if self.drop_dir is None else sorted(Path(self.drop_dir).glob("*.csv"))
+            files = [str(name) for name in drop if str(name) not in self.files]
+        for number, name in enumerate(files, start=len(self.files) + 1):
+            sources.append({"name": name, "hash": file_hash(name), "first_id": number << FILE_ID_SHIFT})
+        return sources
+
+    def _chunks(self, source: dict, columns: list | None = None):
+        # Los discursos de una parte por chunks, con un index que no se repite entre partes
+        buffer = io.BytesIO(source["header"] + source["data"]) if "data" in source else source["name"]
+        for chunk in read_speeches(buffer, chunksize=self.chunksize, columns=columns):
+            chunk.index = chunk.index + source["first_id"]
+            yield chunk
+
+    def _ingest(self, sources: list):
+        # Primera pasada solo por la columna speaker: si cambian los oradores principales hay que recalcular
+        rows = {}
+        n_speeches = self.n_speeches
+        for source in sources:
+            rows[source["name"]] = 0
+            for chunk in self._chunks(source, columns=["speaker"]):
+                rows[source["name"]] += len(chunk)
+                n_speeches = _add_counts(n_speeches, chunk.groupby("speaker").size())
+        top_speakers = _top_speakers(n_speeches, self.n)
+        if self.aggregates is not None and set(top_speakers) != set(self.top_speakers):
+            return False
+
+        # Los mismos oradores pueden cambiar de orden entre sí
+        self.top_speakers = top_speakers
+        registry = SpeakerRegistry(canonical=POLITICIANS, aliases=SPEAKER_NAMES)
+        counter = MentionCounter(aliases=MENTIONS)
+        for source in sources:
+            chunks = clean_chunks(
+                normalize_chunks(segment_chunks(self._chunks(source)), registry), self.top_speakers, unicode=self.unicode
+            )
+            for chunk in chunks:
+                partial = SpeechAggregates.from_chunk(
+                    *chunk, top_speakers=self.top_speakers, politicians=POLITICIANS, counter=counter, mode=self.mode
+                )
+                self.aggregates = partial if self.aggregates is None else self.aggregates.merge(partial)
+
+            # Lo ingerido se registra recién después de sumar sus conteos
+            if "data" in source:
+                self.header = source["header"]
+                self.csv_bytes = max(self.csv_bytes, len(source["header"])) + len(source["data"])
+                self.csv_rows += rows[source["name"]]
+                self.csv_edges = _edge_hashes(self.path, self.csv_bytes)
+            else:
+                self.files[source["name"]] = {
+                    "hash": source["hash"],
+                    "id": source["first_id"] >> FILE_ID_SHIFT,
+                    "rows": rows[source["name"]],
+                }
+        self.n_speeches = n_speeches.sort_values(ascending=False)
+        return True
+
+    def update(self, csv_end: int | None = None) -> dict:
+        """
+        Add the speeches that arrived since the last update.
+
+        Args:
+            csv_end: Read the CSV only up to this byte, as if the rest had not
+                been written yet: a record cut there is left for the next
+                update. None to read the whole file.
+
+        Returns:
+            What was done: the speeches (rows) read, only the new ones unless
+            everything had to be recomputed (rebuilt), and the seconds it took.
+        """
+        start = time.perf_counter()
+        before = self.ingested
+        rebuilt = self._changed()
+        record_end = csv_end is None
+        if rebuilt or not self._ingest(self._pending(csv_end=csv_end, record_end=record_end)):
+            rebuilt = True
+            self.reset()
+            self._ingest(self._pending(csv_end=csv_end, record_end=record_end))
+        return {
+            "speeches": self.ingested - (0 if rebuilt else before),
+            "rebuilt": rebuilt,
+            "seconds": time.perf_counter() - start,
+        }
+
+    def rebuild(self) -> dict:
+        """
+        Recompute everything from all the speeches.
+
+        Returns:
+            What was done, see update.
+        """
+        start = time.perf_counter()
+        self.reset()
+        self._ingest(self._pending())
+        return {"speeches": self.ingested, "rebuilt": True, "seconds": time.perf_counter() - start}
+
+    def check(self) -> dict:
+        """
+        Compare the aggregates with a full recompute of the same speeches.
+
+        Only what was already ingested is recomputed (the same bytes of the CSV
+        and the same files), so new speeches that were not ingested yet do not
+        count as differences.
+
+        Returns:
+            A dict with whether each aggregate matches.
+        """
+        fresh = IncrementalAggregates(chunksize=self.chunksize, **self.params)
+        # Todo junto, en el orden en que se ingirió
+        files = sorted(self.files, key=lambda name: self.files[name]["id"])
+        fresh._ingest(fresh._pending(csv_end=self.csv_bytes, files=files))
+        result = {
+            "n_speeches": _equal(self.n_speeches, fresh.n_speeches),
+            "top_speakers": set(self.top_speakers) == set(fresh.top_speakers),
+        }
+        for name in ("weekly", "weekly_others", "words", "mentions", "locations"):
+            result[name] = (self.aggregates is None and fresh.aggregates is None) or (
+                self.aggregates is not None
+                and fresh.aggregates is not None
+                and _equal(getattr(self.aggregates, name), getattr(fresh.aggregates, name))
+            )
+        return result
+
+    def outputs(self, stopwords: list, max_words: int = 100) -> dict:
+        """
+        Get what the figures need, like the streaming stages of utils.stages.
+
+        Args:
+            stopwords: The extra stopwords of the word clouds.
+            max_words: The number of words per speaker in the word clouds.
+
+        Returns:
+            A dict with the aggregate, mentions and location outputs.
+        """
+        from utils import stages
+
+        return {
+            "aggregate": stages.streamed_aggregate(
+                n_speeches=self.n_speeches, stream=self.aggregates, stopwords=stopwords, max_words=max_words
+            ),
+            "mentions": stages.streamed_mentions(stream=self.aggregates).loc[self.top_speakers, self.top_speakers],
+            "location": stages.streamed_location(stream=self.aggregates),
+        }
+
+    def save(self, directory: str | Path = INCREMENTAL_DIR):
+        """
+        Store the state in a folder, replacing the previous one only once it is complete.
+
+        Args:
+            directory: The folder.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        partial = directory / "state.pkl.tmp"
+        with open(partial, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        partial.replace(directory / "state.pkl")
+        meta = {
+            "version": STATE_VERSION,
+            **self.params,
+            "csv_bytes": self.csv_bytes,
+            "csv_rows": self.csv_rows,
+            "files": self.files,
+            "speeches": self.ingested,
+            "top_speakers": self.top_speakers,
+        }
+        (directory / "meta.json").write_text(json.dumps(meta, indent=2, ensure_ascii=False))
+
+    @classmethod
+    def load(cls, directory: str | Path = INCREMENTAL_DIR) -> "IncrementalAggregates | None":
+        """
+        Load a state stored with save.
+
+        Args:
+            directory: The folder.
+
+        Returns:
+            The state, or None if there is none or it is from another version.
+        """
+        directory = Path(directory)
+        try:
+            meta = json.loads((directory / "meta.json").read_text())
+            if meta["version"] != STATE_VERSION:
+                return None
+            with open(directory / "state.pkl", "rb") as f:
+                return pickle.load(f)
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def load_or_create(directory: str | Path = INCREMENTAL_DIR, **kwargs) -> IncrementalAggregates:
+    """
+    Load the stored state if it was created with the same parameters, or start an empty one.
+
+    Args:
+        directory: The folder of the state.
+        **kwargs: The arguments of IncrementalAggregates.
+
+    Returns:
+        The state, not updated yet.
+    """
+    state = IncrementalAggregates(**kwargs)
+    stored = IncrementalAggregates.load(directory)
+    if stored is not None and stored.params == state.params:
+        stored.chunksize = state.chunksize
+        return stored
+    return state
+
+
+def render(state: IncrementalAggregates, workers: int | None = None) -> list:
+    # Los mismos gráficos que el pipeline en modo streaming
+    from utils import stages
+    from utils.constants import (
+        CANDIDATE_COLORS,
+        CANDIDATE_ORDER,
+        CANDIDATE_ORDER_COLORS,
+        EXTRA_STOPWORDS,
+        OTHERS_COLOR,
+        RC_PARAMS,
+    )
+
+    return stages.render(
+        **state.outputs(stopwords=EXTRA_STOPWORDS),
+        rc_params=RC_PARAMS,
+        candidate_order=CANDIDATE_ORDER,
+        candidate_order_colors=CANDIDATE_ORDER_COLORS,
+        others_color=OTHERS_COLOR,
+        candidate_colors=CANDIDATE_COLORS,
+        stopwords=EXTRA_STOPWORDS,
+        workers=workers,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default=DATA_PATH)
+    parser.add_argument("--drop-dir", default=None, help="Carpeta con más CSV de discursos")
+    parser.add_argument("--state-dir", default=INCREMENTAL_DIR)
+    parser.add_argument("--chunksize", type=int, default=1000)
+    parser.add_argument("--rebuild", action="store_true", help="Recalcular todo desde cero")
+    parser.add_argument("--check", action="store_true", help="Comparar con un recálculo completo")
+    parser.add_argument("--render", action="store_true", help="Generar las figuras cuando hay discursos nuevos")
+    parser.add_argument("--watch", type=float, default=None, help="Seguir buscando discursos nuevos cada tantos segundos")
+    args = parser.parse_args()
+
+    state = load_or_create(directory=args.state_dir, path=args.path, drop_dir=args.drop_dir, chunksize=args.chunksize)
+    while True:
+        try:
+            report = state.rebuild() if args.rebuild else state.update()
+        except (OSError, ValueError) as error:
+            # Un archivo a medio copiar o ilegible no corta --watch: se vuelve al último estado guardado
+            if args.watch is None:
+                raise
+            print(f"Error al actualizar: {error!r}")
+            state = load_or_create(
+                directory=args.state_dir, path=args.path, drop_dir=args.drop_dir, chunksize=args.chunksize
+            )
+            time.sleep(args.watch)
+            continue
+        args.rebuild = False
+        if report["speeches"] or report["rebuilt"]:
+            state.save(args.state_dir)
+            action = "Recalculado" if report["rebuilt"] else "Actualizado"
+            print(f"{action}: {report['speeches']} discursos en {report['seconds']:.2f} s")
+            if args.render:
+                render(state)
+        if args.check:
+            print(json.dumps(state.check(), indent=2))
+        if args.watch is None:
+            break
+        time.sleep(args.watch)
@@ -0,0 +1,423 @@
+# Índice invertido posicional sobre las intervenciones, guardado en disco
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python utils/inverted_index.py "joe biden" [--near "china" --window 10] [--speaker "Donald Trump"]
+#       [--party "Partido Republicano"] [--since 2020-09-01] [--until 2020-10-31] [--context 8] [--limit 20]
+import argparse
+import json
+import time
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.compute as pc
+from scipy import sparse
+
+from utils.clean_data import PUNCTUATION, UNICODE_APOSTROPHES, UNICODE_SPACES, normalize_text
+from utils.constants import PARTIES, POLITICIANS, SPEAKER_NAMES
+from utils.dtm import tokenize
+from utils.load_data import CACHE_DIR, DATA_PATH, file_hash, load_speeches
+from utils.segmentation import segment_turns
+from utils.speakers import SpeakerRegistry
+
+INDEX_DIR = f"{CACHE_DIR}/index"
+
+# Cambiar si cambia el formato de los archivos o cómo se construye el índice
+INDEX_VERSION = "1"
+
+# Mismo reemplazo que normalize_text, para que las consultas se tokenicen igual que los textos
+_QUERY_TABLE = str.maketrans(
+    PUNCTUATION + UNICODE_SPACES + UNICODE_APOSTROPHES,
+    " " * (len(PUNCTUATION) + len(UNICODE_SPACES)) + "'" * len(UNICODE_APOSTROPHES),
+)
+
+_ARRAYS = ["term_offsets", "postings", "tokens", "doc_offsets"]
+
+
+def query_tokens(query: str) -> list:
+    """
+    Normalize a query like normalize_text does with the texts and split it into words.
+
+    Args:
+        query: A word or a phrase.
+
+    Returns:
+        The words of the query.
+    """
+    return query.lower().replace("\\n", " ").replace("\\r", " ").translate(_QUERY_TABLE).split()
+
+
+def _keys(docs: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    # (turno, posición) en un solo int64 que ordena igual que el par
+    return (docs.astype(np.int64) << 32) | positions.astype(np.int64)
+
+
+def _split(keys: np.ndarray) -> tuple:
+    return (keys >> 32).astype(np.int32), (keys & 0xFFFFFFFF).astype(np.int32)
+
+
+def _contains(sorted_keys: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    idx = np.searchsorted(sorted_keys, keys)
+    found = idx < len(sorted_keys)
+    found[found] = sorted_keys[idx[found]] == keys[found]
+    return found
+
+
+class InvertedIndex:
+    """
+    Positional inverted index over the turns, with the metadata to filter them.
+
+    For every term the index keeps the turns and positions where it appears,
+    packed in one sorted int64 per occurrence, so phrases are intersections of
+    shifted positions and proximity is a binary search, without scanning any
+    text. The token stream of every turn
+    is kept too, so keyword-in-context snippets are rebuilt from the token ids.
+    The texts are indexed after normalize_text, so queries are normalized the
+    same way (see query_tokens).
+
+    Args:
+        terms: The term of each term id.
+        term_offsets: Where the postings of each term start and end, len(terms) + 1 values.
+        postings: The turn and position of each occurrence, as (turn << 32) | position,
+            grouped by term and sorted.
+        tokens: The term ids of every turn, one after the other.
+        doc_offsets: Where the tokens of each turn start and end, one value per turn plus one.
+        docs: The speaker, party and date of each turn, indexed by speech.
+    """
+
+    def __init__(
+        self,
+        terms: np.ndarray,
+        term_offsets: np.ndarray,
+        postings: np.ndarray,
+        tokens: np.ndarray,
+        doc_offsets: np.ndarray,
+        docs: pd.DataFrame,
+    ):
+        self.terms = terms
+        self.term_offsets = term_offsets
+        self.postings = postings
+        self.tokens = tokens
+        self.doc_offsets = doc_offsets
+        self.docs = docs
+
+    @classmethod
+    def from_turns(
+        cls, turns: pd.DataFrame, parties: dict = PARTIES, text_column: str = "text", unicode: bool = True
+    ) -> "InvertedIndex":
+        """
+        Normalize and tokenize the turns and index the position of every word.
+
+        Args:
+            turns: One turn per row, with its speaker, date and text, indexed by speech.
+            parties: The party of each speaker; the rest have no party.
+            text_column: The column with the text of the turns.
+            unicode: Passed to normalize_text.
+
+        Returns:
+            The index.
+        """
+        tokens = tokenize(normalize_text(df=turns, column_name=text_column, unicode=unicode))
+        words = pc.list_flatten(tokens)
+        ids = words.indices.to_numpy().astype(np.int32)
+        terms = words.dictionary.to_numpy(zero_copy_only=False)
+        doc_offsets = tokens.offsets.to_numpy()
+        doc = pc.list_parent_indices(tokens).to_numpy().astype(np.int32)
+        position = (np.arange(len(ids)) - doc_offsets[doc]).astype(np.int32)
+
+        # Una fila por token y una columna por término: pasar a CSC agrupa por término con un
+        # counting sort estable, así dentro de cada término quedan ordenados por (turno, posición)
+        by_term = sparse.csr_array(
+            (_keys(doc, position), ids, np.arange(len(ids) + 1)), shape=(len(ids), len(terms))
+        ).tocsc()
+
+        docs = turns[["speaker", "date"]].copy()
+        docs["speaker"] = docs["speaker"].astype("str")
+        docs["party"] = docs["speaker"].map(parties)
+        return cls(
+            terms=terms,
+            term_offsets=by_term.indptr.astype(np.int64),
+            postings=by_term.data,
+            tokens=ids,
+            doc_offsets=doc_offsets,
+            docs=docs,
+        )
+
+    def save(self, directory: str | Path, source: str | None = None):
+        """
+        Write the index to a folder: one .npy per array, the terms and the turns metadata.
+
+        Args:
+            directory: The folder, created if it does not exist.
+            source: The hash of the corpus the index was built from, see load_or_build.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(directory / f"{name}.npy", getattr(self, name))
+        # Los términos no tienen espacios (se separaron por espacios), así que van uno por línea
+        (directory / "terms.txt").write_text("\n".join(self.terms), encoding="utf-8")
+        self.docs.to_parquet(directory / "docs.parquet")
+        (directory / "meta.json").write_text(json.dumps({"version": INDEX_VERSION, "source": source}))
+
+    @classmethod
+    def load(cls, directory: str | Path) -> "InvertedIndex":
+        """
+        Read an index written by save. The arrays are memory-mapped, not read.
+
+        Args:
+            directory: The folder of the index.
+
+        Returns:
+            The index.
+        """
+        directory = Path(directory)
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in _ARRAYS}
+        text = (directory / "terms.txt").read_text(encoding="utf-8")
+        terms = np.array(text.split("\n") if text else [], dtype=object)
+        return cls(terms=terms, docs=pd.read_parquet(directory / "docs.parquet"), **arrays)
+
+    @cached_property
+    def vocabulary(self) -> dict:
+        """The id of each term."""
+        return {term: i for i, term in enumerate(self.terms)}
+
+    def lookup(self, term: str) -> np.ndarray:
+        """
+        Get the occurrences of a term.
+
+        Args:
+            term: The term, already normalized.
+
+        Returns:
+            The (turn << 32) | position of each occurrence, sorted.
+        """
+        i = self.vocabulary.get(term)
+        if i is None:
+            return np.empty(0, dtype=np.int64)
+        return np.asarray(self.postings[self.term_offsets[i] : self.term_offsets[i + 1]])
+
+    def phrase(self, query: str) -> tuple:
+        """
+        Find the occurrences of a word or of a phrase (consecutive words).
+
+        Args:
+            query: The word or phrase, see query_tokens.
+
+        Returns:
+            The turn, start and end positions of each occurrence, sorted.
+        """
+        words = query_tokens(query)
+        if not words:
+            raise ValueError(f"Empty query {query!r}")
+        postings = [self.lookup(word) for word in words]
+        # Se parte de la palabra menos frecuente y se buscan las demás corridas a su posición
+        pivot = min(range(len(words)), key=lambda i: len(postings[i]))
+        keys = postings[pivot] - pivot
+        for offset, other in enumerate(postings):
+            if offset != pivot:
+                keys = keys[_contains(other, keys + offset)]
+        docs, starts = _split(keys)
+        return docs, starts, starts + len(words)
+
+    def near(self, query: str, other: str, window: int = 10) -> tuple:
+        """
+        Find the occurrences of query with an occurrence of other close by, before or after.
+
+        Args:
+            query: The word or phrase to find.
+            other: The word or phrase that has to be near.
+            window: The maximum distance, in words, between the starts of both.
+
+        Returns:
+            The turn, start and end positions of the span that covers both
+            (with the closest occurrence of other), sorted by turn and position of query.
+        """
+        docs, starts, ends = self.phrase(query)
+        other_docs, other_starts, other_ends = self.phrase(other)
+        if len(other_docs) == 0:
+            return docs[:0], starts[:0], ends[:0]
+        keys, other_keys = _keys(docs, starts), _keys(other_docs, other_starts)
+        # La ocurrencia de other inmediatamente antes y después de cada una de query (en el mismo turno si está cerca)
+        last = len(other_keys) - 1
+        left = np.searchsorted(other_keys, keys, side="left")
+        after = np.searchsorted(other_keys, keys, side="right")
+        # Una de other que empieza en la misma palabra está a distancia 0 ("joe biden" y "joe"), salvo que sea
+        # la misma ocurrencia (query igual a other): esa no cuenta
+        same_start = after > left
+        same = same_start & (other_ends[left.clip(0, last)] == ends)
+        before = np.where(same_start & ~same, left, left - 1)
+        far = np.iinfo(np.int64).max
+        distance_before = np.where(before >= 0, keys - other_keys[before.clip(0, last)], far)
+        distance_after = np.where(after <= last, other_keys[after.clip(0, last)] - keys, far)
+        closest = np.where(distance_before <= distance_after, before, after)
+        found = np.minimum(distance_before, distance_after) <= window
+        closest = closest[found]
+        return (
+            docs[found],
+            np.minimum(starts[found], other_starts[closest]),
+            np.maximum(ends[found], other_ends[closest]),
+        )
+
+    def filter(
+        self,
+        speaker: str | list | None = None,
+        party: str | list | None = None,
+        since: str | None = None,
+        until: str | None = None,
+    ) -> np.ndarray:
+        """
+        Select the turns by speaker, party and date.
+
+        Args:
+            speaker: A speaker or a list of speakers. Any if None.
+            party: A party or a list of parties. Any if None.
+            since: The first date, inclusive. No limit if None.
+            until: The last date, inclusive. No limit if None.
+
+        Returns:
+            A boolean mask over the turns.
+        """
+        mask = np.ones(len(self.docs), dtype=bool)
+        if speaker is not None:
+            mask &= self.docs["speaker"].isin([speaker] if isinstance(speaker, str) else speaker).to_numpy()
+        if party is not None:
+            mask &= self.docs["party"].isin([party] if isinstance(party, str) else party).to_numpy()
+        if since is not None:
+            mask &= (self.docs["date"] >= pd.Timestamp(since)).to_numpy()
+        if until is not None:
+            mask &= (self.docs["date"] <= pd.Timestamp(until)).to_numpy()
+        return mask
+
+    def search(
+        self,
+        query: str,
+        near: str | None = None,
+        window: int = 10,
+        speaker: str | list | None = None,
+        party: str | list | None = None,
+        since: str | None = None,
+        until: str | None = None,
+    ) -> pd.DataFrame:
+        """
+        Find a word, a phrase or two of them close to each other, in the turns that pass the filters.
+
+        Args:
+            query: The word or phrase to find.
+            near: A word or phrase that has to be within window words of query. Not required if None.
+            window: See near.
+            speaker: See filter.
+            party: See filter.
+            since: See filter.
+            until: See filter.
+
+        Returns:
+            One row per occurrence with the turn (its position in the index), the
+            start and end word positions and the speaker, party and date of the
+            turn, indexed by speech.
+        """
+        docs, starts, ends = self.phrase(query) if near is None else self.near(query, near, window=window)
+        keep = self.filter(speaker=speaker, party=party, since=since, until=until)[docs]
+        docs, starts, ends = docs[keep], starts[keep], ends[keep]
+        matches = self.docs.iloc[docs].copy()
+        matches.insert(0, "turn", docs)
+        matches.insert(1, "start", starts)
+        matches.insert(2, "end", ends)
+        return matches
+
+    def kwic(self, matches: pd.DataFrame, context: int = 8) -> pd.DataFrame:
+        """
+        Build the keyword-in-context snippets of the matches of search, from the stored tokens.
+
+        Args:
+            matches: The result of search (or some of its rows).
+            context: The number of words to show on each side.
+
+        Returns:
+            The matches with the left, match and right text of each one.
+        """
+        left, match, right = [], [], []
+        for turn, start, end in zip(matches["turn"], matches["start"], matches["end"]):
+            first, last = self.doc_offsets[turn], self.doc_offsets[turn + 1]
+            words = self.terms[self.tokens[first:last]]
+            left.append(" ".join(words[max(start - context, 0) : start]))
+            match.append(" ".join(words[start:end]))
+            right.append(" ".join(words[end : end + context]))
+        return matches.assign(left=left, match=match, right=right)
+
+
+def corpus_turns(path: str | Path = DATA_PATH) -> pd.DataFrame:
+    """
+    Load the corpus as the turns the index is built from, with canonical speakers.
+
+    Args:
+        path: The CSV with the speeches.
+
+    Returns:
+        One turn per row with its speaker, text and date, indexed by speech.
+    """
+    df = load_speeches(path=path, columns=["text", "date"])
+    turns = segment_turns(df).drop(columns="turn_index").join(df[["date"]], on="speech_id").set_index("speech_id")
+    turns["speaker"] = SpeakerRegistry(canonical=POLITICIANS, aliases=SPEAKER_NAMES).canonicalize(turns["speaker"])
+    return turns
+
+
+def load_or_build(path: str | Path = DATA_PATH, directory: str | Path = INDEX_DIR) -> InvertedIndex:
+    """
+    Load the index of a corpus, building and saving it first if it is missing or out of date.
+
+    Args:
+        path: The CSV with the speeches.
+        directory: The folder of the index.
+
+    Returns:
+        The index.
+    """
+    source = file_hash(path)
+    meta = Path(directory) / "meta.json"
+    if meta.exists() and json.loads(meta.read_text()) == {"version": INDEX_VERSION, "source": source}:
+        return InvertedIndex.load(directory)
+    index = InvertedIndex.from_turns(corpus_turns(path))
+    index.save(directory, source=source)
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("query", help="Palabra o frase a buscar")
+    parser.add_argument("--near", default=None, help="Palabra o frase que tiene que estar cerca")
+    parser.add_argument("--window", type=int, default=10, help="Distancia máxima en palabras para --near")
+    parser.add_argument("--speaker", nargs="+", default=None)
+    parser.add_argument("--party", nargs="+", default=None)
+    parser.add_argument("--since", default=None, help="Primera fecha, por ejemplo 2020-09-01")
+    parser.add_argument("--until", default=None, help="Última fecha")
+    parser.add_argument("--context", type=int, default=8, help="Palabras de contexto a cada lado")
+    parser.add_argument("--limit", type=int, default=20, help="Fragmentos a mostrar")
+    parser.add_argument("--path", default=DATA_PATH)
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = load_or_build(path=args.path, directory=args.index_dir)
+    loaded = time.perf_counter()
+    matches = index.search(
+        args.query,
+        near=args.near,
+        window=args.window,
+        speaker=args.speaker,
+        party=args.party,
+        since=args.since,
+        until=args.until,
+    )
+    snippets = index.kwic(matches.head(args.limit), context=args.context)
+    searched = time.perf_counter()
+
+    print(f"Índice cargado en {1000 * (loaded - start):.1f} ms, búsqueda en {1000 * (searched - loaded):.1f} ms")
+    print(f"{len(matches)} ocurrencias en {matches['turn'].nunique()} intervenciones")
+    if len(matches):
+        print(matches.groupby("speaker").size().sort_values(ascending=False).head(10).to_string())
+        print()
+    for row in snippets.itertuples():
+        print(f"{row.date:%Y-%m-%d} {row.speaker[:20]:<20} {row.left[-50:]:>50} [{row.match}] {row.right[:50]}")
@@ -0,0 +1,121 @@
+import hashlib
+import re
+from pathlib import Path
+
+import pandas as pd
+
+DATA_PATH = "data/us_2020_election_speeches.csv"
+CACHE_DIR = "data/cache"
+
+# Columnas de baja cardinalidad que se guardan como categóricas
+CATEGORICAL_COLUMNS = ["type", "location"]
+
+
+def file_hash(path: str | Path, chunk_size: int = 1 << 20) -> str:
+    """
+    Compute the SHA-256 of a file without loading it whole in memory.
+
+    Args:
+        path: The file to hash.
+        chunk_size: The number of bytes read at a time.
+
+    Returns:
+        The hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_speeches(path: str | Path) -> pd.DataFrame:
+    """
+    Parse the speeches CSV into typed columns.
+
+    Args:
+        path: The CSV with the speeches.
+
+    Returns:
+        A DataFrame with the date already parsed and categorical metadata.
+    """
+    return _parse_columns(pd.read_csv(filepath_or_buffer=path, sep=","))
+
+
+def _parse_columns(df: pd.DataFrame) -> pd.DataFrame:
+    if "date" in df.columns:
+        df["date"] = pd.to_datetime(df["date"], format="%b %d, %Y")
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    return df
+
+
+def read_speeches(path: str | Path = DATA_PATH, chunksize: int = 1000, columns: list | None = None):
+    """
+    Parse the speeches CSV in chunks, so the corpus never has to fit in memory.
+
+    Args:
+        path: The CSV with the speeches.
+        chunksize: The number of speeches per chunk.
+        columns: The columns to read. All of them if None.
+
+    Yields:
+        DataFrames typed like parse_speeches, indexed by the position of each
+        speech in the whole file.
+    """
+    with pd.read_csv(filepath_or_buffer=path, sep=",", usecols=columns, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield _parse_columns(chunk)
+
+
+def cache_path(path: str | Path = DATA_PATH, cache_dir: str | Path = CACHE_DIR) -> Path:
+    """
+    Get the Parquet cache that corresponds to the current contents of a CSV.
+
+    Args:
+        path: The CSV with the speeches.
+        cache_dir: The folder where the caches are stored.
+
+    Returns:
+        The path of the cache, named after the hash of the CSV.
+    """
+    path = Path(path)
+    return Path(cache_dir) / f"{path.stem}-{file_hash(path)[:16]}.parquet"
+
+
+def load_speeches(
+    path: str | Path = DATA_PATH,
+    columns: list | None = None,
+    cache_dir: str | Path = CACHE_DIR,
+) -> pd.DataFrame:
+    """
+    Load the speeches from a typed Parquet cache, parsing the CSV only once.
+
+    The cache is keyed by the hash of the CSV, so editing the file rebuilds it
+    on the next load. Only the requested columns are read from the cache.
+
+    Args:
+        path: The CSV with the speeches.
+        columns: The columns to load. All of them if None.
+        cache_dir: The folder where the caches are stored.
+
+    Returns:
+        A DataFrame with the requested columns.
+    """
+    cache = cache_path(path=path, cache_dir=cache_dir)
+    if not cache.exists():
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        df = parse_speeches(path)
+        # Se escribe en un temporal y se renombra, así una escritura cortada no deja un caché truncado
+        partial = cache.with_name(f"{cache.name}.tmp")
+        df.to_parquet(partial, index=True)
+        partial.replace(cache)
+        # Borro las versiones anteriores del mismo archivo, sin tocar las de otros CSV con el mismo prefijo
+        stale_pattern = re.compile(rf"{re.escape(Path(path).stem)}-[0-9a-f]{{16}}\.parquet")
+        for stale in cache.parent.glob(f"{Path(path).stem}-*.parquet"):
+            if stale != cache and stale_pattern.fullmatch(stale.name):
+                stale.unlink()
+        return df if columns is None else df[columns]
+    return pd.read_parquet(cache, columns=columns)
+
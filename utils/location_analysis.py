@@ -1,234 +1,159 @@
-import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
-from geopandas import read_file
 
-
-def execute(df: pd.DataFrame):
-    df["date"] = pd.to_datetime(df["date"])
-    df["speaker"] = df["speaker"].map(
-        lambda x: list(map(str.strip, x.split(","))) if isinstance(x, str) else x
+from utils.locations import resolve_locations
+from utils.speakers import speaker_registry
+
+
+CANDIDATE_AFFILIATION = {
+    "Joe Biden": "Partido Demócrata",
+    "Donald Trump": "Partido Republicano",
+    "Kamala Harris": "Partido Demócrata",
+    "Mike Pence": "Partido Republicano",
+    "Bernie Sanders": "Partido Demócrata",
+}
+COLOR_MAP = {
+    "Partido Demócrata": "#1f77b4",
+    "Partido Republicano": "red",
+    "Empate": "gray",
+}
+
+
+def _resolve(df: pd.DataFrame) -> pd.DataFrame:
+    # Una fila por orador en los discursos con varios ("Joe Biden, Kamala Harris"), con los nombres canónicos
+    speakers = speaker_registry().explode(df["speaker"].reset_index(drop=True))
+    df = df.iloc[speakers.index].assign(speaker=speakers.array)
+    resolved = resolve_locations(df["location"])
+    return df.assign(
+        state=resolved["state"].to_numpy(),
+        news_channel=resolved["news_channel"].to_numpy(),
+        kind=resolved["kind"].to_numpy(),
     )
-    df = df.explode("speaker")
-    top5_speakers = df["speaker"].value_counts().head(5).index.tolist()
 
-    df.head()
 
-    for location in df["location"].unique():
-        print(location)
+def _tally(df: pd.DataFrame) -> dict:
+    speaker = df["speaker"].astype("str")
+    return {
+        "speakers": speaker.value_counts(),
+        "states": df.groupby([speaker, df["state"].astype("str")]).size(),
+        "news_channels": df.groupby([speaker, df["news_channel"].astype("str")]).size(),
+    }
 
-    us_states_list = [
-        "alabama",
-        "alaska",
-        "arizona",
-        "arkansas",
-        "california",
-        "colorado",
-        "connecticut",
-        "delaware",
-        "florida",
-        "georgia",
-        "hawaii",
-        "idaho",
-        "illinois",
-        "indiana",
-        "iowa",
-        "kansas",
-        "kentucky",
-        "louisiana",
-        "maine",
-        "maryland",
-        "massachusetts",
-        "michigan",
-        "minnesota",
-        "mississippi",
-        "missouri",
-        "montana",
-        "nebraska",
-        "nevada",
-        "new hampshire",
-        "new jersey",
-        "new mexico",
-        "new york",
-        "north carolina",
-        "north dakota",
-        "ohio",
-        "oklahoma",
-        "oregon",
-        "pennsylvania",
-        "rhode island",
-        "south carolina",
-        "south dakota",
-        "tennessee",
-        "texas",
-        "utah",
-        "vermont",
-        "virginia",
-        "washington",
-        "west virginia",
-        "wisconsin",
-        "wyoming",
-    ]
-
-    def get_state(location):
-        if not isinstance(location, str):
-            return None
-        location = location.split(",")
-        if len(location) == 2:
-            return location[1].strip()
-        if location[0].lower() in us_states_list:
-            return location[0]
-        else:
-            return None
-
-    df["state"] = df["location"].apply(get_state)
-    print("State Value counts: ", df["state"].value_counts())
 
-    news_channels = ["ABC", "NBC", "Fox News", "Virtual", "CNN"]
-    df["news_channel"] = df["location"].apply(
-        lambda x: x if x in news_channels else None
-    )
+def _top_speakers(speakers: pd.Series, n: int = 5) -> pd.Index:
+    # A igual cantidad de discursos, orden alfabético
+    return speakers.sort_index().sort_values(ascending=False, kind="stable").head(n).index
 
-    df_with_states = df[df["state"].notna()].copy()
-    df_top5_speakers = df_with_states[
-        df_with_states["speaker"].isin(top5_speakers)
-    ].copy()
-
-    candidate_affiliation = {
-        "Joe Biden": "Partido Demócrata",
-        "Donald Trump": "Partido Republicano",
-        "Kamala Harris": "Partido Demócrata",
-        "Mike Pence": "Partido Republicano",
-        "Bernie Sanders": "Partido Demócrata",
-    }
 
-    df_top5_speakers["candidate_affiliation"] = df_top5_speakers["speaker"].map(
-        lambda x: candidate_affiliation[x]
-    )
+def tally(df: pd.DataFrame) -> dict:
+    """
+    Count the speeches per speaker, per speaker and state and per speaker and news channel.
 
-    all_states = read_file("maps/states")
-    all_states = all_states[all_states["iso_a2"] == "US"][
-        ~all_states["name"].isin(["Alaska", "Hawaii"])
-    ]
-    df_party_speech_by_state = (
-        df_top5_speakers.groupby(["candidate_affiliation", "state"])
-        .size()
-        .unstack()
-        .fillna(0)
-    )
+    The counts of different sets of speeches add up (see merge_tallies), so a
+    corpus can be tallied in chunks.
 
-    def get_winner(row):
-        if row.get("Partido Demócrata", 0) > row.get("Partido Republicano", 0):
-            return "Partido Demócrata"
-        elif row.get("Partido Republicano", 0) > row.get("Partido Demócrata", 0):
-            return "Partido Republicano"
-        else:
-            return "Empate"
+    Args:
+        df: The speeches, with at least the speaker and location columns.
 
-    winner_by_state = df_party_speech_by_state.T.apply(get_winner, axis=1)
-    all_states["winner"] = all_states["name"].map(winner_by_state)
+    Returns:
+        A dict of Series with the counts: speakers, states and news_channels.
+    """
+    return _tally(_resolve(df))
 
-    dem_counts = (
-        df_party_speech_by_state.loc["Partido Demócrata"]
-        if "Partido Demócrata" in df_party_speech_by_state.index
-        else pd.Series()
-    )
-    rep_counts = (
-        df_party_speech_by_state.loc["Partido Republicano"]
-        if "Partido Republicano" in df_party_speech_by_state.index
-        else pd.Series()
-    )
 
+def merge_tallies(left: dict, right: dict) -> dict:
+    """
+    Add up the tallies of two sets of speeches.
+
+    Args:
+        left: The tallies of the first set, see tally.
+        right: The tallies of the second set.
+
+    Returns:
+        The tallies of both sets together.
+    """
+    return {name: left[name].add(right[name], fill_value=0).astype("int64") for name in left}
+
+
+def summarize(tallies: dict) -> dict:
+    """
+    Compute the aggregates behind the states map and the news channel chart from the tallies.
+
+    Args:
+        tallies: The tallies of all the speeches, see tally.
+
+    Returns:
+        A dict with the states layer joined with the tallies (all_states), the
+        speeches per news channel and party (news_channel) and the party colors.
+    """
+    # geopandas solo se importa cuando hace falta la capa de estados
+    from utils.geometry import load_us_states
+
+    top5_speakers = _top_speakers(tallies["speakers"])
+
+    def by_party(counts: pd.Series, column: str) -> pd.Series:
+        speaker = counts.index.get_level_values(0)
+        counts = counts[speaker.isin(top5_speakers)]
+        keys = [
+            pd.Index(counts.index.get_level_values(0).map(CANDIDATE_AFFILIATION), name="candidate_affiliation"),
+            pd.Index(counts.index.get_level_values(1), name=column),
+        ]
+        return counts.groupby(keys).sum()
+
+    all_states = load_us_states(columns=["name", "label_x", "label_y"])
+    df_party_speech_by_state = by_party(tallies["states"], "state").unstack().fillna(0)
+
+    # Discursos de cada partido por estado, 0 si el partido no tiene ninguno, y el ganador de una vez
+    parties = df_party_speech_by_state.reindex(["Partido Demócrata", "Partido Republicano"], fill_value=0)
+    dem_counts, rep_counts = parties.loc["Partido Demócrata"], parties.loc["Partido Republicano"]
+    winner_by_state = pd.Series(
+        np.select([dem_counts > rep_counts, rep_counts > dem_counts], ["Partido Demócrata", "Partido Republicano"], "Empate"),
+        index=parties.columns,
+    )
+    all_states["winner"] = all_states["name"].map(winner_by_state)
     all_states["dem_count"] = all_states["name"].map(dem_counts).fillna(0).astype(int)
     all_states["rep_count"] = all_states["name"].map(rep_counts).fillna(0).astype(int)
 
-    color_map = {
-        "Partido Demócrata": "#1f77b4",
-        "Partido Republicano": "red",
-        "Empate": "gray",
-    }
-
-    fig, ax = plt.subplots(nrows=1, ncols=1, figsize=(20, 10))
-    all_states.boundary.plot(ax=ax, color="black", linewidth=0.5)
-    all_states.dropna(subset=["winner"]).plot(
-        ax=ax,
-        color=all_states.dropna(subset=["winner"])["winner"].map(color_map),
-        edgecolor="black",
-        linewidth=0.5,
+    df_news_channel = (
+        by_party(tallies["news_channels"], "news_channel")
+        .swaplevel()
+        .sort_index()
+        .unstack()
+        .fillna(0)
     )
 
-    offsets = {
-        "New Jersey": (0.3, -0.3),
-        "New Hampshire": (0.3, -0.4),
-        "Vermont": (0.0, 0.3),
-        "Michigan": (0.5, -0.3),
-        "Florida": (0.5, -0.3),
-        "Delaware": (0.5, -0.3),
+    return {
+        "all_states": all_states,
+        "news_channel": df_news_channel,
+        "color_map": COLOR_MAP,
     }
 
-    for _, row in all_states.dropna(subset=["winner"]).iterrows():
-        if row["geometry"].centroid.is_valid:
-            x, y = row["geometry"].centroid.x, row["geometry"].centroid.y
-            dx, dy = offsets.get(row["name"], (0, 0))
-            label = f"{row['dem_count']}/{row['rep_count']}"
-            plt.text(
-                x + dx,
-                y + dy,
-                label,
-                ha="center",
-                va="center",
-                fontsize=20,
-                color="black",
-                weight="bold",
-            )
-
-    plt.title(
-        "Estados Coloreados por el Partido con más Discursos\n(Demócrata/Republicano)",
-        fontsize=24,
-        fontweight="bold",
-    )
-    plt.axis("off")
-    plt.savefig("img/states_map.png", dpi=300)
-    plt.close(fig)
 
+def aggregate(df: pd.DataFrame) -> dict:
+    """
+    Compute the location tallies behind the states map and the news channel chart.
+
+    Args:
+        df: The speeches, with at least the speaker, date and location columns.
+
+    Returns:
+        A dict with the states layer joined with the tallies (all_states), the
+        speeches per news channel and party (news_channel) and the party colors.
+    """
+    if not pd.api.types.is_datetime64_any_dtype(df["date"]):
+        df["date"] = pd.to_datetime(df["date"])
+    df = _resolve(df)
+    tallies = _tally(df)
+
+    for location in df["location"].unique():
+        print(location)
+
+    print("State Value counts: ", df["state"].value_counts())
+    print("Location kinds: ", df["kind"].value_counts())
     print("News channel value count: ", df["news_channel"].value_counts())
-    df_top5_speakers_news_channel = df[
-        (df["news_channel"].notnull()) & (df["speaker"].isin(top5_speakers))
-    ].copy()
-    df_top5_speakers_news_channel["candidate_affiliation"] = (
-        df_top5_speakers_news_channel["speaker"].map(lambda x: candidate_affiliation[x])
-    )
-    fig, ax = plt.subplots(figsize=(10, 5))
-    df_top5_speakers_news_channel.groupby(
-        ["news_channel", "candidate_affiliation"]
-    ).size().unstack().fillna(0).plot(
-        kind="bar",
-        stacked=True,
-        color=list(color_map.values()),
-        ax=ax,
-    )
-    fig.suptitle(
-        t="Distribución de Discursos por Partido y Canal de Noticias",
-        fontweight="bold",
-    )
-    ax.set_xlabel("Canal de Noticias")
-    ax.set_xticklabels(ax.get_xticklabels(), rotation=0)
-    ax.set_ylabel("Cantidad de Discursos")
-    ax.legend(
-        title=None,
-        loc="upper center",
-        bbox_to_anchor=(0.5, 1.05),
-        ncol=2,
-        frameon=False,
-    )
-    ax.yaxis.grid(visible=True, linestyle="--", alpha=0.6)
-    ax.set_axisbelow(True)
-    ax.spines["top"].set_visible(False)
-    ax.spines["right"].set_visible(False)
-    fig.tight_layout()
-    fig.savefig(fname="img/news_channel_dist.png", dpi=300, bbox_inches="tight")
-    plt.close(fig)
-
-    df_top5_speakers = df[df["speaker"].isin(top5_speakers)].copy()
+
+    top5_speakers = _top_speakers(tallies["speakers"])
+    df_top5_speakers = df[df["speaker"].isin(top5_speakers)]
     print("Virtual ", df_top5_speakers["news_channel"].notnull().sum())
     print("State ", df_top5_speakers["state"].notnull().sum())
 
@@ -239,3 +164,30 @@ def execute(df: pd.DataFrame):
             & (df_top5_speakers["state"].isnull())
         ],
     )
+
+    return summarize(tallies)
+
+
+def render(aggregates: dict, scheduler: "RenderScheduler | None" = None):
+    # Las librerías de gráficos solo se importan si hay que renderizar
+    from utils.plots import news_channel_plot, states_map_plot
+    from utils.render import render_now
+
+    # Si hay un scheduler las figuras se encolan para renderizarlas en paralelo, si no se generan acá
+    submit = scheduler.add if scheduler is not None else render_now
+    submit(
+        states_map_plot,
+        all_states=aggregates["all_states"],
+        save_path="img/states_map.png",
+        color_map=aggregates["color_map"],
+    )
+    submit(
+        news_channel_plot,
+        df=aggregates["news_channel"],
+        save_path="img/news_channel_dist.png",
+        color=list(aggregates["color_map"].values()),
+    )
+
+
+def execute(df: pd.DataFrame, scheduler: "RenderScheduler | None" = None):
+    render(aggregates=aggregate(df), scheduler=scheduler)
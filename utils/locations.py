@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+from utils.geometry import CACHE_DIR, STATES_PATH, load_layer
+
+NEWS_CHANNELS = ["ABC", "NBC", "Fox News", "Virtual", "CNN"]
+
+# Columnas del .dbf de estados con nombres alternativos, en orden de prioridad
+STATE_ALIAS_COLUMNS = ["name", "postal", "abbrev", "name_alt", "woe_name", "gn_name", "code_hasc", "iso_3166_2"]
+
+STATE = "state"
+NEWS_CHANNEL = "news_channel"
+UNRESOLVED = "unresolved"
+KINDS = [STATE, NEWS_CHANNEL, UNRESOLVED]
+
+
+def location_key(locations: pd.Series) -> pd.Series:
+    """
+    Normalize locations into the keys of the location index.
+
+    Args:
+        locations: The strings to normalize.
+
+    Returns:
+        The strings in lower case, without periods and surrounding spaces.
+    """
+    return locations.str.lower().str.replace(".", "", regex=False).str.strip()
+
+
+def location_index(
+    news_channels: list = NEWS_CHANNELS,
+    cache_dir: str = CACHE_DIR,
+) -> pd.DataFrame:
+    """
+    Build the hash index used to resolve locations.
+
+    The US states are indexed by their full name, postal code and the alternate
+    names of the Natural Earth states layer (name_alt is split on "|"). When two
+    states share a key, the one from the earlier column in STATE_ALIAS_COLUMNS
+    wins, so "Washington" is the state and not the District of Columbia.
+
+    Args:
+        news_channels: The locations that are news channels instead of places.
+        cache_dir: The folder where the geometry caches are stored.
+
+    Returns:
+        A DataFrame indexed by key with the kind and the canonical value.
+    """
+    states = load_layer(path=STATES_PATH, query='iso_a2 == "US"', columns=STATE_ALIAS_COLUMNS, cache_dir=cache_dir)
+    aliases = (
+        states.melt(id_vars="name", value_vars=STATE_ALIAS_COLUMNS, var_name="column", value_name="alias")
+        .assign(alias=lambda x: x["alias"].str.split("|"))
+        .explode("alias")
+        .dropna(subset=["alias"])
+    )
+    index = pd.concat(
+        [
+            pd.DataFrame({"key": news_channels, "kind": NEWS_CHANNEL, "value": news_channels}),
+            pd.DataFrame({"key": aliases["alias"].to_numpy(), "kind": STATE, "value": aliases["name"].to_numpy()}),
+        ]
+    )
+    index["key"] = location_key(index["key"])
+    return index[index["key"] != ""].drop_duplicates(subset="key").set_index("key")
+
+
+def resolve_locations(locations: pd.Series, index: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Classify every location as a state, a news channel or unresolved.
+
+    Each distinct location is resolved once: first the whole string is looked
+    up in the index, then the text after the last comma ("Pittsburgh, PA").
+    The result is broadcast back to the rows through the factorized codes.
+
+    Args:
+        locations: The location column.
+        index: The index built by location_index. Built from the states layer if None.
+
+    Returns:
+        A DataFrame aligned with locations with the state, news_channel and kind
+        categorical columns.
+    """
+    if index is None:
+        index = location_index()
+    codes, uniques = pd.factorize(locations)
+    uniques = pd.Series(uniques, dtype="str")
+
+    by_location = index.reindex(location_key(uniques))
+    by_suffix = index[index["kind"] == STATE].reindex(location_key(uniques.str.rsplit(",", n=1).str[-1]))
+    found = by_location["kind"].notna().to_numpy()
+    kind = np.where(found, by_location["kind"].to_numpy(dtype=object), by_suffix["kind"].to_numpy(dtype=object))
+    value = np.where(found, by_location["value"].to_numpy(dtype=object), by_suffix["value"].to_numpy(dtype=object))
+    kind = pd.Categorical(kind, categories=KINDS).fillna(UNRESOLVED)
+
+    # Las filas solo copian códigos enteros; el último lugar es para los faltantes, que factorize marca con -1
+    def broadcast(values: pd.Categorical, missing: int) -> pd.Categorical:
+        return pd.Categorical.from_codes(np.append(values.codes, missing)[codes], dtype=values.dtype)
+
+    return pd.DataFrame(
+        {
+            "state": broadcast(pd.Categorical(np.where(kind == STATE, value, None)), -1),
+            "news_channel": broadcast(pd.Categorical(np.where(kind == NEWS_CHANNEL, value, None)), -1),
+            "kind": broadcast(kind, KINDS.index(UNRESOLVED)),
+        },
+        index=locations.index,
+    )
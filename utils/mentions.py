@@ -0,0 +1,168 @@
+import re
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from utils.clean_data import normalize_characters
+
+# Un texto se parte en palabras (\w+) y separadores (\W+): los límites entre tokens
+# son exactamente los \b de los patrones, así que buscar secuencias de tokens equivale al regex
+_TOKEN_PATTERN = re.compile(r"\w+|\W+")
+_WORD_PATTERN = re.compile(r"\w")
+
+
+def alias_tokens(alias: str) -> tuple:
+    """
+    Split an alias into the tokens the automaton matches.
+
+    Accepts plain aliases ("joe biden") as well as the word-bounded patterns
+    used in tarea_1.py (r"\\bjoe biden\\b"). The alias is normalized like the
+    texts (see normalize_characters), so "O’Rourke" matches "o'rourke".
+
+    Args:
+        alias: The alias or pattern.
+
+    Returns:
+        A tuple of word and separator tokens, starting and ending with a word.
+    """
+    tokens = _TOKEN_PATTERN.findall(normalize_characters(alias.replace(r"\b", "")))
+    while tokens and not _WORD_PATTERN.match(tokens[0]):
+        tokens.pop(0)
+    while tokens and not _WORD_PATTERN.match(tokens[-1]):
+        tokens.pop()
+    return tuple(tokens)
+
+
+def aliases_from_names(names: list) -> dict:
+    """
+    Build an alias table where each person is mentioned by their full name.
+
+    Args:
+        names: The names, e.g. the politicos list.
+
+    Returns:
+        A dict with one alias (the name, normalized like the texts) per name.
+    """
+    return {name: [normalize_characters(name)] for name in names}
+
+
+class MentionCounter:
+    """
+    Aho-Corasick automaton over the aliases of a set of people.
+
+    The automaton runs over word tokens instead of characters, so every text
+    is scanned once regardless of how many aliases there are.
+
+    Args:
+        aliases: A dict from each name to the list of aliases (or \\b patterns) that mention it.
+    """
+
+    def __init__(self, aliases: dict):
+        self.names = list(aliases)
+        # Estado 0 es la raíz; cada estado tiene sus transiciones, su link de falla y sus salidas
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        for name_idx, name in enumerate(self.names):
+            for alias in aliases[name]:
+                tokens = alias_tokens(alias)
+                if not tokens:
+                    continue
+                state = 0
+                for token in tokens:
+                    if token not in self._goto[state]:
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._output.append([])
+                        self._goto[state][token] = len(self._goto) - 1
+                    state = self._goto[state][token]
+                if (name_idx, len(tokens)) not in self._output[state]:
+                    self._output[state].append((name_idx, len(tokens)))
+
+        # Links de falla por BFS; cada estado hereda las salidas de su link
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, child in self._goto[state].items():
+                queue.append(child)
+                fail = self._fail[state]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(token, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def matches(self, text: str):
+        """
+        Find every alias occurrence in a text, overlapping ones included.
+
+        Args:
+            text: The text to scan (already lowercased, e.g. clean_text).
+
+        Yields:
+            Tuples (start, end, name_idx) with the token span of each match.
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        root = goto[0]
+        state = 0
+        for position, token in enumerate(_TOKEN_PATTERN.findall(text)):
+            if state == 0 and token not in root:
+                continue
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for name_idx, length in output[state]:
+                yield position - length + 1, position + 1, name_idx
+
+    def count(self, text: str, mode: str = "longest") -> np.ndarray:
+        """
+        Count the mentions of each name in a text.
+
+        Args:
+            text: The text to scan.
+            mode: "overlapping" counts every alias occurrence (like one re.findall
+                per alias), "longest" keeps the leftmost-longest non-overlapping
+                matches so "joe biden" is not also counted as "biden".
+
+        Returns:
+            An array with the number of mentions of each name, in self.names order.
+        """
+        counts = np.zeros(len(self.names), dtype=np.int64)
+        if not isinstance(text, str):
+            return counts
+        if mode == "overlapping":
+            for _, _, name_idx in self.matches(text):
+                counts[name_idx] += 1
+        elif mode == "longest":
+            last_end = 0
+            for start, end, name_idx in sorted(self.matches(text), key=lambda m: (m[0], -m[1])):
+                if start >= last_end:
+                    counts[name_idx] += 1
+                    last_end = end
+        else:
+            raise ValueError(f"Unknown mode {mode!r}, expected 'longest' or 'overlapping'")
+        return counts
+
+    def matrix(self, texts: pd.Series, speakers: pd.Series, index: list | None = None, mode: str = "longest") -> pd.DataFrame:
+        """
+        Build the matrix of how many times each speaker mentions each name.
+
+        Args:
+            texts: The texts, one per row (e.g. one per turn).
+            speakers: The speaker of each text, aligned with texts.
+            index: The speakers to use as rows. All the speakers if None.
+            mode: The counting mode, see count.
+
+        Returns:
+            A DataFrame where entry (i, j) is the number of times speaker i mentions name j.
+        """
+        codes, uniques = pd.factorize(speakers)
+        counts = np.zeros((len(uniques), len(self.names)), dtype=np.int64)
+        for code, text in zip(codes, texts):
+            if code >= 0:
+                counts[code] += self.count(text, mode=mode)
+        result = pd.DataFrame(counts, index=uniques, columns=self.names)
+        if index is not None:
+            result = result.reindex(index=index, fill_value=0)
+        return result
@@ -0,0 +1,239 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from utils.dtm import tokenize
+from utils.sketches import CountMinSketch, HeavyHitters
+from utils.time_buckets import bucket_starts
+
+# Mezcla del hash de cada palabra con el de las anteriores (depende del orden)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def ngram_keys(tokens: pa.LargeListArray, n: int, stopwords: set | None = None) -> tuple:
+    """
+    Hash every n-gram of some tokenized documents into a 64-bit key.
+
+    The key depends only on the words, not on the dictionary of the batch, so
+    the keys of different batches or chunks can be counted together.
+
+    Args:
+        tokens: The tokens of each document, see tokenize.
+        n: The number of words of the n-grams.
+        stopwords: The n-grams that start or end with one of these words are
+            left out, like "of the", but not "law and order". None keeps all.
+
+    Returns:
+        The key of each n-gram, the document it belongs to and the position of
+        its first word in the flattened tokens, in document order.
+    """
+    words = pc.list_flatten(tokens)
+    ids = words.indices.to_numpy()
+    dictionary = words.dictionary.to_numpy(zero_copy_only=False)
+    word_keys = pd.util.hash_array(dictionary.astype(object))[ids]
+
+    rows = pc.list_parent_indices(tokens).to_numpy()
+    row_ends = tokens.offsets.to_numpy()[rows + 1]
+    # Cada n-grama empieza en una palabra que tiene n - 1 palabras más en su mismo documento
+    starts = np.flatnonzero(np.arange(len(ids)) + n <= row_ends)
+    if stopwords:
+        stop = pd.Index(dictionary).isin(stopwords)[ids]
+        starts = starts[~stop[starts] & ~stop[starts + n - 1]]
+
+    keys = word_keys[starts]
+    for offset in range(1, n):
+        keys = keys * _MIX + word_keys[starts + offset]
+    return keys, rows[starts], starts
+
+
+class NgramSketch:
+    """
+    The most frequent n-grams of each group (speaker, week...), with bounded memory.
+
+    Each group keeps a HeavyHitters summary with at most capacity n-grams and a
+    CountMinSketch sized by epsilon and delta, so the memory per group does not
+    depend on how many distinct n-grams there are. For every n-gram of the top,
+    count is a lower bound, off by at most total / (capacity + 1), and upper is
+    an upper bound that, with probability at least 1 - delta, is off by at most
+    epsilon * total, where total is the number of n-grams of the group. Every
+    n-gram more frequent than total / (capacity + 1) is in the summary.
+
+    Args:
+        n: The number of words of the n-grams.
+        capacity: The number of counters of each HeavyHitters summary.
+        epsilon: The error of the CountMinSketch of each group, as a fraction of its total.
+        delta: The probability of exceeding it.
+        stopwords: See ngram_keys.
+        seed: The seed of the sketches; only sketches with the same seed can be merged.
+    """
+
+    def __init__(
+        self,
+        n: int = 2,
+        capacity: int = 1000,
+        epsilon: float = 1e-3,
+        delta: float = 1e-3,
+        stopwords: set | None = None,
+        seed: int = 0,
+    ):
+        self.n = n
+        self.capacity = capacity
+        self.epsilon = epsilon
+        self.delta = delta
+        self.stopwords = set(stopwords) if stopwords else set()
+        self.seed = seed
+        self.summaries = {}
+        self.sketches = {}
+
+    def update(self, tokens: pa.LargeListArray, groups):
+        """
+        Count the n-grams of a batch of tokenized documents.
+
+        Args:
+            tokens: The tokens of each document, see tokenize.
+            groups: The group of each document, aligned by position. Documents
+                with a missing group are left out.
+        """
+        keys, rows, starts = ngram_keys(tokens, n=self.n, stopwords=self.stopwords)
+        codes, uniques = pd.factorize(pd.Series(groups).reset_index(drop=True).iloc[rows])
+        words = pc.list_flatten(tokens)
+        ids, dictionary = words.indices.to_numpy(), words.dictionary.to_numpy(zero_copy_only=False)
+
+        # Conteo exacto del lote, por (grupo, n-grama), ordenando una sola vez
+        valid = codes >= 0
+        codes, keys, starts = codes[valid], keys[valid], starts[valid]
+        order = np.lexsort((keys, codes))
+        codes, keys, starts = codes[order], keys[order], starts[order]
+        first = np.flatnonzero(np.r_[True, (codes[1:] != codes[:-1]) | (keys[1:] != keys[:-1])])
+        counts = np.diff(np.r_[first, len(keys)])
+        group_bounds = np.searchsorted(codes[first], np.arange(len(uniques) + 1))
+
+        for code, group in enumerate(uniques):
+            runs = first[group_bounds[code] : group_bounds[code + 1]]
+            group_keys, group_counts = keys[runs], counts[group_bounds[code] : group_bounds[code + 1]]
+            # El texto solo se arma para los n-gramas que quedan en el resumen del lote
+            group_starts = starts[runs]
+
+            def labels(positions, group_starts=group_starts):
+                return [" ".join(dictionary[ids[s : s + self.n]]) for s in group_starts[positions]]
+
+            if group not in self.summaries:
+                self.summaries[group] = HeavyHitters(capacity=self.capacity)
+                self.sketches[group] = CountMinSketch.from_error(epsilon=self.epsilon, delta=self.delta, seed=self.seed)
+            self.summaries[group].update(group_keys, group_counts, labels=labels)
+            self.sketches[group].update(group_keys, group_counts)
+
+    def merge(self, other: "NgramSketch") -> "NgramSketch":
+        """
+        Add up the counts of two sketches with the same parameters, like those of two chunks.
+
+        Args:
+            other: The other sketch.
+
+        Returns:
+            The sketch of both sets of documents.
+        """
+        merged = NgramSketch(
+            n=self.n,
+            capacity=self.capacity,
+            epsilon=self.epsilon,
+            delta=self.delta,
+            stopwords=self.stopwords,
+            seed=self.seed,
+        )
+        for group in {**self.summaries, **other.summaries}:
+            if group in self.summaries and group in other.summaries:
+                merged.summaries[group] = self.summaries[group].merge(other.summaries[group])
+                merged.sketches[group] = self.sketches[group].merge(other.sketches[group])
+            else:
+                source = self if group in self.summaries else other
+                merged.summaries[group], merged.sketches[group] = source.summaries[group], source.sketches[group]
+        return merged
+
+    def top(self, k: int = 20) -> pd.DataFrame:
+        """
+        Get the most frequent n-grams of each group, with their error bounds.
+
+        Args:
+            k: The number of n-grams per group.
+
+        Returns:
+            One row per group and n-gram, from most to least frequent within each
+            group, with the columns group, ngram, count (lower bound), upper
+            (upper bound) and total (n-grams of the group). Groups are sorted.
+        """
+        frames = []
+        for group in sorted(self.summaries):
+            summary, sketch = self.summaries[group], self.sketches[group]
+            keys, counts, labels = summary.top(k)
+            upper = np.minimum(counts + summary.error, sketch.estimate(keys))
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "group": [group] * len(keys),
+                        "ngram": labels,
+                        "count": counts,
+                        "upper": upper,
+                        "total": summary.total,
+                    }
+                )
+            )
+        columns = ["group", "ngram", "count", "upper", "total"]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+    def frequencies(self, k: int = 100) -> pd.Series:
+        """
+        Get the most frequent n-grams of each group as frequency dicts for word_cloud_plot.
+
+        Args:
+            k: The number of n-grams per group.
+
+        Returns:
+            A dict {ngram: count} per group, indexed by group.
+        """
+        top = self.top(k)
+        return pd.Series(
+            {group: dict(zip(rows["ngram"], rows["count"].tolist())) for group, rows in top.groupby("group", sort=False)},
+            name="frequencies",
+        )
+
+
+def ngram_sketches(
+    turns: pd.DataFrame,
+    n: int = 2,
+    by: str = "speaker",
+    freq=None,
+    text_column: str = "clean_text",
+    date: str = "date",
+    batch_size: int = 10_000,
+    **kwargs,
+) -> NgramSketch:
+    """
+    Count the top n-grams of each speaker (and time bucket) of the turn table, in batches.
+
+    Only one batch of turns is tokenized at a time, and each group keeps a
+    summary of bounded size, see NgramSketch.
+
+    Args:
+        turns: The turns with their normalized text (see normalize_text).
+        n: The number of words of the n-grams.
+        by: The column to group by, like the speaker.
+        freq: Also group by time bucket, see bucket_starts. Only by the column if None.
+        text_column: The column with the normalized text.
+        date: The column with the date, for freq.
+        batch_size: The number of turns tokenized at a time.
+        **kwargs: The rest of the arguments of NgramSketch (capacity, epsilon, stopwords...).
+
+    Returns:
+        The sketch, with groups that are the values of by or (value, bucket start) tuples.
+    """
+    sketch = NgramSketch(n=n, **kwargs)
+    for start in range(0, len(turns), batch_size):
+        batch = turns.iloc[start : start + batch_size]
+        groups = batch[by].astype(object)
+        if freq is not None:
+            buckets = bucket_starts(batch[date], freq=freq)
+            groups = pd.Series(list(zip(groups, buckets)), index=batch.index).where(groups.notna() & buckets.notna())
+        sketch.update(tokenize(batch[text_column]), groups.to_numpy())
+    return sketch
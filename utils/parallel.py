@@ -0,0 +1,254 @@
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from utils.clean_data import clean_text, normalize_text, search_punctuation
+from utils.dtm import DocumentTermMatrix, tokenize
+from utils.segmentation import segment_turns
+
+# Memoria compartida de Linux: los archivos de /dev/shm nunca van al disco
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# Los workers heredan la tabla de entrada al hacer fork, así no se serializa
+_INPUT = None
+
+
+def shard_bounds(sizes: np.ndarray, shards: int) -> list:
+    """
+    Split consecutive rows into shards with about the same total size.
+
+    Args:
+        sizes: The size of each row, like the length of its text.
+        shards: The number of shards.
+
+    Returns:
+        The (start, stop) positions of each non-empty shard, in order.
+    """
+    cumulative = np.cumsum(sizes, dtype=np.float64)
+    total = cumulative[-1] if len(cumulative) else 0
+    cuts = np.searchsorted(cumulative, total * np.arange(1, shards) / shards, side="right")
+    bounds = np.unique(np.concatenate([[0], cuts, [len(sizes)]]))
+    return [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def _run_shard(func, start: int, stop: int, kwargs: dict):
+    return func(_INPUT.iloc[start:stop], **kwargs)
+
+
+def _as_table(result) -> pa.Table:
+    return result if isinstance(result, pa.Table) else pa.Table.from_pandas(result, preserve_index=False)
+
+
+def _table_job(func, start: int, stop: int, kwargs: dict, directory: str) -> str:
+    table = _as_table(_run_shard(func, start, stop, kwargs))
+    # El resultado vuelve como un archivo Arrow IPC, el proceso principal solo recibe el nombre
+    path = os.path.join(directory, f"shard-{start}.arrow")
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return path
+
+
+def _read_table(path: str) -> pa.Table:
+    # Los buffers apuntan al archivo mapeado en memoria, sin copiarlo; el mapeo sigue válido al borrarlo
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    os.unlink(path)
+    return table
+
+
+class ShardedExecutor:
+    """
+    Run per-speech text stages over contiguous shards of the corpus in a process pool.
+
+    The shards are balanced by the length of the texts and the results are put
+    back together in row order, so the output does not depend on the number of
+    shards or workers. Workers are forked and inherit the input frame, and
+    tables come back as Arrow IPC files in shared memory (/dev/shm where it
+    exists) that are memory-mapped, so no large string frame is pickled in
+    either direction. Where fork is not available the shards run one after
+    another in this process.
+
+    Args:
+        workers: The number of worker processes. All the CPUs if None; 1 runs serially.
+        shards: The number of shards. Four per worker if None, so a slow shard
+            does not leave the other workers idle.
+        shared_dir: The folder for the result files. SHARED_DIR if None.
+    """
+
+    def __init__(self, workers: int | None = None, shards: int | None = None, shared_dir: str | None = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.shards = shards or 4 * self.workers
+        self.shared_dir = shared_dir or SHARED_DIR
+
+    def _context(self):
+        if self.workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+            return multiprocessing.get_context("fork")
+        return None
+
+    def _bounds(self, df: pd.DataFrame, size_column: str | None) -> list:
+        sizes = np.ones(len(df)) if size_column is None else df[size_column].str.len().fillna(0).to_numpy()
+        # Sin filas queda un solo shard vacío, para que el resultado tenga las columnas de func
+        return shard_bounds(sizes, self.shards) or [(0, 0)]
+
+    def _submit(self, job, func, df: pd.DataFrame, size_column: str | None, *args, **kwargs) -> list:
+        global _INPUT
+        bounds = self._bounds(df, size_column)
+        context = self._context()
+        _INPUT = df
+        try:
+            if context is None:
+                return [job(func, start, stop, kwargs, *args) for start, stop in bounds]
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(bounds)), mp_context=context) as executor:
+                futures = [executor.submit(job, func, start, stop, kwargs, *args) for start, stop in bounds]
+                return [future.result() for future in futures]
+        finally:
+            _INPUT = None
+
+    def map(self, func, df: pd.DataFrame, size_column: str | None = None, **kwargs) -> list:
+        """
+        Apply a function to every shard, for small results that are cheap to pickle.
+
+        Args:
+            func: A module-level function that receives a shard of df and kwargs.
+            df: The rows to process.
+            size_column: The text column used to balance the shards. Rows count the same if None.
+            **kwargs: Extra arguments of func.
+
+        Returns:
+            The result of each shard, in order.
+        """
+        return self._submit(_run_shard, func, df, size_column, **kwargs)
+
+    def map_tables(self, func, df: pd.DataFrame, size_column: str | None = None, **kwargs) -> pa.Table:
+        """
+        Apply a function that returns a table (Arrow or pandas) to every shard.
+
+        Args:
+            func: A module-level function that receives a shard of df and kwargs.
+            df: The rows to process.
+            size_column: The text column used to balance the shards. Rows count the same if None.
+            **kwargs: Extra arguments of func.
+
+        Returns:
+            The tables of all the shards concatenated in order, one chunk per shard.
+        """
+        if self._context() is None:
+            return pa.concat_tables([_as_table(t) for t in self._submit(_run_shard, func, df, size_column, **kwargs)])
+        with tempfile.TemporaryDirectory(dir=self.shared_dir) as directory:
+            paths = self._submit(_table_job, func, df, size_column, directory, **kwargs)
+            return pa.concat_tables([_read_table(path) for path in paths])
+
+
+def _segment_shard(df: pd.DataFrame, text_column: str) -> pd.DataFrame:
+    return segment_turns(df=df, text_column=text_column)
+
+
+def _normalize_shard(df: pd.DataFrame, column_name: str, unicode: bool) -> pa.Table:
+    return pa.table({column_name: pa.array(normalize_text(df=df, column_name=column_name, unicode=unicode), from_pandas=True)})
+
+
+def _clean_shard(df: pd.DataFrame, column_name: str) -> pa.Table:
+    return pa.table({column_name: pa.array(clean_text(df=df, column_name=column_name), from_pandas=True)})
+
+
+def _tokenize_shard(df: pd.DataFrame, column_name: str) -> pa.Table:
+    return pa.table({"tokens": tokenize(df[column_name])})
+
+
+def _to_series(table: pa.Table, like: pd.Series) -> pd.Series:
+    # Mismo dtype, index y nombre que daría la versión de un solo proceso
+    arr = table.column(0)
+    if like.dtype == object:
+        return pd.Series(arr.to_numpy(), index=like.index, name=like.name, dtype=object).where(like.notna(), like)
+    return pd.Series(arr.to_pandas(types_mapper={arr.type: like.dtype}.get).array, index=like.index, name=like.name)
+
+
+def sharded_segment_turns(df: pd.DataFrame, executor: ShardedExecutor, text_column: str = "text") -> pd.DataFrame:
+    """
+    Split the transcripts into turns across the workers, see segment_turns.
+
+    Args:
+        df: The DataFrame with one transcript per row.
+        executor: The executor.
+        text_column: The column with the transcripts.
+
+    Returns:
+        The same table as segment_turns.
+    """
+    return executor.map_tables(_segment_shard, df[[text_column]], size_column=text_column, text_column=text_column).to_pandas()
+
+
+def sharded_normalize_text(
+    df: pd.DataFrame, column_name: str, executor: ShardedExecutor, unicode: bool = False
+) -> pd.Series:
+    """
+    Normalize the texts across the workers, see normalize_text.
+
+    Args:
+        df: The DataFrame with the texts.
+        column_name: The column with the texts.
+        executor: The executor.
+        unicode: Passed to normalize_text.
+
+    Returns:
+        The same Series as normalize_text.
+    """
+    table = executor.map_tables(
+        _normalize_shard, df[[column_name]], size_column=column_name, column_name=column_name, unicode=unicode
+    )
+    return _to_series(table, df[column_name])
+
+
+def sharded_clean_text(df: pd.DataFrame, column_name: str, executor: ShardedExecutor) -> pd.Series:
+    """
+    Clean the texts across the workers, see clean_text.
+
+    Args:
+        df: The DataFrame with the texts.
+        column_name: The column with the texts.
+        executor: The executor.
+
+    Returns:
+        The same Series as clean_text.
+    """
+    return _to_series(
+        executor.map_tables(_clean_shard, df[[column_name]], size_column=column_name, column_name=column_name),
+        df[column_name],
+    )
+
+
+def sharded_search_punctuation(df: pd.DataFrame, column_name: str, executor: ShardedExecutor) -> set:
+    """
+    Find the punctuation signs of the texts across the workers, see search_punctuation.
+
+    Args:
+        df: The DataFrame with the texts.
+        column_name: The column with the texts.
+        executor: The executor.
+
+    Returns:
+        The set of signs found.
+    """
+    signs = executor.map(search_punctuation, df[[column_name]], size_column=column_name, column_name=column_name)
+    return reduce(set.union, signs, set())
+
+
+def sharded_document_term_matrix(texts: pd.Series, executor: ShardedExecutor) -> DocumentTermMatrix:
+    """
+    Tokenize the texts across the workers and count their words, see DocumentTermMatrix.from_texts.
+
+    Args:
+        texts: The documents, missing values count as empty documents.
+        executor: The executor.
+
+    Returns:
+        The same matrix as DocumentTermMatrix.from_texts.
+    """
+    name = texts.name if texts.name is not None else "text"
+    table = executor.map_tables(_tokenize_shard, texts.to_frame(name=name), size_column=name, column_name=name)
+    return DocumentTermMatrix.from_tokens(table.column("tokens"), labels=texts.index)
@@ -0,0 +1,260 @@
+import ast
+import hashlib
+import importlib.util
+import inspect
+import json
+import pickle
+import textwrap
+import time
+from functools import cache
+from pathlib import Path
+
+from utils.load_data import file_hash
+
+CACHE_DIR = "data/cache/stages"
+
+
+def _json_default(value):
+    # Los sets se ordenan para que el hash no dependa del orden de iteración
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    return repr(value)
+
+
+def _imports(tree: ast.AST) -> dict:
+    # Los módulos de utils que importa el código (también dentro de funciones) y el nombre que les da
+    names = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.name.startswith("utils."):
+                    names[alias.asname or alias.name] = alias.name
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            for alias in node.names:
+                if node.module == "utils":
+                    names[alias.asname or alias.name] = f"utils.{alias.name}"
+                elif node.module.startswith("utils."):
+                    names[alias.asname or alias.name] = node.module
+    return names
+
+
+@cache
+def _file_imports(path: str) -> dict:
+    return _imports(ast.parse(Path(path).read_text()))
+
+
+@cache
+def _module_path(module: str) -> str | None:
+    # El archivo de un módulo de utils, None si el nombre no es un módulo (como una función de utils/__init__.py)
+    try:
+        spec = importlib.util.find_spec(module)
+    except (ImportError, ValueError):
+        return None
+    return spec.origin if spec is not None and spec.origin and spec.origin.endswith(".py") else None
+
+
+def _code_names(code) -> set:
+    # Los nombres globales que usa el código, también los de sus funciones anidadas, lambdas y comprensiones
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _code_names(const)
+    return names
+
+
+def _sources(func, seen: set) -> tuple:
+    # El código de func y de las funciones de su módulo que llama, y los módulos de utils que usa
+    seen.add(func)
+    try:
+        source = inspect.getsource(func)
+        path = inspect.getsourcefile(func)
+    except (OSError, TypeError):
+        return [f"{func.__module__}.{func.__qualname__}"], set()
+
+    bound = {**_file_imports(path), **_imports(ast.parse(textwrap.dedent(source)))}
+    sources, modules = [source], set()
+    for name in _code_names(func.__code__):
+        value = func.__globals__.get(name)
+        if name in bound:
+            modules.add(bound[name])
+        elif inspect.isfunction(value) and value.__globals__ is func.__globals__ and value not in seen:
+            helper_sources, helper_modules = _sources(value, seen)
+            sources += helper_sources
+            modules |= helper_modules
+    return sources, modules
+
+
+def code_dependencies(func) -> tuple:
+    """
+    Find the code a function runs from this repo.
+
+    Besides the source of func, that is the source of the functions of its own
+    module that it calls and every module of utils it uses, directly or
+    through the modules it imports (lazy imports inside functions included).
+
+    Args:
+        func: The function, like the func of a stage.
+
+    Returns:
+        The sources of func and its helpers, and the sorted paths of the utils modules.
+    """
+    sources, pending = _sources(func, set())
+    paths = set()
+    while pending:
+        path = _module_path(pending.pop())
+        if path is not None and path not in paths:
+            paths.add(path)
+            pending |= set(_file_imports(path).values())
+    return sources, sorted(paths)
+
+
+class Stage:
+    """
+    A named step of the pipeline whose output is cached on disk.
+
+    The stage function receives the outputs of its dependencies as keyword
+    arguments named after them, plus its params and options.
+
+    Args:
+        name: The name of the stage.
+        func: The function that computes the output.
+        deps: The names of the stages whose outputs it needs.
+        params: The keyword arguments passed to func (plain data, JSON serializable).
+        options: Keyword arguments passed to func that do not change its output,
+            like the number of processes. They are not part of the cache key.
+        files: Input files whose contents are part of the cache key.
+        outputs: Files the stage writes; the cache is ignored if any is missing.
+        version: Bump to invalidate the cache when something the key cannot
+            see changes, like the installed libraries.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func,
+        deps: list | None = None,
+        params: dict | None = None,
+        options: dict | None = None,
+        files: list | None = None,
+        outputs: list | None = None,
+        version: str = "1",
+    ):
+        self.name = name
+        self.func = func
+        self.deps = deps or []
+        self.params = params or {}
+        self.options = options or {}
+        self.files = files or []
+        self.outputs = outputs or []
+        self.version = version
+
+    def code_hash(self) -> str:
+        # El código de la etapa y el de todos los módulos de utils que usa (ver code_dependencies)
+        sources, paths = code_dependencies(self.func)
+        digest = hashlib.sha256("\n".join(sources).encode())
+        for path in paths:
+            digest.update(f"{Path(path).name}:{file_hash(path)}".encode())
+        return digest.hexdigest()
+
+
+class Pipeline:
+    """
+    Run a DAG of stages, recomputing only what changed.
+
+    The cache key of a stage is the hash of its code, version, params and
+    input files together with the keys of its dependencies, so changing one
+    parameter only recomputes that stage and everything downstream of it.
+    Cached outputs are loaded only when they are actually needed.
+
+    Args:
+        stages: The stages, in any order.
+        cache_dir: The folder where the outputs are pickled.
+    """
+
+    def __init__(self, stages: list, cache_dir: str | Path = CACHE_DIR):
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache_dir = Path(cache_dir)
+        self.log = []
+        self._keys = {}
+
+    def key(self, name: str) -> str:
+        """
+        Get the cache key of a stage.
+
+        Args:
+            name: The name of the stage.
+
+        Returns:
+            The hex digest that identifies the stage output.
+        """
+        if name not in self._keys:
+            stage = self.stages[name]
+            payload = {
+                "name": stage.name,
+                "code": stage.code_hash(),
+                "version": stage.version,
+                "params": stage.params,
+                "files": {str(path): file_hash(path) for path in stage.files},
+                "deps": {dep: self.key(dep) for dep in stage.deps},
+            }
+            encoded = json.dumps(payload, sort_keys=True, default=_json_default)
+            self._keys[name] = hashlib.sha256(encoded.encode()).hexdigest()
+        return self._keys[name]
+
+    def _cache_path(self, name: str) -> Path:
+        return self.cache_dir / f"{name}-{self.key(name)[:16]}.pkl"
+
+    def _get(self, name: str, results: dict):
+        if name in results:
+            return results[name]
+
+        stage = self.stages[name]
+        path = self._cache_path(name)
+        start = time.perf_counter()
+        if path.exists() and all(Path(output).exists() for output in stage.outputs):
+            with open(path, "rb") as f:
+                results[name] = pickle.load(f)
+            self.log.append({"stage": name, "status": "hit", "seconds": time.perf_counter() - start})
+            return results[name]
+
+        inputs = {dep: self._get(dep, results) for dep in stage.deps}
+        # El tiempo de las dependencias se registra en su propia entrada
+        start = time.perf_counter()
+        results[name] = stage.func(**inputs, **stage.params, **stage.options)
+        seconds = time.perf_counter() - start
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Se escribe en un temporal y se renombra, así una corrida cortada no deja un pickle truncado
+        partial = path.with_suffix(".pkl.tmp")
+        with open(partial, "wb") as f:
+            pickle.dump(results[name], f, protocol=pickle.HIGHEST_PROTOCOL)
+        partial.replace(path)
+        for stale in path.parent.glob(f"{name}-*.pkl"):
+            if stale != path:
+                stale.unlink()
+        self.log.append({"stage": name, "status": "miss", "seconds": seconds})
+        return results[name]
+
+    def run(self, targets: list | None = None) -> dict:
+        """
+        Compute (or load from the cache) the target stages.
+
+        Args:
+            targets: The stages to produce. The ones no other stage depends on if None.
+
+        Returns:
+            A dict with the output of every stage that had to be loaded or computed.
+        """
+        self.log = []
+        self._keys = {}
+        results = {}
+        if targets is None:
+            needed = {dep for stage in self.stages.values() for dep in stage.deps}
+            targets = [name for name in self.stages if name not in needed]
+        for name in targets:
+            self._get(name, results)
+        return results
+
+    def print_log(self):
+        for entry in self.log:
+            print(f"{entry['stage']:<16} {entry['status']:<5} {entry['seconds']:8.2f} s")
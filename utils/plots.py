@@ -1,13 +1,31 @@
+from math import comb
+
 import matplotlib.pyplot as plt
 import pandas as pd
 import seaborn as sns
-from circlify import circlify
 import numpy as np
 from wordcloud import WordCloud
 import networkx as nx
+from matplotlib.collections import LineCollection, PathCollection
+from matplotlib.colors import to_rgba_array
+from matplotlib.font_manager import FontProperties
+from matplotlib.path import Path
+from matplotlib.textpath import TextPath
+from matplotlib.transforms import Affine2D
+
+from utils.bubbles import CACHE_DIR as LAYOUT_CACHE_DIR
+from utils.bubbles import MAX_BUBBLES, OTHERS_LABEL, fold_tail, pack_circles
 
 
-def circle_packing_plot(ds: pd.Series, save_path: str, scale: int = 2, threshold: float = 0.15):
+def circle_packing_plot(
+    ds: pd.Series,
+    save_path: str,
+    scale: int = 2,
+    threshold: float = 0.15,
+    max_bubbles: int | None = MAX_BUBBLES,
+    others_label: str = OTHERS_LABEL,
+    cache_dir: str | None = LAYOUT_CACHE_DIR,
+):
     """
     Plot a circle packing plot from a series of counts.
 
@@ -16,36 +34,28 @@ def circle_packing_plot(ds: pd.Series, save_path: str, scale: int = 2, threshold
         save_path: The path to save the plot.
         scale: The scale of the plot.
         threshold: The threshold for showing count values in circles.
+        max_bubbles: The maximum number of circles, the smallest counts are folded
+            into one (see fold_tail). No limit if None.
+        others_label: The label of the folded circle.
+        cache_dir: Where the packing layouts are cached, see pack_circles.
 
     Returns:
         A plot of the circle packing plot.
     """
-    sorted_counts = ds.sort_values(ascending=False)
+    sorted_counts = fold_tail(ds, max_bubbles=max_bubbles, label=others_label)
     speaker_names = sorted_counts.index.tolist()
     count_values = sorted_counts.tolist()
 
-    circles = circlify(count_values)
-    circles = circles[::-1]
+    circles = pack_circles(tuple(count_values), cache_dir=cache_dir) * scale
     fig, ax = plt.subplots(figsize=(10, 10))
     ax.axis("off")
 
-    lim = max(
-        max(
-            abs(circle.x * scale) + circle.r * scale,
-            abs(circle.y * scale) + circle.r * scale,
-        )
-        for circle in circles
-    )
+    lim = (np.abs(circles[:, :2]).max(axis=1) + circles[:, 2]).max()
     ax.set_xlim(-lim, lim)
     ax.set_ylim(-lim, lim)
 
     color_palette = sns.color_palette(palette="tab10", n_colors=20)
-    for i, circle in enumerate(circles):
-        x, y, r = circle
-        x = x * scale
-        y = y * scale
-        r = r * scale
-
+    for i, (x, y, r) in enumerate(circles):
         color_idx = i % len(color_palette)
         random_color = color_palette[color_idx]
         ax.add_patch(
@@ -71,9 +81,10 @@ def circle_packing_plot(ds: pd.Series, save_path: str, scale: int = 2, threshold
                 alpha=0.8,
             )
 
-        fig.tight_layout()
-        fig.savefig(fname=save_path, dpi=300, bbox_inches='tight')
-        plt.close(fig)
+    # La figura se guarda una sola vez, con todos los círculos
+    fig.tight_layout()
+    fig.savefig(fname=save_path, dpi=300, bbox_inches='tight')
+    plt.close(fig)
 
 
 def stacked_bar_plot(df: pd.DataFrame, save_path: str, color: list, plot_title: str, xlabel: str, ylabel: str, ylim_top: int, ylim_bottom: int = 0):
@@ -102,7 +113,7 @@ def stacked_bar_plot(df: pd.DataFrame, save_path: str, color: list, plot_title:
     plt.close(fig)
 
 
-def word_cloud_plot(df: pd.DataFrame, save_path: str, plot_title: str, colormap, stopwords: set, max_words: int, text: str, speaker: str):
+def word_cloud_plot(df: pd.DataFrame, save_path: str, plot_title: str, colormap, stopwords: set, max_words: int, text: str, speaker: str, random_state: int | None = None):
     fig, ax = plt.subplots(nrows=1, ncols=len(df.index), figsize=(30, 6))
     for i, row in df.iterrows():
         wc = WordCloud(
@@ -111,8 +122,14 @@ def word_cloud_plot(df: pd.DataFrame, save_path: str, plot_title: str, colormap,
             background_color='white',
             colormap=colormap,
             stopwords=stopwords,
-            max_words=max_words
-        ).generate(row[text])
+            max_words=max_words,
+            random_state=random_state
+        )
+        # Acepta el texto crudo o las frecuencias ya contadas ({palabra: cantidad}, ver DocumentTermMatrix.top_terms)
+        if isinstance(row[text], dict):
+            wc.generate_from_frequencies(row[text])
+        else:
+            wc.generate(row[text])
         ax[i].imshow(wc, interpolation='bilinear')
         ax[i].axis('off')
         ax[i].set_title(row[speaker], fontsize=30)
@@ -123,55 +140,342 @@ def word_cloud_plot(df: pd.DataFrame, save_path: str, plot_title: str, colormap,
     plt.close(fig)
 
 
-def directed_graph_plot(df: pd.DataFrame, save_path: str, plot_title: str, colors: dict):
-    graph = nx.from_pandas_adjacency(df=df, create_using=nx.DiGraph)
-    edge_weights = nx.get_edge_attributes(G=graph, name='weight')
+def _bezier(points: np.ndarray, t: np.ndarray) -> np.ndarray:
+    # Curvas de Bézier de cualquier grado, una por fila de points (n_curvas, n_puntos, 2), evaluadas en t
+    n = points.shape[1] - 1
+    weights = np.stack([comb(n, k) * t**k * (1 - t) ** (n - k) for k in range(n + 1)], axis=1)
+    return np.einsum("tk,ekd->etd", weights, points)
+
+
+def _shrink(curves: np.ndarray, start: np.ndarray, end: np.ndarray, radius_start: float, radius_end: float) -> list:
+    # Recorta cada curva (en pixeles) donde entra al círculo de sus nodos, como shrinkA y shrinkB
+    clipped = []
+    for curve, a, b in zip(curves, start, end):
+        keep = (np.hypot(*(curve - a).T) >= radius_start) & (np.hypot(*(curve - b).T) >= radius_end)
+        clipped.append(curve[keep] if keep.sum() >= 2 else curve[[0, -1]])
+    return clipped
+
+
+def _arrow_heads(curves: list, length: float, width: float) -> list:
+    # Punta "->": dos segmentos que salen hacia atrás desde el final de cada curva
+    heads = []
+    for curve in curves:
+        tip, direction = curve[-1], curve[-1] - curve[-2]
+        direction = direction / (np.hypot(*direction) or 1)
+        normal = np.array([-direction[1], direction[0]])
+        base = tip - direction * length
+        heads.append(np.array([base + normal * width, tip, base - normal * width]))
+    return heads
+
+
+def directed_graph_plot(
+    df,
+    save_path: str,
+    plot_title: str,
+    colors: dict,
+    nodes: list | None = None,
+    min_weight: float | None = None,
+    node_size: float = 2000,
+    font_size: float = 12,
+    edge_labels: bool = True,
+    default_color: str = "#949494",
+):
+    """
+    Plot a directed graph from a weighted adjacency matrix, with every edge drawn in one batch.
+
+    The arcs and their arrow heads are computed with numpy and drawn as a single
+    LineCollection, and the node and weight labels (and their backgrounds) as
+    a few PathCollections of text outlines, instead of one networkx call or
+    ax.text per edge, so the time grows with the number of points and not
+    with the number of matplotlib calls.
+
+    Args:
+        df: The adjacency matrix, where entry (i, j) is the weight of the edge
+            i -> j: a square DataFrame or a scipy sparse matrix.
+        save_path: The path to save the plot.
+        plot_title: The title of the plot.
+        colors: The color of each node; its edges use the same color.
+        nodes: The node of each row and column. The index of df if None, or the
+            row numbers if df is a sparse matrix.
+        min_weight: The edges with a smaller weight are not drawn. Every non-zero
+            edge if None.
+        node_size: The area of the nodes, in points squared.
+        font_size: The size of the node and edge labels.
+        edge_labels: Whether to write the weight of each edge.
+        default_color: The color of the nodes that are not in colors.
+    """
+    from scipy import sparse
+
+    if nodes is None:
+        # Una matriz sparse no tiene nombres, los nodos son sus números de fila
+        nodes = list(df.index) if isinstance(df, pd.DataFrame) else list(range(df.shape[0]))
+    nodes = list(nodes)
+    adjacency = sparse.coo_array(df.to_numpy() if isinstance(df, pd.DataFrame) else df)
+    keep = adjacency.data != 0
+    if min_weight is not None:
+        keep &= adjacency.data >= min_weight
+    sources, targets, weights = adjacency.row[keep], adjacency.col[keep], adjacency.data[keep]
+    # Los colores se convierten una sola vez y cada arista toma el de su origen por índice
+    node_colors = to_rgba_array([colors.get(node, default_color) for node in nodes])
+
     fig, ax = plt.subplots(figsize=(8, 6))
     ax.set_xlim(left=-1.1, right=1.2)
-    pos = nx.circular_layout(G=graph)
-    nx.draw_networkx_nodes(
-        G=graph,
-        pos=pos,
-        node_size=2000,
-        node_color=[colors[node] for node in graph.nodes()]
+    layout = nx.circular_layout(G=nodes)
+    pos = np.array([layout[node] for node in nodes]).reshape(-1, 2)
+    ax.scatter(pos[:, 0], pos[:, 1], s=node_size, c=node_colors)
+    # Los lazos quedan dentro de los ejes; los límites se fijan antes de calcular las curvas
+    v_shift = np.sqrt(node_size * 0.3) / 72
+    # Como networkx: un margen del 5% alrededor de los nodos, más lo que suben los lazos
+    pad = 0.05 * np.ptp(pos, axis=0)
+    ax.update_datalim([pos.min(axis=0) - pad, pos.max(axis=0) + pad])
+    ax.update_datalim(pos[sources[sources == targets]] + [0, v_shift])
+    ax.autoscale_view()
+    ax.set_ylim(ax.get_ylim())
+    # Los nombres y los pesos van en una colección cada uno (con zorder 3, arriba de las aristas, como ax.text)
+    names = np.array([str(node) for node in nodes], dtype=object)
+    ax.add_collection(
+        _label_collection(ax, pos[:, 0], pos[:, 1], names, fontsize=font_size, color="black", weight="bold", zorder=3),
+        autolim=False,
     )
-    nx.draw_networkx_labels(
-        G=graph,
-        pos=pos,
-        font_size=12,
-        font_weight='bold'
+    fig.suptitle(t=plot_title, fontweight='bold')
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    ax.tick_params(left=False, bottom=False, labelleft=False, labelbottom=False)
+    # Las curvas se calculan en pixeles con los ejes ya ubicados, y se devuelven a coordenadas de datos
+    fig.tight_layout()
+    to_pixels, to_data = ax.transData.transform, ax.transData.inverted().transform
+    points = fig.dpi / 72
+
+    t = np.linspace(0, 1, 33)
+    loops = sources == targets
+    start, end = to_pixels(pos[sources[~loops]]), to_pixels(pos[targets[~loops]])
+    # arc3 con rad=0.2: el punto de control se corre en perpendicular al segmento
+    middle = (start + end) / 2 + 0.2 * np.column_stack([end[:, 1] - start[:, 1], start[:, 0] - end[:, 0]])
+    arcs = _bezier(np.stack([start, middle, end], axis=1), t)
+    label_xy = np.empty((len(sources), 2))
+    label_xy[~loops] = to_data(arcs[:, len(t) // 2].reshape(-1, 2))
+    radius = np.sqrt(node_size) / 2 * points
+    curves = dict(zip(np.flatnonzero(~loops), _shrink(arcs, start, end, radius, radius)))
+
+    # Las menciones a uno mismo son un lazo arriba del nodo, como en networkx
+    h_shift = v_shift * 0.5
+    loop_shape = np.array([[0, v_shift], [h_shift, v_shift], [h_shift, 0], [0, 0], [-h_shift, 0], [-h_shift, v_shift], [0, v_shift]])
+    centers = pos[sources[loops]]
+    halves = [_bezier(to_pixels((centers[:, None, :] + loop_shape[k : k + 4]).reshape(-1, 2)).reshape(-1, 4, 2), t) for k in (0, 3)]
+    loop_curves = np.concatenate([halves[0], halves[1][:, 1:]], axis=1)
+    loop_radius = np.sqrt(node_size * 0.3) / 2 * points
+    top = to_pixels(centers + [0, v_shift]).reshape(-1, 2)
+    curves.update(zip(np.flatnonzero(loops), _shrink(loop_curves, top, top, loop_radius, loop_radius)))
+    label_xy[loops] = centers + [0, v_shift]
+
+    curves = [curves[i] for i in range(len(sources))]
+    heads = _arrow_heads(curves, length=8 * points, width=4 * points)
+    segments = [to_data(line) for line in curves + heads]
+    ax.add_collection(LineCollection(segments, colors=node_colors[np.tile(sources, 2)], linewidths=1))
+
+    if edge_labels and len(weights):
+        texts = np.array([f"{weight}" for weight in weights], dtype=object)
+        for collection in (
+            _label_background_collection(
+                ax, label_xy[:, 0], label_xy[:, 1], texts, font_size, "bold", pad=0.3, color=(1, 1, 1, 0.7), zorder=3
+            ),
+            _label_collection(
+                ax, label_xy[:, 0], label_xy[:, 1], texts, font_size, color=node_colors[sources], weight="bold", zorder=3
+            ),
+        ):
+            ax.add_collection(collection, autolim=False)
+    fig.savefig(fname=save_path, dpi=300)
+    plt.close(fig)
+
+
+def _polygon_paths(geometries) -> tuple:
+    # Un Path compuesto por polígono (anillo exterior y agujeros), cortando un solo arreglo de vértices
+    import shapely
+
+    parts, owners = shapely.get_parts(np.asarray(geometries), return_index=True)
+    rings, ring_parts = shapely.get_rings(parts, return_index=True)
+    coords, ring_of_vertex = shapely.get_coordinates(rings, return_index=True)
+    n_vertices = np.bincount(ring_of_vertex, minlength=len(rings))
+    ring_starts = np.r_[0, np.cumsum(n_vertices)]
+    codes = np.full(len(coords), Path.LINETO, dtype=Path.code_type)
+    codes[ring_starts[:-1]] = Path.MOVETO
+    codes[ring_starts[1:] - 1] = Path.CLOSEPOLY
+    bounds = ring_starts[np.searchsorted(ring_parts, np.arange(len(parts) + 1))]
+    paths = [Path(coords[start:stop], codes[start:stop]) for start, stop in zip(bounds[:-1], bounds[1:])]
+    return paths, owners
+
+
+def _text_paths(labels: np.ndarray, fontsize: float, weight: str) -> dict:
+    # Cada texto distinto se convierte una vez en un Path centrado (en puntos)
+    prop = FontProperties(size=fontsize, weight=weight)
+    glyphs = {}
+    for label in pd.unique(labels):
+        text = TextPath((0, 0), label, prop=prop)
+        extents = text.get_extents()
+        glyphs[label] = Path(text.vertices - [(extents.x0 + extents.x1) / 2, (extents.y0 + extents.y1) / 2], text.codes)
+    return glyphs
+
+
+def _label_collection(ax, x: np.ndarray, y: np.ndarray, labels: np.ndarray, fontsize: float, color, weight: str, **kwargs) -> PathCollection:
+    # Cada texto se repite en su posición; color puede ser uno solo o uno por texto
+    glyphs = _text_paths(labels, fontsize, weight)
+    return PathCollection(
+        [glyphs[label] for label in labels],
+        offsets=np.column_stack([x, y]),
+        offset_transform=ax.transData,
+        # Los puntos pasan a píxeles con el dpi con el que se guarde la figura
+        transform=Affine2D().scale(1 / 72) + ax.figure.dpi_scale_trans,
+        facecolors=color,
+        linewidths=0,
+        **kwargs,
     )
-    for source, target in graph.edges():
-        rad = 0.2
-        nx.draw_networkx_edges(
-            G=graph,
-            pos=pos,
-            arrows=True,
-            edgelist=[(source, target)],
-            arrowstyle="->",
-            connectionstyle=f"arc3,rad={rad}",
-            arrowsize=20,
-            node_size=2000 if source != target else 2000 * 0.3,
-            edge_color=colors[source]
+
+
+def _label_background_collection(
+    ax, x: np.ndarray, y: np.ndarray, labels: np.ndarray, fontsize: float, weight: str, pad: float, color, **kwargs
+) -> PathCollection:
+    # El recuadro de cada texto (como el bbox de ax.text), con un margen de pad veces el tamaño de la letra
+    glyphs = _text_paths(labels, fontsize, weight)
+    boxes = {}
+    for label, glyph in glyphs.items():
+        extents = glyph.get_extents().padded(pad * fontsize)
+        boxes[label] = Path.unit_rectangle().transformed(
+            Affine2D().scale(extents.width, extents.height).translate(extents.x0, extents.y0)
         )
-        edge_label = {(source, target): edge_weights[(source, target)]}
-        nx.draw_networkx_edge_labels(
-            G=graph,
-            pos=pos,
-            edge_labels=edge_label,
-            connectionstyle=f'arc3,rad={rad}',
-            font_size=12,
-            font_color=colors[source],
-            font_weight='bold',
-            bbox=dict(facecolor='white', alpha=0.7, edgecolor='none', pad=0.3),
-            rotate=False,
-            node_size=2000 if source != target else 2000 * 0.3
+    return PathCollection(
+        [boxes[label] for label in labels],
+        offsets=np.column_stack([x, y]),
+        offset_transform=ax.transData,
+        transform=Affine2D().scale(1 / 72) + ax.figure.dpi_scale_trans,
+        facecolors=color,
+        linewidths=0,
+        **kwargs,
+    )
+
+
+def choropleth_plot(
+    layer,
+    save_path: str,
+    colors: pd.Series,
+    labels: pd.Series | None = None,
+    label_offsets: dict | None = None,
+    key: str = "name",
+    plot_title: str = "",
+    edgecolor: str = "black",
+    linewidth: float = 0.5,
+    fontsize: float = 20,
+    figsize: tuple = (20, 10),
+    dpi: int = 300,
+):
+    """
+    Plot a layer with one fill color per row and a label at its label point.
+
+    All the polygons are drawn as a single collection, with their fills and
+    edges, and all the labels as another one, so the cost grows with the
+    number of vertices and not with one artist per region (thousands of
+    counties or admin-1 regions).
+
+    Args:
+        layer: The GeoDataFrame, with the label_x and label_y columns (see load_layer).
+        save_path: The path to save the plot.
+        colors: The fill color of each row, aligned with layer. Missing values are not filled.
+        labels: The label of each row, aligned with layer. Missing values are not labeled.
+        label_offsets: Shifts (dx, dy) of some labels, by the value of key.
+        key: The column with the names used in label_offsets.
+        plot_title: The title of the plot.
+        edgecolor: The color of the borders.
+        linewidth: The width of the borders.
+        fontsize: The size of the labels.
+        figsize: The size of the figure.
+        dpi: The resolution of the saved image.
+    """
+    fig, ax = plt.subplots(nrows=1, ncols=1, figsize=figsize)
+    paths, owners = _polygon_paths(layer.geometry.values)
+    filled = colors.notna().to_numpy()
+    facecolors = np.zeros((len(layer), 4))
+    facecolors[filled] = to_rgba_array(colors[filled].tolist())
+    ax.add_collection(
+        PathCollection(paths, facecolors=facecolors[owners], edgecolors=edgecolor, linewidths=linewidth)
+    )
+    # Como geopandas: en coordenadas geográficas un grado de longitud se achica con la latitud
+    if layer.crs is not None and layer.crs.is_geographic:
+        minx, miny, maxx, maxy = layer.total_bounds
+        ax.set_aspect(1 / np.cos(np.deg2rad((miny + maxy) / 2)))
+    ax.autoscale_view()
+
+    if labels is not None:
+        labeled = labels.notna().to_numpy() & layer["label_x"].notna().to_numpy() & layer["label_y"].notna().to_numpy()
+        offsets = pd.DataFrame.from_dict(label_offsets or {}, orient="index", columns=["dx", "dy"])
+        shift = offsets.reindex(layer[key][labeled]).fillna(0).to_numpy()
+        ax.add_collection(
+            _label_collection(
+                ax,
+                layer["label_x"].to_numpy()[labeled] + shift[:, 0],
+                layer["label_y"].to_numpy()[labeled] + shift[:, 1],
+                labels[labeled].astype(str).to_numpy(),
+                fontsize=fontsize,
+                color="black",
+                weight="bold",
+            ),
+            autolim=False,
         )
-    fig.suptitle(t=plot_title, fontweight='bold')
-    ax.spines['top'].set_visible(False)
-    ax.spines['bottom'].set_visible(False)
-    ax.spines['left'].set_visible(False)
-    ax.spines['right'].set_visible(False)
+
+    ax.set_title(plot_title, fontsize=24, fontweight="bold")
+    ax.axis("off")
+    fig.savefig(save_path, dpi=dpi)
+    plt.close(fig)
+
+
+# Etiquetas que se corren para que no se superpongan con los bordes o con otras
+STATE_LABEL_OFFSETS = {
+    "New Jersey": (0.3, -0.3),
+    "New Hampshire": (0.3, -0.4),
+    "Vermont": (0.0, 0.3),
+    "Michigan": (0.5, -0.3),
+    "Florida": (0.5, -0.3),
+    "Delaware": (0.5, -0.3),
+}
+
+
+def states_map_plot(all_states: pd.DataFrame, save_path: str, color_map: dict):
+    # Los estados con ganador se pintan de su color y llevan "demócratas/republicanos"
+    has_winner = all_states["winner"].notna()
+    choropleth_plot(
+        layer=all_states,
+        save_path=save_path,
+        colors=all_states["winner"].map(color_map),
+        labels=(all_states["dem_count"].astype(str) + "/" + all_states["rep_count"].astype(str)).where(has_winner),
+        label_offsets=STATE_LABEL_OFFSETS,
+        plot_title="Estados Coloreados por el Partido con más Discursos\n(Demócrata/Republicano)",
+    )
+
+
+def news_channel_plot(df: pd.DataFrame, save_path: str, color: list):
+    fig, ax = plt.subplots(figsize=(10, 5))
+    df.plot(
+        kind="bar",
+        stacked=True,
+        color=color,
+        ax=ax,
+    )
+    fig.suptitle(
+        t="Distribución de Discursos por Partido y Canal de Noticias",
+        fontweight="bold",
+    )
+    ax.set_xlabel("Canal de Noticias")
+    ax.set_xticklabels(ax.get_xticklabels(), rotation=0)
+    ax.set_ylabel("Cantidad de Discursos")
+    ax.legend(
+        title=None,
+        loc="upper center",
+        bbox_to_anchor=(0.5, 1.05),
+        ncol=2,
+        frameon=False,
+    )
+    ax.yaxis.grid(visible=True, linestyle="--", alpha=0.6)
+    ax.set_axisbelow(True)
+    ax.spines["top"].set_visible(False)
+    ax.spines["right"].set_visible(False)
     fig.tight_layout()
-    fig.savefig(fname=save_path, dpi=300)
+    fig.savefig(fname=save_path, dpi=300, bbox_inches="tight")
     plt.close(fig)
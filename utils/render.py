@@ -0,0 +1,104 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+
+def render_now(func, **kwargs) -> float:
+    """
+    Render a figure in the current process.
+
+    Args:
+        func: The plot function, e.g. stacked_bar_plot.
+        **kwargs: The arguments of the plot function, with the data already aggregated.
+
+    Returns:
+        The seconds spent rendering.
+    """
+    start = time.perf_counter()
+    func(**kwargs)
+    return time.perf_counter() - start
+
+
+def _render_job(func, kwargs: dict, rc_params: dict) -> float:
+    # Cada worker usa un backend sin ventanas y la misma configuración que el proceso principal
+    matplotlib.use("Agg")
+    matplotlib.rcParams.update(rc_params)
+    # Ids fijos en los SVG para que la salida no dependa del proceso
+    matplotlib.rcParams["svg.hashsalt"] = "render"
+    return render_now(func, **kwargs)
+
+
+def _changed_rc_params() -> dict:
+    # Solo lo que se cambió respecto a la configuración inicial (por ejemplo la fuente LaTeX)
+    return {
+        key: value
+        for key, value in matplotlib.rcParams.items()
+        if key != "backend" and matplotlib.rcParamsOrig.get(key) != value
+    }
+
+
+class RenderScheduler:
+    """
+    Collect figure jobs and render them across a process pool.
+
+    Each job is a plot function plus its already-aggregated data, so workers
+    only draw and save. Workers are forked when the platform supports it
+    (scripts such as tarea_1.py are not re-executed); elsewhere the jobs run
+    one after another unless mp_context is given, in which case the caller
+    must be guarded by `if __name__ == "__main__":`.
+
+    Args:
+        workers: The number of worker processes. All the CPUs if None; 1 renders serially.
+        rc_params: The matplotlib settings for the workers. The ones changed in this process if None.
+        mp_context: The multiprocessing start method, e.g. "spawn".
+    """
+
+    def __init__(self, workers: int | None = None, rc_params: dict | None = None, mp_context: str | None = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.rc_params = rc_params
+        self.mp_context = mp_context
+        self.jobs = []
+
+    def add(self, func, **kwargs):
+        """
+        Queue a figure job.
+
+        Args:
+            func: The plot function.
+            **kwargs: The arguments of the plot function.
+        """
+        self.jobs.append((func, kwargs))
+
+    def _context(self):
+        if self.mp_context is not None:
+            return multiprocessing.get_context(self.mp_context)
+        if "fork" in multiprocessing.get_all_start_methods():
+            return multiprocessing.get_context("fork")
+        return None
+
+    def run(self) -> list:
+        """
+        Render every queued job and empty the queue.
+
+        Returns:
+            A list of dicts with the plot function, the save path and the seconds of each job.
+        """
+        jobs, self.jobs = self.jobs, []
+        context = self._context()
+        workers = min(self.workers, len(jobs))
+
+        if workers <= 1 or context is None:
+            seconds = [render_now(func, **kwargs) for func, kwargs in jobs]
+        else:
+            rc_params = self.rc_params if self.rc_params is not None else _changed_rc_params()
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                futures = [executor.submit(_render_job, func, kwargs, rc_params) for func, kwargs in jobs]
+                seconds = [future.result() for future in futures]
+
+        return [
+            {"plot": func.__name__, "save_path": kwargs.get("save_path"), "seconds": s}
+            for (func, kwargs), s in zip(jobs, seconds)
+        ]
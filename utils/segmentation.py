@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Marcas a eliminar en una sola pasada:
+#   - lo que está entre [] como [crosstalk...], [inaudible...], etc.
+#   - el comercial que rompe la separación de intervenciones en el discurso 79
+#   - los patrones ': (mm:ss)' y ': (hh:mm:ss)'
+MARKUP_PATTERN = r"\[.*?\]|Commercial: \(48:14\)\n|: \(\d{2}:\d{2}(?::\d{2})?\)"
+
+# Separador entre orador e intervención (a veces hay una línea con un \xa0 en el medio)
+TURN_SEPARATOR_PATTERN = r"\n(?:\xa0\n)?"
+
+
+def segment_turns(df: pd.DataFrame, text_column: str = "text") -> pd.DataFrame:
+    """
+    Split every transcript into a flat table with one row per speaker turn.
+
+    Line endings are normalized once (no platform-dependent regex), the markup
+    is stripped in a single regex pass and the orator/text lines are paired
+    with Arrow list kernels, without building Python lists or tuples.
+
+    Args:
+        df: The DataFrame with one transcript per row.
+        text_column: The column with the transcripts.
+
+    Returns:
+        A DataFrame with the columns speech_id (the index of df), turn_index,
+        speaker and text. Transcripts without a complete orator/text pair
+        produce no rows.
+    """
+    arr = pa.array(df[text_column], type=pa.large_string(), from_pandas=True)
+    arr = pc.replace_substring(arr, pattern="\r\n", replacement="\n")
+    arr = pc.replace_substring(arr, pattern="\r", replacement="\n")
+    arr = pc.replace_substring_regex(arr, pattern=MARKUP_PATTERN, replacement="")
+    lines = pc.split_pattern_regex(arr, pattern=TURN_SEPARATOR_PATTERN)
+
+    # Posición de cada línea dentro de su discurso
+    parents = pc.list_parent_indices(lines).to_numpy()
+    offsets = lines.offsets.to_numpy()
+    values = pc.list_flatten(lines)
+    position = np.arange(len(parents)) - (offsets[parents] - offsets[0])
+
+    # Las líneas pares son el orador y las impares su intervención; si sobra una línea se descarta
+    lengths = pc.list_value_length(lines).fill_null(0).to_numpy()
+    speaker_idx = np.flatnonzero((position % 2 == 0) & (position + 1 < lengths[parents]))
+
+    return pa.table(
+        {
+            "speech_id": df.index.to_numpy()[parents[speaker_idx]],
+            "turn_index": position[speaker_idx] // 2,
+            "speaker": values.take(speaker_idx),
+            "text": values.take(speaker_idx + 1),
+        }
+    ).to_pandas()
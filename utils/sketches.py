@@ -0,0 +1,346 @@
+import math
+
+import numpy as np
+
+
+def _as_keys(keys) -> np.ndarray:
+    return np.asarray(keys, dtype=np.uint64)
+
+
+class CountMinSketch:
+    """
+    Approximate counts of 64-bit keys in a fixed table of depth x width counters.
+
+    Every key adds its count to one counter per row, chosen by a different
+    multiply-shift hash, and its estimate is the smallest of its counters. The
+    estimate never undercounts and, with probability at least 1 - delta,
+    overcounts by at most epsilon * total, where epsilon = e / width and
+    delta = exp(-depth). Two sketches with the same shape and seed add up.
+
+    Args:
+        width: The number of counters per row.
+        depth: The number of rows (hash functions).
+        seed: The seed of the hash functions.
+    """
+
+    def __init__(self, width: int = 2719, depth: int = 7, seed: int = 0):
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        # Multiplicadores impares y sumandos al azar, uno por fila
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2**63, size=depth, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=depth, dtype=np.uint64)
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+
+    @classmethod
+    def from_error(cls, epsilon: float = 1e-3, delta: float = 1e-3, seed: int = 0) -> "CountMinSketch":
+        """
+        Size a sketch for an error bound.
+
+        Args:
+            epsilon: The maximum overcount, as a fraction of the total count.
+            delta: The probability of exceeding it.
+            seed: The seed of the hash functions.
+
+        Returns:
+            An empty sketch.
+        """
+        return cls(width=math.ceil(math.e / epsilon), depth=math.ceil(math.log(1 / delta)), seed=seed)
+
+    @property
+    def epsilon(self) -> float:
+        return math.e / self.width
+
+    @property
+    def delta(self) -> float:
+        return math.exp(-self.depth)
+
+    def _columns(self, keys: np.ndarray) -> np.ndarray:
+        # Multiply-shift: los 32 bits altos de a * key + b (módulo 2**64), llevados a [0, width)
+        hashed = (self._a[:, None] * keys[None, :] + self._b[:, None]) >> np.uint64(32)
+        return (hashed % np.uint64(self.width)).astype(np.int64)
+
+    def update(self, keys, counts=None):
+        """
+        Add the counts of some keys.
+
+        Args:
+            keys: The keys, as unsigned 64-bit integers.
+            counts: The count of each key. One each if None.
+        """
+        keys = _as_keys(keys)
+        counts = np.ones(len(keys), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        for row, columns in enumerate(self._columns(keys)):
+            self.table[row] += np.bincount(columns, weights=counts, minlength=self.width).astype(np.int64)
+        self.total += int(counts.sum())
+
+    def estimate(self, keys) -> np.ndarray:
+        """
+        Estimate the counts of some keys.
+
+        Args:
+            keys: The keys.
+
+        Returns:
+            An upper bound of the count of each key, see the class docstring for its error.
+        """
+        columns = self._columns(_as_keys(keys))
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":
+        """
+        Add up two sketches of the same shape and seed.
+
+        Args:
+            other: The other sketch.
+
+        Returns:
+            The sketch of both streams together.
+        """
+        if (self.width, self.depth, self.seed) != (other.width, other.depth, other.seed):
+            raise ValueError("Only sketches with the same width, depth and seed can be merged")
+        merged = CountMinSketch(width=self.width, depth=self.depth, seed=self.seed)
+        merged.table = self.table + other.table
+        merged.total = self.total + other.total
+        return merged
+
+
+class HyperLogLog:
+    """
+    Approximate number of distinct 64-bit keys, in 2 ** precision one-byte registers.
+
+    The first precision bits of a key choose a register, which keeps the
+    largest position of the first 1 bit among the rest of the bits of its
+    keys. The relative error of the estimate is about 1.04 / sqrt(2 ** precision),
+    1.6% with the default precision, and the memory is the same for ten or a
+    billion keys. Two sketches with the same precision merge into the sketch
+    of the union. The keys should already be hashes, like those of
+    pd.util.hash_array.
+
+    Args:
+        precision: The number of bits that choose the register, from 4 to 18.
+    """
+
+    def __init__(self, precision: int = 12):
+        if not 4 <= precision <= 18:
+            raise ValueError("The precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @classmethod
+    def from_groups(cls, keys, groups, n_groups: int, precision: int = 12, positions=None) -> list:
+        """
+        Build one sketch per group in a single pass over the keys.
+
+        Args:
+            keys: The keys, as unsigned 64-bit integers.
+            groups: The group of each key, from 0 to n_groups - 1.
+            n_groups: The number of groups.
+            precision: The precision of the sketches.
+            positions: If given, the elements are keys[positions] and groups is
+                aligned with positions, like the words of a dictionary-encoded
+                text, so each distinct key is processed once.
+
+        Returns:
+            The sketch of each group.
+        """
+        registers, ranks = _locate(_as_keys(keys), precision)
+        if positions is not None:
+            registers, ranks = registers[positions], ranks[positions]
+        table = np.zeros((n_groups, 1 << precision), dtype=np.uint8)
+        np.maximum.at(table.reshape(-1), np.asarray(groups, dtype=np.int64) << precision | registers, ranks)
+        sketches = [cls(precision=precision) for _ in range(n_groups)]
+        for sketch, row in zip(sketches, table):
+            sketch.registers = row
+        return sketches
+
+    @property
+    def error(self) -> float:
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def update(self, keys):
+        """
+        Add some keys, repeated or not.
+
+        Args:
+            keys: The keys, as unsigned 64-bit integers.
+        """
+        registers, ranks = _locate(_as_keys(keys), self.precision)
+        np.maximum.at(self.registers, registers, ranks)
+
+    def estimate(self) -> float:
+        """
+        Estimate the number of distinct keys.
+
+        Returns:
+            The estimate, see the class docstring for its error.
+        """
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.ldexp(1.0, -self.registers.astype(np.int64)).sum()
+        zeros = int((self.registers == 0).sum())
+        # Con pocas claves hay registros vacíos y el conteo lineal es más preciso
+        if estimate <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)
+        return float(estimate)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """
+        Combine two sketches of the same precision.
+
+        Args:
+            other: The other sketch.
+
+        Returns:
+            The sketch of the union of both sets of keys.
+        """
+        if self.precision != other.precision:
+            raise ValueError("Only sketches with the same precision can be merged")
+        merged = HyperLogLog(precision=self.precision)
+        merged.registers = np.maximum(self.registers, other.registers)
+        return merged
+
+
+class HeavyHitters:
+    """
+    The most frequent keys of a stream, with at most capacity counters (Misra-Gries).
+
+    When there are more than capacity keys, the (capacity + 1)-th largest count
+    is subtracted from every counter and the ones that reach zero are dropped.
+    So every counter is a lower bound of the true count, off by at most error,
+    which never exceeds total / (capacity + 1): any key more frequent than that
+    is always kept. Summaries add up like the streams (mergeable summaries), so
+    batches or chunks can be summarized separately and merged. Each key can
+    carry a label, like the text of an n-gram.
+
+    Args:
+        capacity: The maximum number of counters.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.labels = np.empty(0, dtype=object)
+        self.total = 0
+        self.error = 0
+
+    @classmethod
+    def from_counts(cls, keys, counts, labels=None, capacity: int = 1000) -> "HeavyHitters":
+        """
+        Summarize exact counts of distinct keys, like the counts of one batch.
+
+        Args:
+            keys: The distinct keys.
+            counts: The count of each key.
+            labels: The label of each key. None to leave them empty, or a function
+                that receives the positions of the kept keys and returns their labels,
+                so only those have to be built.
+            capacity: The maximum number of counters.
+
+        Returns:
+            The summary.
+        """
+        summary = cls(capacity=capacity)
+        keys, counts = _as_keys(keys), np.asarray(counts, dtype=np.int64)
+        summary.total = int(counts.sum())
+        positions, summary.error = _reduce(counts, capacity)
+        summary.keys, summary.counts = keys[positions], counts[positions] - summary.error
+        if callable(labels):
+            summary.labels = np.asarray(labels(positions), dtype=object)
+        elif labels is not None:
+            summary.labels = np.asarray(labels, dtype=object)[positions]
+        else:
+            summary.labels = np.full(len(positions), None, dtype=object)
+        return summary
+
+    def update(self, keys, counts, labels=None):
+        """
+        Add exact counts of distinct keys, like the counts of one batch, reducing only once.
+
+        Args:
+            keys: The distinct keys.
+            counts: The count of each key.
+            labels: The label of each key, or a function that receives the positions
+                (in keys) of the new keys that are kept and returns their labels.
+        """
+        keys, counts = _as_keys(keys), np.asarray(counts, dtype=np.int64)
+        combined, inverse = np.unique(np.concatenate([self.keys, keys]), return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate([self.counts, counts]), minlength=len(combined))
+        positions, threshold = _reduce(totals.astype(np.int64), self.capacity)
+
+        # Las claves que ya estaban conservan su etiqueta, las nuevas que quedan la toman de labels
+        known = np.zeros(len(combined), dtype=bool)
+        known[inverse[: len(self.keys)]] = True
+        combined_labels = np.full(len(combined), None, dtype=object)
+        combined_labels[inverse[: len(self.keys)]] = self.labels
+        new = positions[~known[positions]]
+        if labels is not None and len(new):
+            batch_positions = np.empty(len(combined), dtype=np.int64)
+            batch_positions[inverse[len(self.keys) :]] = np.arange(len(keys))
+            if callable(labels):
+                combined_labels[new] = np.asarray(labels(batch_positions[new]), dtype=object)
+            else:
+                combined_labels[new] = np.asarray(labels, dtype=object)[batch_positions[new]]
+
+        self.keys = combined[positions]
+        self.counts = totals[positions].astype(np.int64) - threshold
+        self.labels = combined_labels[positions]
+        self.total += int(counts.sum())
+        self.error += threshold
+
+    def merge(self, other: "HeavyHitters") -> "HeavyHitters":
+        """
+        Add up two summaries.
+
+        Args:
+            other: The other summary.
+
+        Returns:
+            The summary of both streams, with the capacity of this one.
+        """
+        keys, inverse = np.unique(np.concatenate([self.keys, other.keys]), return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate([self.counts, other.counts]), minlength=len(keys))
+        labels = np.empty(len(keys), dtype=object)
+        labels[inverse] = np.concatenate([self.labels, other.labels])
+
+        merged = HeavyHitters(capacity=self.capacity)
+        positions, threshold = _reduce(counts.astype(np.int64), self.capacity)
+        merged.keys, merged.counts, merged.labels = keys[positions], counts[positions].astype(np.int64) - threshold, labels[positions]
+        merged.total = self.total + other.total
+        merged.error = self.error + other.error + threshold
+        return merged
+
+    def top(self, k: int | None = None) -> tuple:
+        """
+        Get the keys with the largest counters.
+
+        Args:
+            k: The number of keys. All the counters if None.
+
+        Returns:
+            The keys, their lower bounds and their labels, from most to least frequent.
+        """
+        # Orden estable: a igual cuenta queda la clave menor, así el resultado no depende del orden de los lotes
+        order = np.lexsort((self.keys, -self.counts))[:k]
+        return self.keys[order], self.counts[order], self.labels[order]
+
+
+def _locate(keys: np.ndarray, precision: int) -> tuple:
+    # Registro de cada clave (sus primeros bits) y posición del primer 1 en el resto, contando desde 1
+    registers = (keys >> np.uint64(64 - precision)).astype(np.int64)
+    rest = keys << np.uint64(precision)
+    # 64 - exponente, con los 32 bits altos y bajos por separado para que el pasaje a float sea exacto
+    high, low = (rest >> np.uint64(32)).astype(np.float64), (rest & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    ranks = np.where(high > 0, 33 - np.frexp(high)[1], 65 - np.frexp(low)[1])
+    return registers, np.minimum(ranks, 65 - precision).astype(np.uint8)
+
+
+def _reduce(counts: np.ndarray, capacity: int) -> tuple:
+    # Posiciones que quedan tras restar la cuenta (capacity + 1)-ésima, y lo que se restó
+    if len(counts) <= capacity:
+        return np.flatnonzero(counts > 0), 0
+    threshold = int(np.partition(counts, len(counts) - capacity - 1)[len(counts) - capacity - 1])
+    return np.flatnonzero(counts > threshold), threshold
@@ -0,0 +1,211 @@
+import difflib
+import re
+import time
+from functools import lru_cache
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from utils.constants import POLITICIANS, SPEAKER_NAMES
+
+# Títulos que se sacan del principio del nombre ("Vice President Mike Pence" -> "mike pence")
+TITLE_PATTERN = re.compile(
+    r"^(?:(?:former|vice|president|senator|sen\.|governor|gov\.|mayor|rep\.|representative"
+    r"|congressman|congresswoman|secretary|mr\.|mrs\.|ms\.|dr\.)\s+)+",
+    flags=re.IGNORECASE,
+)
+# Iniciales del segundo nombre ("Donald J. Trump" -> "donald trump")
+INITIAL_PATTERN = re.compile(r"\b\w\.\s+")
+# Sufijos del nombre ("Robert F. Kennedy Jr." -> "robert kennedy jr"), que se sacan solo si sin ellos es un nombre
+# conocido: "Donald Trump Jr." no es "Donald Trump"
+SUFFIX_PATTERN = re.compile(r",?\s+(jr|sr|ii|iii|iv)\.?$", flags=re.IGNORECASE)
+# Tratamientos con los que el apellido solo no alcanza ("Dr. Biden" es Jill Biden, no Joe Biden)
+HONORIFIC_PATTERN = re.compile(r"^(?:mr|mrs|ms|dr)\.?\s", flags=re.IGNORECASE)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def speaker_key(name: str) -> str:
+    """
+    Reduce a speaker name to the key used to look it up in the registry.
+
+    Args:
+        name: The raw name, as written in the transcripts.
+
+    Returns:
+        The name in lower case, without titles, middle initials or extra spaces,
+        and with its suffix (if any) written as " jr", " sr", " ii"...
+    """
+    name = WHITESPACE_PATTERN.sub(" ", name.replace("’", "'")).strip()
+    name = INITIAL_PATTERN.sub("", TITLE_PATTERN.sub("", name))
+    return SUFFIX_PATTERN.sub(r" \1", name).lower()
+
+
+def strip_suffix(key: str) -> str:
+    """
+    Remove the suffix of a speaker key ("robert kennedy jr" -> "robert kennedy").
+
+    Args:
+        key: A key made by speaker_key.
+
+    Returns:
+        The key without its suffix.
+    """
+    return SUFFIX_PATTERN.sub("", key)
+
+
+class SpeakerRegistry:
+    """
+    Map the many ways a speaker is written to a single canonical name.
+
+    A name is resolved by its key (see speaker_key) through the aliases and the
+    canonical names, first with its suffix and then without it, then by surname
+    when only one canonical name without suffix has it, and finally by fuzzy
+    matching against the same keys. A surname after Mr., Mrs., Ms. or Dr. is
+    not resolved, and names that match nothing are kept with their whitespace
+    normalized. Every distinct raw name
+    is resolved once and remembered, and columns are canonicalized through
+    their categorical codes, so the cost depends on the distinct names and not
+    on the number of rows.
+
+    Args:
+        canonical: The canonical names.
+        aliases: Extra spellings, mapped to their canonical name.
+        cutoff: The minimum difflib similarity for a fuzzy match, None to disable it.
+        surnames: Whether a surname alone resolves to the only canonical name with it.
+
+    Raises:
+        ValueError: If two canonical names have the same key.
+    """
+
+    def __init__(self, canonical: list, aliases: dict | None = None, cutoff: float | None = 0.9, surnames: bool = True):
+        self.cutoff = cutoff
+        self.index = {}
+        for name in canonical:
+            key = speaker_key(name)
+            if self.index.get(key, name) != name:
+                raise ValueError(f"{name!r} y {self.index[key]!r} tienen la misma clave {key!r}")
+            self.index[key] = str(name)
+        self.index.update({speaker_key(alias): str(name) for alias, name in (aliases or {}).items()})
+
+        self.surnames = {}
+        if surnames:
+            # Los nombres con sufijo no se buscan por apellido: "Trump" es Donald Trump y no Donald Trump Jr.
+            unsuffixed = [str(name) for name in canonical if strip_suffix(speaker_key(name)) == speaker_key(name)]
+            surname_keys = pd.Series([speaker_key(name).split(" ")[-1] for name in unsuffixed])
+            unique = ~surname_keys.duplicated(keep=False)
+            self.surnames = {
+                surname: name
+                for surname, name, keep in zip(surname_keys, unsuffixed, unique)
+                if keep and surname not in self.index
+            }
+        self._keys = list(self.index)
+        self._resolved = {}
+        self.report = {}
+
+    def _lookup(self, name: str) -> str | None:
+        key = speaker_key(name)
+        # "Dr. Biden" o "Mrs. Trump" solo con el apellido pueden ser cualquiera de la familia
+        if not key or (" " not in key and HONORIFIC_PATTERN.match(WHITESPACE_PATTERN.sub(" ", name).strip())):
+            return None
+        if key in self.index:
+            return self.index[key]
+        if strip_suffix(key) in self.index:
+            return self.index[strip_suffix(key)]
+        if key in self.surnames:
+            return self.surnames[key]
+        if self.cutoff is None:
+            return None
+        match = difflib.get_close_matches(key, self._keys + list(self.surnames), n=1, cutoff=self.cutoff)
+        return (self.index.get(match[0]) or self.surnames[match[0]]) if match else None
+
+    def resolve(self, name: str) -> str:
+        """
+        Get the canonical name of a speaker.
+
+        Args:
+            name: The raw name.
+
+        Returns:
+            The canonical name, or the name with its whitespace normalized if nothing matches.
+        """
+        if name not in self._resolved:
+            self._resolved[name] = self._lookup(name) or WHITESPACE_PATTERN.sub(" ", name).strip()
+        return self._resolved[name]
+
+    def canonicalize(self, speakers: pd.Series) -> pd.Series:
+        """
+        Canonicalize a column of speaker names.
+
+        Args:
+            speakers: The raw names, missing values are kept.
+
+        Returns:
+            A categorical Series with the canonical names, aligned with speakers.
+        """
+        start = time.perf_counter()
+        codes, uniques = pd.factorize(speakers)
+        resolved = np.array([self.resolve(name) for name in uniques], dtype=object)
+        categories, new_codes = np.unique(resolved, return_inverse=True)
+        # El último lugar es para los valores faltantes, que factorize marca con -1
+        codes = np.append(new_codes, -1)[codes]
+        self.report = {
+            "rows": len(speakers),
+            "raw": len(uniques),
+            "canonical": len(categories),
+            "seconds": time.perf_counter() - start,
+        }
+        return pd.Series(
+            pd.Categorical.from_codes(codes, categories=categories),
+            index=speakers.index,
+            name=speakers.name,
+        )
+
+    def explode(self, speakers: pd.Series, sep: str = ",") -> pd.Series:
+        """
+        Split the rows with several speakers ("Joe Biden, Kamala Harris") into one row each.
+
+        Args:
+            speakers: The raw names, missing values are kept as one row.
+            sep: The separator between speakers.
+
+        Returns:
+            A categorical Series with one canonical name per row, with the index of
+            speakers repeated like DataFrame.explode.
+        """
+        codes, uniques = pd.factorize(speakers)
+        parts = [[self.resolve(part) for part in name.split(sep) if part.strip()] or [self.resolve(name)] for name in uniques]
+        categories, part_codes = np.unique(np.array(list(chain.from_iterable(parts)), dtype=object), return_inverse=True)
+
+        # El último tramo es para los valores faltantes, que factorize marca con -1
+        lengths = np.array([len(p) for p in parts] + [1])
+        part_codes = np.append(part_codes, -1)
+        offsets = np.cumsum(lengths) - lengths
+        # Cada fila copia el tramo de part_codes de su nombre, de offsets[code] a offsets[code] + lengths[code]
+        row_lengths = lengths[codes]
+        starts = np.repeat(offsets[codes], row_lengths)
+        within = np.arange(row_lengths.sum()) - np.repeat(np.cumsum(row_lengths) - row_lengths, row_lengths)
+        return pd.Series(
+            pd.Categorical.from_codes(part_codes[starts + within], categories=categories),
+            index=speakers.index.repeat(row_lengths),
+            name=speakers.name,
+        )
+
+    def print_report(self):
+        print(
+            f"{self.report['rows']} filas, {self.report['raw']} nombres distintos -> "
+            f"{self.report['canonical']} canónicos "
+            f"({1 - self.report['canonical'] / max(self.report['raw'], 1):.0%} menos) "
+            f"en {self.report['seconds'] * 1000:.1f} ms"
+        )
+
+
+@lru_cache(maxsize=None)
+def speaker_registry() -> SpeakerRegistry:
+    """
+    Get the registry of the politicians in constants, shared by all the analyses.
+
+    Returns:
+        A registry with POLITICIANS as canonical names and SPEAKER_NAMES as aliases.
+    """
+    return SpeakerRegistry(canonical=POLITICIANS, aliases=SPEAKER_NAMES)
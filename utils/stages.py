@@ -0,0 +1,437 @@
+# Etapas del análisis de tarea_1.py como un pipeline con caché
+#
+# Uso:
+#   export PYTHONPATH=$PYTHONPATH:$(pwd)
+#   python utils/stages.py [--chunksize 1000] [--text-workers 4]
+import argparse
+import locale
+from pathlib import Path
+
+import pandas as pd
+
+from utils import location_analysis
+from utils.clean_data import normalize_text, wordcloud_stopwords
+from utils.compact import compact_speeches, compact_turns, with_metadata
+from utils.constants import (
+    CANDIDATE_COLORS,
+    CANDIDATE_ORDER,
+    CANDIDATE_ORDER_COLORS,
+    EXTRA_STOPWORDS,
+    MENTIONS,
+    OTHERS_COLOR,
+    PARTIES,
+    POLITICIANS,
+    RC_PARAMS,
+    SPEAKER_NAMES,
+)
+from utils.load_data import DATA_PATH, load_speeches
+from utils.mentions import MentionCounter
+from utils.pipeline import CACHE_DIR, Pipeline, Stage
+from utils.segmentation import segment_turns
+from utils.speakers import SpeakerRegistry
+from utils.time_buckets import count_speeches
+
+# Los módulos que usan scipy (dtm, distinctive, streaming) o procesos (parallel) se importan dentro de las
+# etapas que los necesitan, así los subcomandos de python -m utils que no las corren no los cargan
+
+IMAGES = [
+    "img/speaker_analysis.png",
+    "img/discursos_candidatos_por_semana.png",
+    "img/wordcloud_por_candidato.png",
+    "img/wordcloud_distintivas_por_candidato.png",
+    "img/graph.png",
+    "img/discursos_candidatos_por_semana_2.png",
+    "img/states_map.png",
+    "img/news_channel_dist.png",
+]
+
+
+def load(path: str, compact: bool) -> pd.DataFrame:
+    df = load_speeches(path=path)
+    return compact_speeches(df) if compact else df
+
+
+def _segment_turns(df: pd.DataFrame, workers: int) -> pd.DataFrame:
+    # Con más de un worker el texto se procesa por shards en paralelo, con el mismo resultado
+    if workers <= 1:
+        return segment_turns(df=df)
+    from utils.parallel import ShardedExecutor, sharded_segment_turns
+
+    return sharded_segment_turns(df=df, executor=ShardedExecutor(workers))
+
+
+def segment(load: pd.DataFrame, compact: bool, workers: int) -> pd.DataFrame:
+    if compact:
+        # Las intervenciones solo llevan la fecha, el resto de los datos del discurso queda en load
+        turns = compact_turns(_segment_turns(df=load, workers=workers)).drop(columns="turn_index")
+        return with_metadata(turns=turns, speeches=load, columns=["date"])
+    # Una fila por intervención con los datos del discurso y el index del discurso
+    return (
+        _segment_turns(df=load, workers=workers)
+        .drop(columns="turn_index")
+        .join(load.drop(columns=["speaker", "text"]), on="speech_id")
+        .set_index("speech_id")
+        .rename_axis(None)
+    )
+
+
+def normalize_names(segment: pd.DataFrame, canonical: list, aliases: dict) -> pd.DataFrame:
+    df = segment.copy()
+    df["speaker"] = SpeakerRegistry(canonical=canonical, aliases=aliases).canonicalize(df["speaker"])
+    return df
+
+
+def top_speakers(load: pd.DataFrame, n: int) -> list:
+    return list(load.groupby("speaker").size().sort_values(ascending=False).head(n).index)
+
+
+def clean_text(
+    normalize_names: pd.DataFrame, top_speakers: list, parties: dict, unicode: bool, workers: int
+) -> pd.DataFrame:
+    df = normalize_names[normalize_names["speaker"].isin(top_speakers)].copy()
+    df["party"] = df["speaker"].map(parties)
+    if workers <= 1:
+        df["clean_text"] = normalize_text(df=df, column_name="text", unicode=unicode)
+    else:
+        from utils.parallel import ShardedExecutor, sharded_normalize_text
+
+        df["clean_text"] = sharded_normalize_text(
+            df=df, column_name="text", executor=ShardedExecutor(workers), unicode=unicode
+        )
+    return df
+
+
+def dtm(clean_text: pd.DataFrame, workers: int) -> "DocumentTermMatrix":
+    from utils.dtm import DocumentTermMatrix
+
+    if workers <= 1:
+        return DocumentTermMatrix.from_texts(clean_text["clean_text"])
+    from utils.parallel import ShardedExecutor, sharded_document_term_matrix
+
+    return sharded_document_term_matrix(texts=clean_text["clean_text"], executor=ShardedExecutor(workers))
+
+
+def aggregate(
+    load: pd.DataFrame,
+    normalize_names: pd.DataFrame,
+    clean_text: pd.DataFrame,
+    dtm: "DocumentTermMatrix",
+    top_speakers: list,
+    politicians: list,
+    stopwords: list,
+    max_words: int,
+) -> dict:
+    from utils.distinctive import log_odds
+
+    others = normalize_names[normalize_names["speaker"].isin(politicians)].copy()
+    others["speaker_2"] = others["speaker"].astype("str").where(others["speaker"].isin(top_speakers), "Otros")
+    dtm_speakers = dtm.groupby(clean_text["speaker"])
+    return {
+        "n_speeches": load.groupby("speaker").size().sort_values(ascending=False),
+        "weekly": count_speeches(df=clean_text, by="speaker", freq="week"),
+        "weekly_others": count_speeches(df=others, by="speaker_2", freq="week"),
+        "word_frequencies": dtm_speakers.top_terms(k=max_words, exclude=wordcloud_stopwords() | set(stopwords))
+        .rename_axis("speaker")
+        .reset_index(),
+        "n_words": dtm_speakers.n_words().sort_values(ascending=False),
+        "distinctive_frequencies": log_odds(dtm_speakers).top_terms(k=max_words)
+        .rename_axis("speaker")
+        .reset_index(),
+    }
+
+
+def mentions(clean_text: pd.DataFrame, top_speakers: list, aliases: dict, mode: str) -> pd.DataFrame:
+    return MentionCounter(aliases=aliases).matrix(
+        texts=clean_text["clean_text"],
+        speakers=clean_text["speaker"],
+        index=top_speakers,
+        mode=mode,
+    )[top_speakers]
+
+
+def location(path: str) -> dict:
+    return location_analysis.aggregate(
+        df=load_speeches(path=path, columns=["speaker", "date", "location"])
+    )
+
+
+def n_speeches(path: str, chunksize: int) -> pd.Series:
+    from utils.streaming import count_speakers
+
+    return count_speakers(path=path, chunksize=chunksize)
+
+
+def stream(
+    n_speeches: pd.Series,
+    path: str,
+    chunksize: int,
+    n: int,
+    canonical: list,
+    aliases: dict,
+    politicians: list,
+    mention_aliases: dict,
+    mode: str,
+    unicode: bool,
+) -> "SpeechAggregates":
+    from utils.streaming import stream_aggregates
+
+    return stream_aggregates(
+        path=path,
+        top_speakers=list(n_speeches.head(n).index),
+        canonical=canonical,
+        aliases=aliases,
+        politicians=politicians,
+        mention_aliases=mention_aliases,
+        chunksize=chunksize,
+        mode=mode,
+        unicode=unicode,
+    )
+
+
+def streamed_aggregate(n_speeches: pd.Series, stream: "SpeechAggregates", stopwords: list, max_words: int) -> dict:
+    from utils.distinctive import log_odds
+
+    return {
+        "n_speeches": n_speeches,
+        "weekly": stream.weekly,
+        "weekly_others": stream.weekly_others,
+        "word_frequencies": stream.words.top_terms(k=max_words, exclude=wordcloud_stopwords() | set(stopwords))
+        .rename_axis("speaker")
+        .reset_index(),
+        "n_words": stream.words.n_words().sort_values(ascending=False),
+        "distinctive_frequencies": log_odds(stream.words).top_terms(k=max_words)
+        .rename_axis("speaker")
+        .reset_index(),
+    }
+
+
+def streamed_mentions(stream: "SpeechAggregates") -> pd.DataFrame:
+    return stream.mentions
+
+
+def streamed_location(stream: "SpeechAggregates") -> dict:
+    return location_analysis.summarize(tallies=stream.locations)
+
+
+def render(
+    aggregate: dict,
+    mentions: pd.DataFrame,
+    location: dict,
+    rc_params: dict,
+    candidate_order: list,
+    candidate_order_colors: list,
+    others_color: str,
+    candidate_colors: dict,
+    stopwords: list,
+    workers: int | None,
+) -> list:
+    # Las librerías de gráficos solo se importan si hay que renderizar
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LinearSegmentedColormap
+    from wordcloud import STOPWORDS
+
+    from utils.plots import (
+        circle_packing_plot,
+        directed_graph_plot,
+        stacked_bar_plot,
+        word_cloud_plot,
+    )
+    from utils.render import RenderScheduler
+
+    plt.rcParams.update(rc_params)
+    # Establecer a idioma español para que las fechas de las gráficas queden en ese idioma
+    locale.setlocale(locale.LC_TIME, locale="es_ES.UTF-8")
+
+    scheduler = RenderScheduler(workers=workers)
+    # Como tarea_1.py: una burbuja por orador
+    scheduler.add(circle_packing_plot, ds=aggregate["n_speeches"], save_path="img/speaker_analysis.png", max_bubbles=None)
+
+    weekly = aggregate["weekly"][candidate_order]
+    weekly.index = weekly.index.strftime("%b %d")
+    scheduler.add(
+        stacked_bar_plot,
+        df=weekly,
+        save_path="img/discursos_candidatos_por_semana.png",
+        color=candidate_order_colors,
+        plot_title="Discursos por Candidato en el Año 2020",
+        xlabel="Semana",
+        ylabel="Cantidad de Discursos",
+        ylim_top=24,
+    )
+    scheduler.add(
+        word_cloud_plot,
+        df=aggregate["word_frequencies"],
+        save_path="img/wordcloud_por_candidato.png",
+        plot_title="",
+        colormap=LinearSegmentedColormap.from_list(name="us_flag", colors=["#d62728", "#1f77b4"]),
+        stopwords=STOPWORDS | set(stopwords),
+        max_words=100,
+        text="frequencies",
+        speaker="speaker",
+        random_state=0,
+    )
+    scheduler.add(
+        word_cloud_plot,
+        df=aggregate["distinctive_frequencies"],
+        save_path="img/wordcloud_distintivas_por_candidato.png",
+        plot_title="",
+        colormap=LinearSegmentedColormap.from_list(name="us_flag", colors=["#d62728", "#1f77b4"]),
+        stopwords=STOPWORDS | set(stopwords),
+        max_words=100,
+        text="frequencies",
+        speaker="speaker",
+        random_state=0,
+    )
+    scheduler.add(
+        directed_graph_plot,
+        df=mentions,
+        save_path="img/graph.png",
+        plot_title="Grafo Dirigido de Menciones entre Candidatos",
+        colors=candidate_colors,
+    )
+
+    weekly_others = aggregate["weekly_others"][candidate_order + ["Otros"]]
+    weekly_others.index = weekly_others.index.strftime("%b %d")
+    scheduler.add(
+        stacked_bar_plot,
+        df=weekly_others,
+        save_path="img/discursos_candidatos_por_semana_2.png",
+        color=candidate_order_colors + [others_color],
+        plot_title="Discursos por Candidato en el Año 2020",
+        xlabel="Semana",
+        ylabel="Cantidad de Discursos",
+        ylim_top=44,
+    )
+    location_analysis.render(aggregates=location, scheduler=scheduler)
+    return scheduler.run()
+
+
+def build_pipeline(
+    path: str = DATA_PATH,
+    workers: int | None = None,
+    unicode: bool = True,
+    mode: str = "longest",
+    compact: bool = False,
+    chunksize: int | None = None,
+    text_workers: int = 1,
+    cache_dir: str | Path = CACHE_DIR,
+) -> Pipeline:
+    """
+    Build the analysis of tarea_1.py as cached stages.
+
+    Args:
+        path: The CSV with the speeches.
+        workers: The number of processes used to render the figures.
+        unicode: Whether normalize_text also replaces Unicode punctuation.
+        mode: The mention counting mode ("longest" or "overlapping").
+        compact: Whether to use categorical metadata and keep the speech data out
+            of the turn table (see utils.compact).
+        chunksize: Stream the corpus in chunks of this many speeches, keeping only
+            the aggregates in memory (see utils.streaming). All at once if None.
+        text_workers: The number of processes for segmentation, normalize_text and
+            tokenization (see utils.parallel). The output does not depend on it, so
+            like workers it is a stage option and not part of the cache keys.
+        cache_dir: The folder of the stage caches. Each mode has its own
+            subfolder, because both have stages named aggregate, mentions,
+            location and render and would evict each other's caches.
+
+    Returns:
+        The pipeline, ready to run.
+    """
+    if chunksize is None:
+        analysis = [
+            Stage("load", load, params={"path": path, "compact": compact}, files=[path]),
+            Stage("segment", segment, deps=["load"], params={"compact": compact}, options={"workers": text_workers}),
+            Stage(
+                "normalize_names",
+                normalize_names,
+                deps=["segment"],
+                params={"canonical": POLITICIANS, "aliases": SPEAKER_NAMES},
+            ),
+            Stage("top_speakers", top_speakers, deps=["load"], params={"n": 5}),
+            Stage(
+                "clean_text",
+                clean_text,
+                deps=["normalize_names", "top_speakers"],
+                params={"parties": PARTIES, "unicode": unicode},
+                options={"workers": text_workers},
+            ),
+            Stage("dtm", dtm, deps=["clean_text"], options={"workers": text_workers}),
+            Stage(
+                "aggregate",
+                aggregate,
+                deps=["load", "normalize_names", "clean_text", "dtm", "top_speakers"],
+                params={"politicians": POLITICIANS, "stopwords": EXTRA_STOPWORDS, "max_words": 100},
+            ),
+            Stage(
+                "mentions",
+                mentions,
+                deps=["clean_text", "top_speakers"],
+                params={"aliases": MENTIONS, "mode": mode},
+            ),
+            Stage("location", location, params={"path": path}, files=[path]),
+        ]
+    else:
+        # Modo streaming: una pasada para elegir los oradores principales y otra que reduce cada chunk a sus conteos
+        analysis = [
+            Stage("n_speeches", n_speeches, params={"path": path, "chunksize": chunksize}, files=[path]),
+            Stage(
+                "stream",
+                stream,
+                deps=["n_speeches"],
+                params={
+                    "path": path,
+                    "chunksize": chunksize,
+                    "n": 5,
+                    "canonical": POLITICIANS,
+                    "aliases": SPEAKER_NAMES,
+                    "politicians": POLITICIANS,
+                    "mention_aliases": MENTIONS,
+                    "mode": mode,
+                    "unicode": unicode,
+                },
+                files=[path],
+            ),
+            Stage(
+                "aggregate",
+                streamed_aggregate,
+                deps=["n_speeches", "stream"],
+                params={"stopwords": EXTRA_STOPWORDS, "max_words": 100},
+            ),
+            Stage("mentions", streamed_mentions, deps=["stream"]),
+            Stage("location", streamed_location, deps=["stream"]),
+        ]
+
+    return Pipeline(
+        cache_dir=Path(cache_dir) / ("memory" if chunksize is None else "streaming"),
+        stages=analysis
+        + [
+            Stage(
+                "render",
+                render,
+                deps=["aggregate", "mentions", "location"],
+                params={
+                    "rc_params": RC_PARAMS,
+                    "candidate_order": CANDIDATE_ORDER,
+                    "candidate_order_colors": CANDIDATE_ORDER_COLORS,
+                    "others_color": OTHERS_COLOR,
+                    "candidate_colors": CANDIDATE_COLORS,
+                    "stopwords": EXTRA_STOPWORDS,
+                },
+                options={"workers": workers},
+                outputs=IMAGES,
+            ),
+        ]
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default=DATA_PATH)
+    parser.add_argument("--chunksize", type=int, default=None, help="Leer el corpus por partes de este tamaño")
+    parser.add_argument("--text-workers", type=int, default=1, help="Procesos para segmentar, limpiar y tokenizar")
+    args = parser.parse_args()
+
+    pipeline = build_pipeline(path=args.path, chunksize=args.chunksize, text_workers=args.text_workers)
+    pipeline.run()
+    pipeline.print_log()
@@ -0,0 +1,218 @@
+import argparse
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+import pyarrow.compute as pc
+
+from utils.clean_data import normalize_text
+from utils.dtm import tokenize
+from utils.load_data import DATA_PATH, read_speeches
+from utils.locations import resolve_locations
+from utils.sketches import HeavyHitters, HyperLogLog
+from utils.speakers import speaker_registry
+from utils.streaming import normalize_chunks, segment_chunks
+from utils.time_buckets import bucket_starts
+
+
+def _string_keys(values: pd.Series) -> tuple:
+    # Clave de 64 bits de cada valor distinto (sin los faltantes) y cuántas veces aparece
+    counts = values.dropna().astype("str").value_counts(sort=False)
+    return pd.util.hash_array(counts.index.to_numpy(dtype=object)), counts.to_numpy(), counts.index.to_numpy(dtype=object)
+
+
+def _top(summary: HeavyHitters, k: int | None, name: str) -> pd.DataFrame:
+    # A igual cuenta, orden alfabético (como location_analysis)
+    _, counts, labels = summary.top()
+    top = pd.DataFrame({name: labels, "count": counts, "upper": counts + summary.error})
+    return top.sort_values(["count", name], ascending=[False, True]).head(k).reset_index(drop=True)
+
+
+class StreamStatistics:
+    """
+    Approximate statistics of a growing set of speeches, with fixed memory per key.
+
+    Each (speaker, week) keeps a HyperLogLog of its words, so the distinct
+    vocabulary per speaker, per week or per speaker and week is the estimate of
+    the merged registers; the words said are counted exactly (one integer per
+    key). The most active speakers (speeches where they talk) and the most
+    frequent locations (resolved states and news channels) are HeavyHitters
+    summaries, which bound the count of every key they keep. Everything merges,
+    so chunks can be summarized separately and combined.
+
+    Args:
+        precision: The precision of the HyperLogLog sketches, see HyperLogLog.
+        capacity: The number of counters of the speakers and locations summaries.
+        freq: The time buckets of the vocabulary, see bucket_starts.
+    """
+
+    def __init__(self, precision: int = 12, capacity: int = 100, freq="week"):
+        self.precision = precision
+        self.capacity = capacity
+        self.freq = freq
+        self.vocabulary = {}
+        self.words = pd.Series(dtype="int64")
+        self.speakers = HeavyHitters(capacity=capacity)
+        self.locations = HeavyHitters(capacity=capacity)
+
+    def update(self, speeches: pd.DataFrame, turns: pd.DataFrame):
+        """
+        Add the speeches and turns of one chunk.
+
+        Args:
+            speeches: The speeches of the chunk, with the location column.
+            turns: Its turns with canonical speakers, the date and clean_text.
+        """
+        # Vocabulario: todas las palabras de cada (speaker, semana) a su HyperLogLog en una pasada, las
+        # repetidas no cambian los registros así que no hace falta quitarlas
+        known = turns[turns["speaker"].notna() & turns["date"].notna()]
+        codes, uniques = pd.factorize(
+            pd.MultiIndex.from_arrays([known["speaker"].astype(object), bucket_starts(known["date"], freq=self.freq)])
+        )
+        tokens = tokenize(known["clean_text"])
+        words = pc.list_flatten(tokens)
+        word_keys = pd.util.hash_array(words.dictionary.to_numpy(zero_copy_only=False).astype(object))
+        token_groups = codes[pc.list_parent_indices(tokens).to_numpy()]
+        sketches = HyperLogLog.from_groups(
+            word_keys, token_groups, n_groups=len(uniques), precision=self.precision, positions=words.indices.to_numpy()
+        )
+        for group, sketch in zip(uniques, sketches):
+            self.vocabulary[group] = self.vocabulary[group].merge(sketch) if group in self.vocabulary else sketch
+        n_words = pd.Series(np.bincount(token_groups, minlength=len(uniques)), index=uniques)
+        self.words = self.words.add(n_words, fill_value=0).astype("int64")
+
+        # Discursos en los que habla cada orador (una vez por discurso)
+        speakers = turns["speaker"].astype(object).reset_index().drop_duplicates()["speaker"]
+        keys, counts, labels = _string_keys(speakers)
+        self.speakers.update(keys, counts, labels=labels)
+
+        resolved = resolve_locations(speeches["location"])
+        keys, counts, labels = _string_keys(resolved["state"].astype(object).fillna(resolved["news_channel"].astype(object)))
+        self.locations.update(keys, counts, labels=labels)
+
+    def merge(self, other: "StreamStatistics") -> "StreamStatistics":
+        """
+        Combine the statistics of two sets of speeches, with the same parameters.
+
+        Args:
+            other: The statistics of the other set.
+
+        Returns:
+            The statistics of both sets together.
+        """
+        merged = StreamStatistics(precision=self.precision, capacity=self.capacity, freq=self.freq)
+        merged.vocabulary = dict(self.vocabulary)
+        for group, sketch in other.vocabulary.items():
+            merged.vocabulary[group] = merged.vocabulary[group].merge(sketch) if group in merged.vocabulary else sketch
+        merged.words = self.words.add(other.words, fill_value=0).astype("int64")
+        merged.speakers = self.speakers.merge(other.speakers)
+        merged.locations = self.locations.merge(other.locations)
+        return merged
+
+    def distinct_words(self, by: str = "speaker") -> pd.Series:
+        """
+        Estimate the distinct vocabulary, merging the sketches of each key.
+
+        Args:
+            by: "speaker", "week" (the time bucket) or "both".
+
+        Returns:
+            The estimated number of distinct words per key, sorted by key.
+        """
+        levels = {"speaker": [0], "week": [1], "both": [0, 1]}[by]
+        merged = {}
+        for group, sketch in self.vocabulary.items():
+            key = tuple(group[level] for level in levels)
+            key = key[0] if len(key) == 1 else key
+            merged[key] = merged[key].merge(sketch) if key in merged else sketch
+        return pd.Series({key: sketch.estimate() for key, sketch in merged.items()}, name="distinct_words").sort_index()
+
+    def word_totals(self, by: str = "speaker") -> pd.Series:
+        """
+        Count the words said per key, exactly.
+
+        Args:
+            by: "speaker", "week" or "both".
+
+        Returns:
+            The number of words per key, sorted by key.
+        """
+        if self.words.empty:
+            return self.words.rename("words")
+        level = {"speaker": 0, "week": 1, "both": [0, 1]}[by]
+        return self.words.groupby(level=level).sum().rename("words").sort_index()
+
+    def top_speakers(self, k: int = 5) -> pd.DataFrame:
+        """
+        Get the speakers that talk in the most speeches.
+
+        Args:
+            k: The number of speakers.
+
+        Returns:
+            One row per speaker with its lower (count) and upper bound, from most to least.
+        """
+        return _top(self.speakers, k, "speaker")
+
+    def top_locations(self, k: int = 5) -> pd.DataFrame:
+        """
+        Get the most frequent states and news channels.
+
+        Args:
+            k: The number of locations.
+
+        Returns:
+            One row per location with its lower (count) and upper bound, from most to least.
+        """
+        return _top(self.locations, k, "location")
+
+
+def statistics_from_chunk(speeches: pd.DataFrame, turns: pd.DataFrame, unicode: bool = True, **kwargs) -> StreamStatistics:
+    """
+    Compute the statistics of one chunk of speeches and their turns, see segment_chunks.
+
+    Args:
+        speeches: The speeches of the chunk.
+        turns: Its turns, with canonical speakers.
+        unicode: Passed to normalize_text.
+        **kwargs: The arguments of StreamStatistics.
+
+    Returns:
+        The statistics of the chunk.
+    """
+    statistics = StreamStatistics(**kwargs)
+    turns = turns.assign(clean_text=normalize_text(df=turns, column_name="text", unicode=unicode))
+    statistics.update(speeches, turns)
+    return statistics
+
+
+def stream_statistics(path: str = DATA_PATH, chunksize: int = 1000, unicode: bool = True, **kwargs) -> StreamStatistics:
+    """
+    Read the corpus in chunks and reduce it to its approximate statistics.
+
+    Args:
+        path: The CSV with the speeches.
+        chunksize: The number of speeches per chunk.
+        unicode: Passed to normalize_text.
+        **kwargs: The arguments of StreamStatistics.
+
+    Returns:
+        The statistics of the whole corpus.
+    """
+    chunks = normalize_chunks(segment_chunks(read_speeches(path, chunksize=chunksize)), speaker_registry())
+    partials = (statistics_from_chunk(speeches, turns, unicode=unicode, **kwargs) for speeches, turns in chunks)
+    return reduce(StreamStatistics.merge, partials, StreamStatistics(**kwargs))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default=DATA_PATH)
+    parser.add_argument("--chunksize", type=int, default=1000)
+    parser.add_argument("--precision", type=int, default=12)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    statistics = stream_statistics(args.path, chunksize=args.chunksize, precision=args.precision)
+    print(pd.concat([statistics.distinct_words().round().astype("int64"), statistics.word_totals()], axis=1).sort_values("words", ascending=False))
+    print(statistics.top_speakers(args.top).to_string(index=False))
+    print(statistics.top_locations(args.top).to_string(index=False))
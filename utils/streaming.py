@@ -0,0 +1,261 @@
+from functools import reduce
+
+import pandas as pd
+
+from utils import location_analysis
+from utils.clean_data import normalize_text
+from utils.dtm import DocumentTermMatrix
+from utils.load_data import DATA_PATH, read_speeches
+from utils.mentions import MentionCounter
+from utils.segmentation import segment_turns
+from utils.speakers import SpeakerRegistry
+from utils.time_buckets import count_speeches
+
+
+def count_speakers(path: str = DATA_PATH, chunksize: int = 1000) -> pd.Series:
+    """
+    Count the speeches of each speaker reading only the speaker column, in chunks.
+
+    Args:
+        path: The CSV with the speeches.
+        chunksize: The number of speeches per chunk.
+
+    Returns:
+        The number of speeches per speaker, from most to least.
+    """
+    counts = [chunk.groupby("speaker").size() for chunk in read_speeches(path, chunksize=chunksize, columns=["speaker"])]
+    if not counts:
+        return pd.Series(dtype="int64", index=pd.Index([], name="speaker"))
+    return reduce(_add_counts, counts).sort_values(ascending=False)
+
+
+def segment_chunks(chunks):
+    """
+    Split the speeches of each chunk into turns, with the date of their speech.
+
+    Args:
+        chunks: The speeches, in chunks (see read_speeches).
+
+    Yields:
+        The speeches of the chunk and its turns, indexed by speech.
+    """
+    for speeches in chunks:
+        turns = (
+            segment_turns(df=speeches)
+            .drop(columns="turn_index")
+            .join(speeches[["date"]], on="speech_id")
+            .set_index("speech_id")
+            .rename_axis(None)
+        )
+        yield speeches, turns
+
+
+def normalize_chunks(chunks, registry: SpeakerRegistry):
+    """
+    Canonicalize the speaker of the turns of each chunk.
+
+    Args:
+        chunks: The speeches and turns of each chunk, see segment_chunks.
+        registry: The registry with the canonical names, shared by all the chunks.
+
+    Yields:
+        The speeches of the chunk and its turns with canonical speakers.
+    """
+    for speeches, turns in chunks:
+        turns["speaker"] = registry.canonicalize(turns["speaker"])
+        yield speeches, turns
+
+
+def clean_chunks(chunks, top_speakers: list, unicode: bool = True):
+    """
+    Normalize and tokenize the turns of the top speakers of each chunk.
+
+    Args:
+        chunks: The speeches and turns of each chunk, see normalize_chunks.
+        top_speakers: The speakers whose words are counted.
+        unicode: Passed to normalize_text.
+
+    Yields:
+        The speeches of the chunk, its turns, the turns of the top speakers with
+        their clean_text and the word counts of each top speaker.
+    """
+    for speeches, turns in chunks:
+        top = turns[turns["speaker"].isin(top_speakers)].copy()
+        top["clean_text"] = normalize_text(df=top, column_name="text", unicode=unicode)
+        words = DocumentTermMatrix.from_texts(top["clean_text"]).groupby(top["speaker"])
+        yield speeches, turns, top, words
+
+
+def _add_counts(left, right):
+    # Las celdas que están en una sola de las tablas cuentan 0 en la otra
+    return left.add(right, fill_value=0).fillna(0).astype("int64")
+
+
+class SpeechAggregates:
+    """
+    The small aggregates of a set of speeches, which add up across chunks.
+
+    Only counts are kept (speeches per week, words and mentions per speaker,
+    speeches per state and news channel), so merging the aggregates of every
+    chunk gives the same result as computing them over the whole corpus.
+
+    Args:
+        weekly: The distinct speeches per week of each top speaker.
+        weekly_others: The same for the politicians, with the rest grouped in "Otros".
+        words: The word counts of each top speaker.
+        mentions: The mentions matrix between the top speakers.
+        locations: The location tallies, see location_analysis.tally.
+    """
+
+    def __init__(
+        self,
+        weekly: pd.DataFrame,
+        weekly_others: pd.DataFrame,
+        words: DocumentTermMatrix,
+        mentions: pd.DataFrame,
+        locations: dict,
+    ):
+        self.weekly = weekly
+        self.weekly_others = weekly_others
+        self.words = words
+        self.mentions = mentions
+        self.locations = locations
+
+    @classmethod
+    def from_chunk(
+        cls,
+        speeches: pd.DataFrame,
+        turns: pd.DataFrame,
+        top: pd.DataFrame,
+        words: DocumentTermMatrix,
+        top_speakers: list,
+        politicians: list,
+        counter: MentionCounter,
+        mode: str = "longest",
+    ) -> "SpeechAggregates":
+        """
+        Compute the aggregates of one chunk, see clean_chunks.
+
+        Args:
+            speeches: The speeches of the chunk.
+            turns: Its turns, with canonical speakers.
+            top: The turns of the top speakers, with their clean_text.
+            words: The word counts of each top speaker.
+            top_speakers: The top speakers of the whole corpus.
+            politicians: The speakers counted in weekly_others.
+            counter: The mention counter, shared by all the chunks.
+            mode: The counting mode of the mentions.
+
+        Returns:
+            The aggregates of the chunk.
+        """
+        others = turns[turns["speaker"].isin(politicians)].copy()
+        others["speaker_2"] = others["speaker"].astype("str").where(others["speaker"].isin(top_speakers), "Otros")
+        weekly = count_speeches(df=top, by="speaker", freq="week")
+        weekly_others = count_speeches(df=others, by="speaker_2", freq="week")
+        # Las columnas de cada chunk tienen sus propias categorías, se pasan a texto para poder sumarlas
+        weekly.columns = weekly.columns.astype("str")
+        weekly_others.columns = weekly_others.columns.astype("str")
+        return cls(
+            weekly=weekly,
+            weekly_others=weekly_others,
+            words=words,
+            mentions=counter.matrix(texts=top["clean_text"], speakers=top["speaker"], index=top_speakers, mode=mode)[
+                top_speakers
+            ],
+            locations=location_analysis.tally(speeches[["speaker", "location"]]),
+        )
+
+    @classmethod
+    def empty(
+        cls, top_speakers: list, politicians: list, counter: MentionCounter, mode: str = "longest"
+    ) -> "SpeechAggregates":
+        """
+        Compute the aggregates of no speeches, like from_chunk with an empty chunk.
+
+        Args:
+            top_speakers: The top speakers of the whole corpus.
+            politicians: The speakers counted in weekly_others.
+            counter: The mention counter.
+            mode: The counting mode of the mentions.
+
+        Returns:
+            The aggregates with no counts.
+        """
+        speeches = pd.DataFrame(
+            {
+                "speaker": pd.Series(dtype="object"),
+                "text": pd.Series(dtype="object"),
+                "date": pd.Series(dtype="datetime64[s]"),
+                "location": pd.Series(dtype="category"),
+            }
+        )
+        (chunk,) = clean_chunks(normalize_chunks(segment_chunks([speeches]), SpeakerRegistry(canonical=[])), top_speakers)
+        return cls.from_chunk(*chunk, top_speakers=top_speakers, politicians=politicians, counter=counter, mode=mode)
+
+    def merge(self, other: "SpeechAggregates") -> "SpeechAggregates":
+        """
+        Add up the aggregates of two sets of speeches.
+
+        Args:
+            other: The aggregates of the other set.
+
+        Returns:
+            The aggregates of both sets together.
+        """
+        return SpeechAggregates(
+            weekly=_add_counts(self.weekly, other.weekly).sort_index().sort_index(axis=1),
+            weekly_others=_add_counts(self.weekly_others, other.weekly_others).sort_index().sort_index(axis=1),
+            words=self.words.merge(other.words),
+            mentions=self.mentions + other.mentions,
+            locations=location_analysis.merge_tallies(self.locations, other.locations),
+        )
+
+
+def stream_aggregates(
+    path: str,
+    top_speakers: list,
+    canonical: list,
+    aliases: dict,
+    politicians: list,
+    mention_aliases: dict,
+    chunksize: int = 1000,
+    mode: str = "longest",
+    unicode: bool = True,
+) -> SpeechAggregates:
+    """
+    Read the corpus in chunks and reduce it to its aggregates, keeping only one chunk in memory.
+
+    Each chunk goes through segmentation, name normalization, text cleaning and
+    tokenization as a chain of generators, and only its aggregates are kept and
+    merged into the running total.
+
+    Args:
+        path: The CSV with the speeches.
+        top_speakers: The top speakers of the whole corpus (see count_speakers).
+        canonical: The canonical speaker names.
+        aliases: Extra spellings of the speaker names.
+        politicians: The speakers counted in weekly_others.
+        mention_aliases: The names to count in the mentions matrix and their aliases.
+        chunksize: The number of speeches per chunk.
+        mode: The counting mode of the mentions.
+        unicode: Passed to normalize_text.
+
+    Returns:
+        The aggregates of the whole corpus.
+    """
+    registry = SpeakerRegistry(canonical=canonical, aliases=aliases)
+    counter = MentionCounter(aliases=mention_aliases)
+    chunks = read_speeches(path, chunksize=chunksize)
+    chunks = clean_chunks(normalize_chunks(segment_chunks(chunks), registry), top_speakers, unicode=unicode)
+    partials = (
+        SpeechAggregates.from_chunk(
+            *chunk, top_speakers=top_speakers, politicians=politicians, counter=counter, mode=mode
+        )
+        for chunk in chunks
+    )
+    # Sin discursos (o si no queda ningún chunk) los agregados quedan vacíos, como en memoria
+    first = next(partials, None)
+    if first is None:
+        return SpeechAggregates.empty(top_speakers=top_speakers, politicians=politicians, counter=counter, mode=mode)
+    return reduce(SpeechAggregates.merge, partials, first)
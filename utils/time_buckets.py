@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+# Granularidades con nombre, como períodos de pandas (la semana empieza el lunes)
+PERIODS = {"day": "D", "week": "W", "month": "M"}
+
+
+def bucket_starts(dates: pd.Series, freq="week", origin: pd.Timestamp | None = None) -> pd.Series:
+    """
+    Assign each date to the start of its time bucket.
+
+    Args:
+        dates: The dates to bucket.
+        freq: "day", "week" or "month" (or a pandas period alias like "W"); a fixed
+            window like "14D", counted from origin; or the sorted start of each
+            window as a list of dates, where dates before the first start get NaT.
+        origin: The start of the first window for fixed windows. The first day
+            with data if None.
+
+    Returns:
+        The start of the bucket of each date, aligned with dates.
+    """
+    if not isinstance(freq, str):
+        starts = pd.DatetimeIndex(freq)
+        # -1 (antes de la primera ventana) queda como NaT
+        position = starts.searchsorted(dates, side="right") - 1
+        return pd.Series(starts.take(position, allow_fill=True), index=dates.index, name=dates.name)
+    freq = PERIODS.get(freq, freq)
+    if freq in PERIODS.values():
+        return dates.dt.to_period(freq).dt.start_time
+    window = pd.Timedelta(freq)
+    origin = dates.min().normalize() if origin is None else pd.Timestamp(origin)
+    return origin + (dates - origin) // window * window
+
+
+def count_speeches(
+    df: pd.DataFrame,
+    by: str,
+    freq="week",
+    date: str = "date",
+    speech_id: str | None = None,
+    origin: pd.Timestamp | None = None,
+) -> pd.DataFrame:
+    """
+    Count the distinct speeches of each key in each time bucket.
+
+    The turns are reduced to integer codes (bucket, key, speech), the repeated
+    combinations are dropped with np.unique and the rest are counted with
+    np.bincount, so there is no Python call per row or per group.
+
+    Args:
+        df: The turns, one row per turn.
+        by: The column with the key, like the speaker.
+        freq: The buckets, see bucket_starts.
+        date: The column with the date.
+        speech_id: The column with the speech of each turn. The index if None.
+        origin: The start of the first window for fixed windows, see bucket_starts.
+
+    Returns:
+        A DataFrame with one row per bucket (sorted) and one column per key, with
+        the number of distinct speeches. Rows with a missing key or date are left out.
+    """
+    buckets = bucket_starts(df[date], freq=freq, origin=origin)
+    speeches = df.index if speech_id is None else df[speech_id]
+    # Solo quedan los buckets y claves de filas completas, como en groupby
+    valid = (buckets.notna() & df[by].notna() & pd.notna(speeches)).to_numpy()
+    bucket_codes, bucket_values = pd.factorize(buckets[valid], sort=True)
+    key_codes, key_values = pd.factorize(df[by][valid], sort=True)
+    speech_codes, speech_values = pd.factorize(speeches[valid])
+
+    n_buckets, n_keys, n_speeches = len(bucket_values), len(key_values), len(speech_values)
+    # Un solo entero por combinación (bucket, clave, discurso); unique deja cada discurso una vez
+    combined = (bucket_codes.astype(np.int64) * n_keys + key_codes) * n_speeches + speech_codes
+    cells = np.unique(combined) // n_speeches
+    counts = np.bincount(cells, minlength=n_buckets * n_keys).reshape(n_buckets, n_keys)
+    return pd.DataFrame(
+        counts,
+        index=pd.Index(bucket_values, name=freq if isinstance(freq, str) else "bucket"),
+        columns=pd.Index(key_values, name=by),
+    )